@@ -43,6 +43,7 @@ setuptools.setup(
         "python-dateutil",
         "pytz",
     ],
+    extras_require={"brotli": ["brotli"], "related": ["numpy", "scipy"]},
     entry_points={"console_scripts": ["ssite=ssite.cli:main"]},
     packages=setuptools.find_packages(),
     classifiers=(
@@ -24,12 +24,20 @@ simple as if it were hand-written.
 from __future__ import print_function
 
 import argparse
+import glob
+import html
+import html.parser
+import os
+import os.path
 import re
+import sys
 import textwrap
 import urllib.parse
 
 import bs4
 
+import ssite.files
+
 
 def extract_redirect(href):
     url = urllib.parse.urlsplit(href)
@@ -51,64 +59,154 @@ def unredirect_links(a_tag):
         a_tag["href"] = redirect
 
 
-def remove_html_cruft(text):
-    soup = bs4.BeautifulSoup(text, "html.parser")
-
-    # Loop until we have cleaned up all tags. We can't do it in a single
-    # pass since we are modifying the descendents tree as we go.
-    isnotclean = True
-    while isnotclean:
-        isnotclean = False
-        for tag in soup.descendants:
-            if isinstance(tag, bs4.element.NavigableString):
-                # Wrap text.
-                text = tag.string
-                wrapped = textwrap.fill(text, width=80)
-                if text != wrapped:
-                    tag.string.replace_with(wrapped)
-                    isnotclean = True
-                continue
+# textwrap replaces each of these whitespace characters with a space.
+_WHITESPACE_TO_SPACE = str.maketrans("\n\x0b\x0c\r", "    ")
 
-            # Skip attributes.
-            if not isinstance(tag, bs4.element.Tag):
-                continue
+# Elements whose text is kept as written, rather than wrapped.
+PREFORMATTED_ELEMENTS = frozenset(("pre", "script", "textarea"))
 
-            # Remove unwanted tags.
-            # Remove empty paragraphs.
-            if tag.name == "p" and not tag.contents:
-                tag.decompose()
-                isnotclean = True
-                continue
-            # Remove any style elements.
-            if tag.name == "style":
-                tag.decompose()
-                isnotclean = True
-                continue
-            # Remove any span elements.
-            if tag.name == "span":
-                tag.unwrap()
-                isnotclean = True
+_PREFORMATTED_PATTERN = re.compile(
+    r"<(pre|script|textarea)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+
+
+def wrap_text(text):
+    """Wrap ``text`` to 80 columns.
+
+    Wrapping is repeated until the text no longer changes, since wrapping
+    already-wrapped text can occasionally move words between lines.
+    """
+    # Fast path: most strings fit on a single line, in which case wrapping
+    # only normalizes whitespace and drops trailing whitespace. Tabs are
+    # expanded to a variable width, so leave those to textwrap.
+    if "\t" not in text:
+        single_line = text.translate(_WHITESPACE_TO_SPACE).rstrip(" ")
+        # textwrap also drops a trailing "word" made only of other whitespace,
+        # such as a non-breaking space.
+        if len(single_line) <= 80 and not single_line[-1:].isspace():
+            return single_line
+
+    wrapped = textwrap.fill(text, width=80)
+    while wrapped != text:
+        text = wrapped
+        wrapped = textwrap.fill(text, width=80)
+    return wrapped
+
+
+def _is_removed(tag):
+    # Remove any style elements.
+    # Remove empty paragraphs.
+    return tag.name == "style" or (tag.name == "p" and not tag.contents)
+
+
+def _clean_children(tag, preformatted=False):
+    """Replace the children of ``tag`` with their cleaned versions.
+
+    Must be called after the children themselves have been cleaned. Text is
+    wrapped, unless ``preformatted`` is set.
+    """
+    new_contents = []
+    changed = False
+    for child in tag.contents:
+        if isinstance(child, bs4.element.NavigableString):
+            if preformatted:
+                new_contents.append(child)
                 continue
+            # Wrap text.
+            wrapped = wrap_text(child)
+            if wrapped != child:
+                child = bs4.element.NavigableString(wrapped)
+                changed = True
+            new_contents.append(child)
+        elif not isinstance(child, bs4.element.Tag):
+            new_contents.append(child)
+        elif _is_removed(child):
+            changed = True
+        elif child.name == "span":
+            # Remove any span elements, keeping their contents.
+            new_contents.extend(child.contents)
+            changed = True
+        else:
+            new_contents.append(child)
+
+    if not changed:
+        return
 
-            # Clean up desired tags.
-            # Clean up links.
-            if tag.name == "a":
-                unredirect_links(tag)
+    # Rebuild the list of children in one go. Removing or unwrapping children
+    # one at a time requires a linear search for each child's position.
+    for child in list(tag.contents):
+        child.extract()
+    for child in new_contents:
+        tag.append(child)
+
+
+def clean_tree(root):
+    """Remove unwanted tags and attributes from ``root`` in place.
+
+    Tags are cleaned in a single post-order pass: each tag is cleaned after
+    all of its children, so removing an empty paragraph or unwrapping a span
+    never requires walking the tree again. Text within
+    :data:`PREFORMATTED_ELEMENTS` isn't wrapped.
+    """
+    stack = [(root, False, False)]
+    while stack:
+        tag, children_cleaned, preformatted = stack.pop()
+        preformatted = preformatted or tag.name in PREFORMATTED_ELEMENTS
+        if not children_cleaned:
+            stack.append((tag, True, preformatted))
+            for child in tag.contents:
+                # Style elements are removed along with their contents, so
+                # there is no need to clean them.
+                if isinstance(child, bs4.element.Tag) and child.name != "style":
+                    stack.append((child, False, preformatted))
+            continue
+
+        _clean_children(tag, preformatted=preformatted)
+        if tag is root:
+            continue
+
+        # Clean up desired tags.
+        # Clean up links.
+        if tag.name == "a":
+            unredirect_links(tag)
+
+        # Remove any styles or classes.
+        del tag["id"]
+        del tag["class"]
+        del tag["style"]
 
-            # Remove any styles or classes.
-            del tag["id"]
-            del tag["class"]
-            del tag["style"]
 
+def remove_html_cruft(text):
+    # Keep the whitespace of preformatted elements when pretty printing.
+    soup = bs4.BeautifulSoup(
+        text, "html.parser", preserve_whitespace_tags=PREFORMATTED_ELEMENTS
+    )
+    clean_tree(soup)
     return soup.prettify()
 
 
-def remove_closing_tags(text):
+def _outside_preformatted(func, text):
+    """Apply ``func`` to the parts of ``text`` outside preformatted elements."""
+    parts = []
+    start = 0
+    for match in _PREFORMATTED_PATTERN.finditer(text):
+        parts.append(func(text[start : match.start()]))
+        parts.append(match.group(0))
+        start = match.end()
+    parts.append(func(text[start:]))
+    return "".join(parts)
+
+
+def _remove_closing_tags(text):
     text = re.sub(r"<p>\s*", "<p>", text)
     return re.sub(r"\s*</p>", "\n", text)
 
 
-def remove_extra_whitespace(text):
+def remove_closing_tags(text):
+    return _outside_preformatted(_remove_closing_tags, text)
+
+
+def _remove_extra_whitespace(text):
     # No indentation necessary for hand-written HTML.
     text = re.sub(r"\n[ \t]+", "\n", text)
 
@@ -120,7 +218,229 @@ def remove_extra_whitespace(text):
     return text
 
 
-def cleanhtml(input_, output=None):
+def remove_extra_whitespace(text):
+    return _outside_preformatted(_remove_extra_whitespace, text)
+
+
+# Elements which never have an end tag.
+VOID_ELEMENTS = frozenset(
+    (
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "source",
+        "track",
+        "wbr",
+    )
+)
+
+
+_ASCII_WHITESPACE = " \t\n\r\x0c"
+_ASCII_WHITESPACE_PATTERN = re.compile("[{}]+".format(_ASCII_WHITESPACE))
+# The last run of characters in a text which aren't ASCII whitespace.
+_LAST_WORD_PATTERN = re.compile("[^{}]*$".format(_ASCII_WHITESPACE))
+# Characters of text buffered before writing it out, even without a tag.
+_MAX_TEXT_BUFFER = 64 * 1024
+
+
+class StreamingCleaner(html.parser.HTMLParser):
+    """Clean HTML as it is tokenized, writing the result to ``out_file``.
+
+    This cleans the same cruft as :func:`remove_html_cruft`,
+    :func:`remove_closing_tags`, and :func:`remove_extra_whitespace`, but
+    without building a document tree, so memory use doesn't depend on the
+    size of the document. Whitespace is normalized rather than preserved:
+    each tag and run of text is written on its own line, except where
+    whitespace around links and within paragraphs is unwanted. Runs of ASCII
+    whitespace are collapsed, but other whitespace, such as non-breaking
+    spaces, is kept. The contents of :data:`PREFORMATTED_ELEMENTS` are
+    written as is.
+    """
+
+    def __init__(self, out_file):
+        super().__init__(convert_charrefs=True)
+        self._out_file = out_file
+        # Depth of <style> elements, whose contents are removed.
+        self._style_depth = 0
+        # Depth of preformatted elements, whose whitespace is kept.
+        self._preformatted_depth = 0
+        self._in_script = False
+        # A <p> start tag is held back until there is content for it, so that
+        # empty paragraphs can be removed.
+        self._pending_paragraph = None
+        # The tokenizer may split a run of text at chunk boundaries, so text
+        # is buffered until the next tag or until the buffer is full.
+        self._text_parts = []
+        self._text_size = 0
+        self._last_kind = None
+        self._last_text = ""
+
+    def _separator(self, kind, text):
+        last_kind = self._last_kind
+        if last_kind is None or self._preformatted_depth:
+            return ""
+        # Whitespace around <a> tags and after <p> is almost always unwanted.
+        if last_kind in ("start_a", "start_p") or kind == "end_a":
+            return ""
+        if kind == "start_a" and self._last_text.endswith("("):
+            return ""
+        if last_kind == "end_a" and text[:1] in (")", "."):
+            return ""
+        return "\n"
+
+    def _flush_text(self, keep_partial_word=False):
+        if not self._text_parts:
+            return
+        text = "".join(self._text_parts)
+        self._text_parts = []
+        self._text_size = 0
+        if keep_partial_word:
+            # Hold back the last word, which may continue in the next chunk.
+            match = _LAST_WORD_PATTERN.search(text)
+            if 0 < match.start() < len(text):
+                self._text_parts.append(match.group(0))
+                self._text_size = len(match.group(0))
+                text = text[: match.start()]
+        text = _ASCII_WHITESPACE_PATTERN.sub(" ", text).strip(_ASCII_WHITESPACE)
+        if text:
+            self._write("text", html.escape(wrap_text(text), quote=False))
+
+    def _write(self, kind, text):
+        if self._pending_paragraph is not None:
+            pending_paragraph = self._pending_paragraph
+            self._pending_paragraph = None
+            self._write("start_p", pending_paragraph)
+
+        self._out_file.write(self._separator(kind, text))
+        self._out_file.write(text)
+        self._last_kind = kind
+        self._last_text = text
+
+    def _format_start_tag(self, tag, attrs, self_closing=False):
+        parts = [tag]
+        for name, value in attrs:
+            # Remove any styles or classes.
+            if name in ("id", "class", "style"):
+                continue
+            # Clean up links.
+            if tag == "a" and name == "href" and value:
+                redirect = extract_redirect(value)
+                if redirect:
+                    value = " ".join(redirect)
+            if value is None:
+                parts.append(name)
+            else:
+                parts.append('{}="{}"'.format(name, html.escape(value)))
+        return "<{}{}>".format(" ".join(parts), "/" if self_closing else "")
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag == "style":
+            self._style_depth += 1
+        if self._style_depth or tag == "span":
+            return
+
+        if tag == "p" and not self._preformatted_depth:
+            self._pending_paragraph = self._format_start_tag(tag, attrs)
+            return
+        self._write(
+            "start_a" if tag == "a" else "start",
+            self._format_start_tag(tag, attrs, self_closing=tag in VOID_ELEMENTS),
+        )
+        if tag in PREFORMATTED_ELEMENTS:
+            self._preformatted_depth += 1
+        if tag == "script":
+            self._in_script = True
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text()
+        if self._style_depth or tag in ("span", "style"):
+            return
+        self._write("start", self._format_start_tag(tag, attrs, self_closing=True))
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == "style":
+            self._style_depth = max(self._style_depth - 1, 0)
+            return
+        if self._style_depth or tag == "span":
+            return
+
+        if tag in PREFORMATTED_ELEMENTS and self._preformatted_depth:
+            self._write("end", "</{}>".format(tag))
+            self._preformatted_depth -= 1
+            if tag == "script":
+                self._in_script = False
+            return
+        if tag == "p" and not self._preformatted_depth:
+            if self._pending_paragraph is not None:
+                # Remove empty paragraphs.
+                self._pending_paragraph = None
+                return
+            # Closing paragraph tags are optional.
+            self._out_file.write("\n")
+            self._last_kind = "end_p"
+            return
+        self._write("end_a" if tag == "a" else "end", "</{}>".format(tag))
+
+    def handle_data(self, data):
+        if self._style_depth:
+            return
+        if self._preformatted_depth:
+            # Script contents aren't HTML, so the tokenizer passes them
+            # through without decoding character references.
+            if not self._in_script:
+                data = html.escape(data, quote=False)
+            if data:
+                self._write("text", data)
+            return
+
+        self._text_parts.append(data)
+        self._text_size += len(data)
+        if self._text_size >= _MAX_TEXT_BUFFER:
+            self._flush_text(keep_partial_word=True)
+
+    def handle_comment(self, data):
+        self._flush_text()
+        if not self._style_depth:
+            self._write("comment", "<!--{}-->".format(data))
+
+    def handle_decl(self, decl):
+        self._flush_text()
+        self._write("decl", "<!{}>".format(decl))
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        if self._last_kind is not None:
+            self._out_file.write("\n")
+
+
+def clean_streaming(in_file, out_file, chunk_size=64 * 1024):
+    """Clean HTML from ``in_file`` to ``out_file``, one chunk at a time."""
+    cleaner = StreamingCleaner(out_file)
+    for chunk in iter(lambda: in_file.read(chunk_size), ""):
+        cleaner.feed(chunk)
+    cleaner.close()
+
+
+def cleanhtml(input_, output=None, streaming=False):
+    if streaming:
+        with open(input_, "r", encoding="utf-8") as in_file:
+            if output is None:
+                clean_streaming(in_file, sys.stdout)
+                return
+            with open(output, "w", encoding="utf-8") as out_file:
+                clean_streaming(in_file, out_file)
+        return
+
     with open(input_, "r", encoding="utf-8") as f:
         html_doc = f.read()
 
@@ -136,13 +456,141 @@ def cleanhtml(input_, output=None):
         f.write(html_clean)
 
 
+def _clean_job(paths):
+    input_path, output_path, streaming = paths
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if streaming:
+        with open(input_path, "r", encoding="utf-8") as in_file:
+            with ssite.files.atomic_write(output_path) as out_file:
+                clean_streaming(in_file, out_file)
+        return
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        html_doc = f.read()
+    html_clean = remove_html_cruft(html_doc)
+    html_clean = remove_closing_tags(html_clean)
+    html_clean = remove_extra_whitespace(html_clean)
+    # Write through a temporary file so that cleaning in place never leaves
+    # a partially-written document.
+    with ssite.files.atomic_write(output_path) as f:
+        f.write(html_clean)
+
+
+def clean_batch(input_paths, output_dir=None, streaming=False, jobs=None):
+    """Clean many documents across a pool of worker processes.
+
+    Args:
+        input_paths (Iterable[ssite.files.InputPath]):
+            Documents to clean.
+        output_dir (Optional[str]):
+            Directory to write cleaned documents to, at the same relative
+            paths. If not set, documents are cleaned in place.
+
+    Returns:
+        List[ssite.files.JobResult]: The outcome for each document.
+
+    Raises:
+        ValueError: If two documents would be written to the same path.
+    """
+    input_paths = list(input_paths)
+    if output_dir is not None:
+        ssite.files.check_destinations(input_paths, output_dir)
+    paths = []
+    for input_path in input_paths:
+        output_path = input_path.path
+        if output_dir is not None:
+            output_path = os.path.join(output_dir, input_path.relative_path)
+        paths.append((input_path.path, output_path, streaming))
+    return list(ssite.files.run_jobs(_clean_job, paths, jobs=jobs))
+
+
 def add_cli_args(parser):
-    parser.add_argument("input", help="path to html document to clean")
-    parser.add_argument("-o", "--output", help="path to output cleaned html document")
+    parser.add_argument(
+        "input",
+        help=(
+            "path to html document to clean. Multiple documents, directories, "
+            "and glob patterns may be given in batch mode."
+        ),
+        nargs="+",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "path to output cleaned html document. In batch mode, the "
+            "directory to write cleaned documents to."
+        ),
+    )
+    parser.add_argument(
+        "--in_place",
+        help="overwrite each input document with its cleaned version.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes in batch mode. Default is the CPU count.",
+        type=int,
+    )
+    parser.add_argument(
+        "--streaming",
+        help=(
+            "clean the document as it is read, using constant memory. "
+            "Use this for very large documents. Whitespace is normalized "
+            "rather than preserved, except within pre, script, and textarea "
+            "elements."
+        ),
+        action="store_true",
+    )
 
 
 def main(args):
-    cleanhtml(args.input, output=args.output)
+    is_batch = (
+        len(args.input) > 1
+        or args.in_place
+        or os.path.isdir(args.input[0])
+        or glob.has_magic(args.input[0])
+    )
+    if not is_batch:
+        cleanhtml(args.input[0], output=args.output, streaming=args.streaming)
+        return
+
+    if args.in_place == (args.output is not None):
+        print(
+            "Cleaning multiple documents requires exactly one of "
+            "--output directory or --in_place.",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+
+    input_paths = ssite.files.expand_paths(args.input)
+    try:
+        results = clean_batch(
+            input_paths,
+            output_dir=args.output,
+            streaming=args.streaming,
+            jobs=args.jobs,
+        )
+    except ValueError as exc:
+        print("Cannot clean documents: {}".format(exc), file=sys.stderr)
+        sys.exit(2)
+    failures = [result for result in results if result.error is not None]
+    for result in failures:
+        print(
+            "Failed to clean {}: {}".format(result.item[0], result.error),
+            file=sys.stderr,
+        )
+    print(
+        "Cleaned {} documents, {} failed.".format(
+            len(results) - len(failures), len(failures)
+        ),
+        file=sys.stderr,
+    )
+    if failures:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -18,10 +18,15 @@ import argparse
 import sys
 
 from . import clean
+from . import fingerprint
 from . import header
 from . import index
+from . import links
 from . import note
+from . import related
 from . import rmblock
+from . import search
+from . import sitemap
 import ssite.syndicate.cli
 
 
@@ -45,9 +50,26 @@ def main():
     rmblock_parser = subparsers.add_parser("beta_rmblock", help=_module_help(rmblock))
     rmblock.add_cli_args(rmblock_parser)
 
+    links_parser = subparsers.add_parser("check_links", help=_module_help(links))
+    links.add_cli_args(links_parser)
+
+    fingerprint_parser = subparsers.add_parser(
+        "fingerprint", help=_module_help(fingerprint)
+    )
+    fingerprint.add_cli_args(fingerprint_parser)
+
     header_parser = subparsers.add_parser("header", help=_module_help(header))
     header.add_cli_args(header_parser)
 
+    related_parser = subparsers.add_parser("related", help=_module_help(related))
+    related.add_cli_args(related_parser)
+
+    search_parser = subparsers.add_parser("search_index", help=_module_help(search))
+    search.add_cli_args(search_parser)
+
+    sitemap_parser = subparsers.add_parser("sitemap", help=_module_help(sitemap))
+    sitemap.add_cli_args(sitemap_parser)
+
     syndicate_parser = subparsers.add_parser(
         "syndicate", help=_module_help(ssite.syndicate.cli)
     )
@@ -60,8 +82,18 @@ def main():
         index.main(args)
     elif args.command == "note":
         note.main(args)
+    elif args.command == "check_links":
+        links.main(args)
+    elif args.command == "fingerprint":
+        fingerprint.main(args)
     elif args.command == "header":
         header.main(args)
+    elif args.command == "related":
+        related.main(args)
+    elif args.command == "search_index":
+        search.main(args)
+    elif args.command == "sitemap":
+        sitemap.main(args)
     elif args.command == "syndicate":
         ssite.syndicate.cli.main(args)
     elif args.command == "beta_rmblock":
@@ -0,0 +1,109 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write precompressed copies of generated files.
+
+Static web servers, such as nginx with ``gzip_static`` and ``brotli_static``,
+can serve ``index.html.gz`` or ``index.html.br`` in place of ``index.html``
+without compressing on every request.
+
+Brotli compression requires the optional ``brotli`` package.
+"""
+
+import argparse
+import gzip
+import logging
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("gz", "br")
+
+
+def _compress(data, compression_format):
+    if compression_format == "gz":
+        # Use a fixed mtime so that the output only depends on the content.
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def _is_fresh(sidecar_path, source_stat):
+    try:
+        return os.stat(sidecar_path).st_mtime_ns == source_stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def write_sidecars(path, formats=FORMATS):
+    """Write a compressed copy of ``path`` for each of ``formats``.
+
+    A sidecar is given the same modification time as ``path``, so it is only
+    rewritten after ``path`` changes.
+
+    Returns:
+        List[str]: Paths to the sidecars which were written.
+    """
+    source_stat = os.stat(path)
+    data = None
+    written = []
+    for compression_format in formats:
+        if compression_format == "br" and brotli is None:
+            logger.warning(f"Skipping {path}.br: the brotli package is not installed")
+            continue
+
+        sidecar_path = f"{path}.{compression_format}"
+        if _is_fresh(sidecar_path, source_stat):
+            continue
+
+        if data is None:
+            with open(path, "rb") as source_file:
+                data = source_file.read()
+
+        temp_path = f"{sidecar_path}.tmp"
+        with open(temp_path, "wb") as sidecar_file:
+            sidecar_file.write(_compress(data, compression_format))
+        os.utime(temp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        os.replace(temp_path, sidecar_path)
+        written.append(sidecar_path)
+    return written
+
+
+def _formats(value):
+    formats = [item.strip() for item in value.split(",") if item.strip()]
+    for compression_format in formats:
+        if compression_format not in FORMATS:
+            raise argparse.ArgumentTypeError(
+                'unknown compression format "{}", expected one of {}'.format(
+                    compression_format, ", ".join(FORMATS)
+                )
+            )
+    return formats
+
+
+def add_cli_args(parser):
+    parser.add_argument(
+        "--precompress",
+        help=(
+            "comma-separated list of compressed copies (gz, br) to write next "
+            "to each generated file. For example: gz,br"
+        ),
+        type=_formats,
+        default=[],
+    )
@@ -0,0 +1,359 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Utilities for processing many files at once."""
+
+import collections
+import concurrent.futures
+import contextlib
+import glob
+import hashlib
+import os
+import os.path
+import shutil
+import tempfile
+
+import ssite.blog
+
+
+InputPath = collections.namedtuple("InputPath", ["path", "relative_path"])
+
+JobResult = collections.namedtuple("JobResult", ["item", "result", "error"])
+
+ReadAheadOptions = collections.namedtuple("ReadAheadOptions", ["depth", "max_bytes"])
+
+HTML_EXTENSIONS = (".html", ".htm")
+
+DEFAULT_READ_AHEAD = ReadAheadOptions(depth=8, max_bytes=64 * 1024 * 1024)
+NO_READ_AHEAD = ReadAheadOptions(depth=0, max_bytes=None)
+
+_END = object()
+
+
+def expand_paths(patterns, extensions=HTML_EXTENSIONS):
+    """Expand file paths, directories, and glob patterns into file paths.
+
+    Directories are searched recursively for files ending in one of
+    ``extensions``, skipping version-control directories.
+
+    Returns:
+        List[InputPath]:
+            Each file, with its path relative to the directory or glob it was
+            found in. Files given directly are relative to their own
+            directory, so relative paths from different patterns may be the
+            same. See :func:`check_destinations`.
+    """
+    found = []
+    seen = set()
+
+    def add(path, relative_path):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            found.append(InputPath(path, relative_path))
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            root = pattern.rstrip(os.sep) or os.sep
+            for relative_path in sorted(ssite.blog.flatten_dir(root)):
+                if relative_path.lower().endswith(extensions):
+                    add(os.path.join(root, relative_path), relative_path)
+        elif glob.has_magic(pattern):
+            # Paths are relative to the part of the pattern before the first
+            # wildcard.
+            root = os.path.dirname(pattern[: _first_magic(pattern)])
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    add(path, os.path.relpath(path, start=root or "."))
+        else:
+            add(pattern, os.path.basename(pattern))
+    return found
+
+
+def _first_magic(pattern):
+    return min(pattern.find(char) for char in "*?[" if char in pattern)
+
+
+def check_destinations(input_paths, output_dir):
+    """Check that no two of ``input_paths`` are written to the same path.
+
+    Args:
+        input_paths (Iterable[InputPath]): Paths from :func:`expand_paths`.
+        output_dir (str): Directory the relative paths are written to.
+
+    Raises:
+        ValueError: If two inputs have the same path in ``output_dir``.
+    """
+    sources = {}
+    for input_path in input_paths:
+        destination = os.path.normpath(
+            os.path.join(output_dir, input_path.relative_path)
+        )
+        other = sources.setdefault(destination, input_path.path)
+        if other != input_path.path:
+            raise ValueError(
+                "{} and {} would both be written to {}".format(
+                    other, input_path.path, destination
+                )
+            )
+
+
+def run_jobs(func, items, jobs=None):
+    """Call ``func`` on each of ``items``, in parallel worker processes.
+
+    Exceptions are caught and returned rather than raised, so that one
+    failure doesn't abort the rest of the items. ``func`` must be a
+    module-level function so that it can be sent to worker processes.
+
+    If a worker process dies, such as when it runs out of memory, every item
+    which hadn't finished is run again in a worker of its own, so that only
+    the item which killed the worker fails.
+
+    Args:
+        jobs (Optional[int]):
+            Number of worker processes. Defaults to the number of CPUs. If
+            1, or if there is only one item, ``func`` runs in this process.
+
+    Yields:
+        JobResult: The result of each item, in the same order as ``items``.
+    """
+    items = list(items)
+    if jobs == 1 or len(items) <= 1:
+        for item in items:
+            try:
+                yield JobResult(item, func(item), None)
+            except Exception as exc:
+                yield JobResult(item, None, exc)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(func, item) for item in items]
+        for item, future in zip(items, futures):
+            try:
+                yield JobResult(item, future.result(), None)
+            except concurrent.futures.BrokenExecutor:
+                yield _run_isolated(func, item)
+            except Exception as exc:
+                yield JobResult(item, None, exc)
+
+
+def _run_isolated(func, item):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return JobResult(item, executor.submit(func, item).result(), None)
+        except Exception as exc:
+            return JobResult(item, None, exc)
+
+
+def cache_dir():
+    """Get the directory that caches are kept in.
+
+    Caches are kept outside of the site, so that they are never published.
+    The directory is ``$SSITE_CACHE_DIR`` if set, otherwise ``ssite`` in
+    ``$XDG_CACHE_HOME`` or ``~/.cache``.
+    """
+    directory = os.environ.get("SSITE_CACHE_DIR")
+    if directory:
+        return directory
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "ssite")
+
+
+def cache_path(path, filename):
+    """Get the path to the cache ``filename`` for the directory at ``path``.
+
+    Each directory has its own subdirectory of :func:`cache_dir`, named
+    after a hash of its absolute path. The subdirectory is created if it
+    doesn't exist.
+    """
+    path = os.path.abspath(path)
+    digest = hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
+    name = "{}-{}".format(os.path.basename(path) or "root", digest)
+    directory = os.path.join(cache_dir(), name)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+
+def temporary_file(path, mode="w", encoding="utf-8"):
+    """Open a temporary file in the same directory as ``path``.
+
+    The file isn't deleted when closed. Use :func:`move_into_place` to
+    replace ``path`` with it.
+    """
+    if "b" in mode:
+        encoding = None
+    return tempfile.NamedTemporaryFile(
+        mode=mode,
+        encoding=encoding,
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=".{}.".format(os.path.basename(path)),
+        suffix=".tmp",
+        delete=False,
+    )
+
+
+def move_into_place(temp_path, path):
+    """Replace ``path`` with ``temp_path``, keeping the permissions of ``path``."""
+    if os.path.exists(path):
+        shutil.copymode(path, temp_path)
+    else:
+        # Temporary files are only readable by their owner, but a new file
+        # should get the usual permissions.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+    os.replace(temp_path, path)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", encoding="utf-8"):
+    """Open a temporary file which replaces ``path`` once it is closed.
+
+    If an exception is raised, ``path`` is left untouched. The permissions of
+    an existing file at ``path`` are kept.
+    """
+    temp_file = temporary_file(path, mode=mode, encoding=encoding)
+    try:
+        with temp_file:
+            yield temp_file
+        move_into_place(temp_file.name, path)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+
+
+class ReadAhead(object):
+    """Read upcoming files in background threads.
+
+    Reading files overlaps with whatever the caller does with them, such as
+    parsing, which helps most on slow or network file systems.
+
+    Args:
+        read (Callable[[str], Any]): Function to read a file.
+        paths (Iterable[str]):
+            Paths in the order they are expected to be requested. Paths are
+            taken from this lazily, as reading gets ahead.
+        options (ReadAheadOptions):
+            ``depth`` is the maximum number of files read ahead of the
+            caller. If 0, files are only read when requested. Reading ahead
+            pauses while the files read ahead, but not yet requested, add up
+            to at least ``max_bytes`` on disk.
+    """
+
+    def __init__(self, read, paths, options=DEFAULT_READ_AHEAD):
+        self._read = read
+        self._paths = iter(paths)
+        self._options = options
+        self._next_path = _END
+        self._pending = collections.OrderedDict()
+        self._pending_bytes = 0
+        self._executor = None
+        if options.depth > 0:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=options.depth
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _fill(self):
+        while len(self._pending) < self._options.depth:
+            if self._next_path is _END:
+                self._next_path = next(self._paths, _END)
+                if self._next_path is _END:
+                    return
+            try:
+                size = os.path.getsize(self._next_path)
+            except OSError:
+                # Let the read raise the error.
+                size = 0
+            if (
+                self._pending
+                and self._options.max_bytes is not None
+                and self._pending_bytes + size > self._options.max_bytes
+            ):
+                return
+
+            path = self._next_path
+            self._next_path = _END
+            self._pending[path] = (self._executor.submit(self._read, path), size)
+            self._pending_bytes += size
+
+    def read(self, path):
+        """Get the result of reading ``path``.
+
+        Files read ahead of ``path`` which weren't requested are discarded.
+        If ``path`` wasn't read ahead, it is read now.
+        """
+        if self._executor is None:
+            return self._read(path)
+
+        self._fill()
+        future = None
+        if path in self._pending:
+            while future is None:
+                pending_path, (pending_future, size) = self._pending.popitem(
+                    last=False
+                )
+                self._pending_bytes -= size
+                if pending_path == path:
+                    future = pending_future
+                else:
+                    pending_future.cancel()
+
+        # Keep reading ahead while waiting for this file.
+        self._fill()
+        if future is None:
+            return self._read(path)
+        return future.result()
+
+    def close(self):
+        if self._executor is None:
+            return
+        for future, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+
+def add_read_ahead_cli_args(parser):
+    parser.add_argument(
+        "--read_ahead",
+        help=(
+            "number of posts to read in background threads ahead of parsing. "
+            "0 disables reading ahead. Default is {}.".format(DEFAULT_READ_AHEAD.depth)
+        ),
+        type=int,
+        default=DEFAULT_READ_AHEAD.depth,
+    )
+    parser.add_argument(
+        "--read_ahead_memory",
+        help=(
+            "maximum size in MiB of posts read ahead, but not yet parsed. "
+            "Default is {}.".format(DEFAULT_READ_AHEAD.max_bytes // (1024 * 1024))
+        ),
+        type=int,
+        default=DEFAULT_READ_AHEAD.max_bytes // (1024 * 1024),
+    )
+
+
+def read_ahead_options(args):
+    return ReadAheadOptions(
+        depth=args.read_ahead, max_bytes=args.read_ahead_memory * 1024 * 1024
+    )
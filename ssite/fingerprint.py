@@ -0,0 +1,447 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Copy assets to content-addressed file names and update references to them.
+
+Each asset, such as style.css, is copied to a name with a hash of its
+content, such as style.0123456789abcdef.css, in the same directory. A file
+with a hash in its name never changes, so it can be served with immutable
+cache headers.
+
+References to an asset, or to an older fingerprinted copy of it, in the
+href, src, srcset, and poster attributes of the content files are updated
+to the newest copy. Only the parts of a file which ssite generates are
+updated: the header before the ``<title>``, and the ``<!--START INDEX-->``
+region. Run this after ``ssite header`` and ``ssite index``, because they
+write references to the original names.
+
+Hashes are saved in a manifest, keyed by the modification time and size of
+each asset, so that unchanged assets aren't hashed again. The manifest is
+kept in the ssite cache directory, outside of the site, unless --manifest
+is given. See ssite.files.cache_path. The manifest also
+keeps the names of older fingerprinted copies of each asset, so references
+to any of them are updated. Older copies are kept, since pages and feeds
+which were already fetched may still refer to them, until they are removed
+with ``--remove_previous``.
+"""
+
+from __future__ import print_function
+
+import hashlib
+import html
+import json
+import logging
+import os
+import os.path
+import re
+import shutil
+import sys
+
+import ssite.blog
+import ssite.compress
+import ssite.files
+import ssite.header
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = ".fingerprint-manifest.json"
+MANIFEST_VERSION = 2
+HASH_LENGTH = 16
+ASSET_EXTENSIONS = (
+    ".css",
+    ".js",
+    ".mjs",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".webp",
+    ".avif",
+    ".ico",
+    ".woff",
+    ".woff2",
+)
+
+_ATTR_PATTERN = re.compile(
+    r"""(\s(?:href|src|poster|srcset)\s*=\s*)(?:"([^"]*)"|'([^']*)')""",
+    re.IGNORECASE,
+)
+# Splits a URL into its path and its query string and fragment.
+_URL_PATTERN = re.compile(r"([^?#]*)(.*)", re.DOTALL)
+_FINGERPRINT_PATTERN = re.compile(r"\.[0-9a-f]{%d}(\.[^./]+)$" % HASH_LENGTH)
+_INDEX_START = "<!--START INDEX-->"
+_INDEX_END = "<!--END INDEX-->"
+
+
+def fingerprinted_name(path, digest):
+    """Insert the first characters of ``digest`` before the extension."""
+    root, extension = os.path.splitext(path)
+    return "{}.{}{}".format(root, digest[:HASH_LENGTH], extension)
+
+
+def is_fingerprinted(path):
+    return _FINGERPRINT_PATTERN.search(path) is not None
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as asset_file:
+        for chunk in iter(lambda: asset_file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def new_manifest():
+    return {"version": MANIFEST_VERSION, "assets": {}}
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except FileNotFoundError:
+        return new_manifest()
+    except ValueError as exc:
+        logger.warning(f"Ignoring invalid manifest {manifest_path}: {exc}")
+        return new_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+    return manifest
+
+
+def save_manifest(manifest_path, manifest):
+    with ssite.files.atomic_write(manifest_path) as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        manifest_file.write("\n")
+
+
+def _relative(site_root, path):
+    return os.path.relpath(os.path.abspath(path), start=site_root).replace(os.sep, "/")
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def fingerprint_assets(site_root, asset_paths, manifest, hardlink=False):
+    """Write a fingerprinted copy of each asset which changed.
+
+    Args:
+        site_root (str): Path to the site root directory.
+        asset_paths (Iterable[str]): Paths to assets.
+        manifest (dict): Manifest from :func:`load_manifest`, updated in place.
+        hardlink (bool):
+            If set, link the fingerprinted name to the asset instead of
+            copying it. Only use this if assets are replaced rather than
+            edited in place, or the content of a fingerprinted name changes.
+
+    Returns:
+        Tuple[List[str], Dict[str, str]]:
+            Paths to the fingerprinted copies which were written, and a
+            mapping from the site-relative path of each asset, plus every
+            older fingerprinted name in the manifest, to the newest
+            fingerprinted path.
+    """
+    assets = manifest["assets"]
+    written = []
+    renames = {}
+    for path in asset_paths:
+        key = _relative(site_root, path)
+        signature = _file_signature(path)
+        record = assets.get(key)
+        if record is None or record["signature"] != signature:
+            fingerprinted = fingerprinted_name(key, hash_file(path))
+            previous = [] if record is None else record["previous"]
+            if record is not None and record["fingerprinted"] != fingerprinted:
+                previous.append(record["fingerprinted"])
+            previous = [name for name in previous if name != fingerprinted]
+            record = {
+                "signature": signature,
+                "fingerprinted": fingerprinted,
+                "previous": previous,
+            }
+            assets[key] = record
+
+        fingerprinted_path = os.path.join(site_root, record["fingerprinted"])
+        if not os.path.exists(fingerprinted_path):
+            if hardlink:
+                os.link(path, fingerprinted_path)
+            else:
+                shutil.copy2(path, fingerprinted_path)
+            written.append(fingerprinted_path)
+        renames[key] = record["fingerprinted"]
+        for name in record["previous"]:
+            renames[name] = record["fingerprinted"]
+    return written, renames
+
+
+def remove_previous(site_root, manifest):
+    """Remove older fingerprinted copies of the assets in ``manifest``.
+
+    Their names stay in the manifest, so references to them are still
+    updated.
+
+    Returns:
+        List[str]: Paths to the removed files, including precompressed copies.
+    """
+    removed = []
+    for record in manifest["assets"].values():
+        for name in record["previous"]:
+            path = os.path.join(site_root, name)
+            for removed_path in [path] + [
+                f"{path}.{compression_format}"
+                for compression_format in ssite.compress.FORMATS
+            ]:
+                if os.path.exists(removed_path):
+                    os.remove(removed_path)
+                    removed.append(removed_path)
+    return removed
+
+
+def _rewrite_url(url, site_root, content_path, renames):
+    if url.startswith("//"):
+        return url
+    path, suffix = _URL_PATTERN.match(url).groups()
+    local_path = ssite.blog.calculate_filepath(
+        site_root, content_path, html.unescape(path)
+    )
+    if local_path is None:
+        return url
+    new_path = renames.get(_relative(site_root, local_path))
+    if new_path is None:
+        return url
+    # Keep the style of the URL, since the copy is in the same directory.
+    directory = path[: path.rfind("/") + 1]
+    return "{}{}{}".format(directory, new_path.rsplit("/", 1)[-1], suffix)
+
+
+def _rewrite_srcset(value, site_root, content_path, renames):
+    candidates = []
+    changed = False
+    for candidate in value.split(","):
+        parts = candidate.strip().split(None, 1)
+        if parts:
+            url = _rewrite_url(parts[0], site_root, content_path, renames)
+            changed = changed or url != parts[0]
+            parts[0] = url
+        candidates.append(" ".join(parts))
+    if not changed:
+        return value
+    return ", ".join(candidates)
+
+
+def rewrite_references(content, site_root, content_path, renames):
+    """Replace URLs of renamed assets in the attributes of ``content``.
+
+    Only the attribute values change, so the rest of the markup is kept as
+    written.
+    """
+
+    def replace(match):
+        prefix, double_quoted, single_quoted = match.groups()
+        quote = '"' if double_quoted is not None else "'"
+        value = double_quoted if double_quoted is not None else single_quoted
+        if prefix.strip().lower().startswith("srcset"):
+            new_value = _rewrite_srcset(value, site_root, content_path, renames)
+        else:
+            new_value = _rewrite_url(value.strip(), site_root, content_path, renames)
+        if new_value in (value, value.strip()):
+            return match.group(0)
+        return "{}{}{}{}".format(prefix, quote, new_value, quote)
+
+    return _ATTR_PATTERN.sub(replace, content)
+
+
+def generated_spans(content):
+    """Find the parts of ``content`` which ssite generates.
+
+    These are the header, before the line with the ``<title>``, and each
+    ``<!--START INDEX-->`` region.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end offsets of each part, in order.
+    """
+    spans = []
+    found_title = False
+    region_start = None
+    offset = 0
+    while offset < len(content):
+        line_end = content.find("\n", offset)
+        line_end = len(content) if line_end == -1 else line_end + 1
+        line = content[offset:line_end]
+        if not found_title and ssite.header.TITLE_PATTERN.match(line):
+            found_title = True
+            spans.append((0, offset))
+        stripped = line.strip()
+        if stripped == _INDEX_START:
+            region_start = line_end
+        elif stripped == _INDEX_END and region_start is not None:
+            spans.append((region_start, offset))
+            region_start = None
+        offset = line_end
+    return sorted(spans)
+
+
+def rewrite_generated(content, site_root, content_path, renames):
+    """Replace URLs of renamed assets in the generated parts of ``content``.
+
+    References in the rest of the file, which are written by hand, are left
+    as written.
+    """
+    parts = []
+    offset = 0
+    for start, end in generated_spans(content):
+        start = max(start, offset)
+        parts.append(content[offset:start])
+        parts.append(
+            rewrite_references(content[start:end], site_root, content_path, renames)
+        )
+        offset = max(end, offset)
+    parts.append(content[offset:])
+    return "".join(parts)
+
+
+def rewrite_file(content_path, site_root, renames):
+    """Update references to renamed assets in the generated parts of a file.
+
+    Returns:
+        bool: True if the file changed.
+    """
+    with open(content_path, "r", encoding="utf-8") as content_file:
+        content = content_file.read()
+    new_content = rewrite_generated(
+        content, site_root, os.path.abspath(content_path), renames
+    )
+    if new_content == content:
+        return False
+    with ssite.files.atomic_write(content_path) as content_file:
+        content_file.write(new_content)
+    return True
+
+
+def _rewrite_file_job(job):
+    return rewrite_file(*job)
+
+
+def find_assets(patterns):
+    """Expand ``patterns`` into asset paths, skipping fingerprinted copies."""
+    return [
+        input_path.path
+        for input_path in ssite.files.expand_paths(
+            patterns, extensions=ASSET_EXTENSIONS
+        )
+        if not is_fingerprinted(input_path.path)
+    ]
+
+
+def main(args):
+    site_root = os.path.abspath(args.site_root)
+    manifest_path = args.manifest
+    if manifest_path is None:
+        manifest_path = ssite.files.cache_path(site_root, MANIFEST_FILENAME)
+
+    manifest = load_manifest(manifest_path)
+    written, renames = fingerprint_assets(
+        site_root, find_assets(args.asset), manifest, hardlink=args.hardlink
+    )
+    for path in written:
+        ssite.compress.write_sidecars(path, formats=args.precompress)
+    save_manifest(manifest_path, manifest)
+
+    jobs = [
+        (content_path.path, site_root, renames)
+        for content_path in ssite.files.expand_paths(args.content_path)
+    ]
+    updated = 0
+    failed = 0
+    for result in ssite.files.run_jobs(_rewrite_file_job, jobs, jobs=args.jobs):
+        if result.error is not None:
+            failed += 1
+            print(
+                "Failed to update {}: {}".format(result.item[0], result.error),
+                file=sys.stderr,
+            )
+        elif result.result:
+            updated += 1
+
+    print(
+        "Fingerprinted {} assets, updated {} of {} files, {} failed.".format(
+            len(written), updated, len(jobs), failed
+        ),
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
+
+    if args.remove_previous:
+        removed = remove_previous(site_root, manifest)
+        print(
+            "Removed {} older fingerprinted files.".format(len(removed)),
+            file=sys.stderr,
+        )
+
+
+def add_cli_args(parser):
+    parser.add_argument("site_root", help="path to site root directory")
+    parser.add_argument(
+        "-a",
+        "--asset",
+        help=(
+            "path to an asset, or a directory or glob pattern of assets, to "
+            "fingerprint. May be repeated."
+        ),
+        action="append",
+        required=True,
+    )
+    parser.add_argument(
+        "--manifest",
+        help=(
+            "path to the manifest of fingerprinted assets. Default is "
+            "{} in the ssite cache directory, outside of the site.".format(
+                MANIFEST_FILENAME
+            )
+        ),
+    )
+    parser.add_argument(
+        "--hardlink",
+        help=(
+            "link fingerprinted names to the assets instead of copying them. "
+            "Only safe if assets are never edited in place."
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--remove_previous",
+        help=(
+            "remove older fingerprinted copies of the assets once the content "
+            "files are updated. By default, they are kept for pages which "
+            "were already fetched."
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes. Default is the CPU count.",
+        type=int,
+    )
+    ssite.compress.add_cli_args(parser)
+    parser.add_argument(
+        "content_path",
+        help="path file(s), directories, or glob patterns to update",
+        nargs="+",
+    )
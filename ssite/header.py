@@ -17,12 +17,26 @@
 
 """Replace the header (before title tag) in HTML files. (Beta)"""
 
+from __future__ import print_function
+
+import functools
+import html.parser
 import os.path
 import re
+import shutil
+import sys
 
-import bs4
 import jinja2
 
+import ssite.files
+
+
+TITLE_PATTERN = re.compile("<title>")
+
+# Stand-ins for the canonical URL, with characters that a template filter,
+# such as escaping, would change.
+_PLACEHOLDERS = ("\0<rel_canonical &\"' 0>\0", "\0<rel_canonical &\"' 1>\0")
+
 
 def calculate_absolute_url(prefix, root, content_path, target_path):
     # TODO: consolidate with copy in blog.py
@@ -34,38 +48,87 @@ def calculate_absolute_url(prefix, root, content_path, target_path):
     return f"{prefix}{relative_path}"
 
 
-def is_canonical_link(tag):
-    return tag.name == "link" and tag.has_attr("rel") and "canonical" in tag["rel"]
+class _StopParsing(Exception):
+    pass
 
 
-def replace_header(content_path, site, site_root, header_template):
-    with open(content_path, "r", encoding="utf-8") as in_file:
-        content = in_file.read()
+class CanonicalLinkFinder(html.parser.HTMLParser):
+    """Find the first ``<link rel="canonical">`` without building a tree."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.href = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "link":
+            return
+        attrs = dict(attrs)
+        if "canonical" in (attrs.get("rel") or "").split():
+            self.href = attrs.get("href")
+            raise _StopParsing()
+
+
+def find_canonical_link(header):
+    """Find the URL of the canonical link in ``header``, if any."""
+    finder = CanonicalLinkFinder()
+    try:
+        finder.feed(header)
+        finder.close()
+    except _StopParsing:
+        pass
+    return finder.href
+
+
+def read_header(in_file, content_path):
+    """Read the lines before the ``<title>`` from ``in_file``.
+
+    Reading stops at the line with the ``<title>``, so the rest of the file
+    can be copied without splitting it into lines.
+
+    Returns:
+        Tuple[str, str]: The header, without a trailing newline, and the
+        line with the ``<title>``.
+    """
     header_lines = []
-    output_lines = []
-    end_prog = re.compile("<title>")
-    header_ended = False
-
-    for line in content.split("\n"):
-        if end_prog.match(line):
-            header_ended = True
-        if header_ended:
-            output_lines.append(line)
-        else:
-            header_lines.append(line)
-
-    if not header_ended:
-        raise ValueError(f"no <title> tag found in {content_path}")
-    previous_header = "\n".join(header_lines)
-
-    canonical_link = None
-    soup = bs4.BeautifulSoup(previous_header, "html5lib")
-    canonical_links = soup.find_all(is_canonical_link)
-    if canonical_links:
-        # Use the existing canonical link if present
-        canonical_link = canonical_links[0]["href"]
-    else:
-        # Otherwise, calculate a link to the content itself.
+    for line in in_file:
+        if TITLE_PATTERN.match(line):
+            return "".join(header_lines)[:-1], line
+        header_lines.append(line)
+    raise ValueError(f"no <title> tag found in {content_path}")
+
+
+def compile_header(header_template):
+    """Render the constant parts of ``header_template`` once.
+
+    The template is rendered with placeholder canonical URLs, and split
+    around them. If the template transforms the URL in any way, such as
+    escaping it, fall back to rendering the template for each distinct URL.
+
+    Returns:
+        Callable[[str], str]: Function which renders the header for a
+        canonical URL.
+    """
+    segments = header_template.render(rel_canonical=_PLACEHOLDERS[0]).split(
+        _PLACEHOLDERS[0]
+    )
+    other_segments = header_template.render(rel_canonical=_PLACEHOLDERS[1]).split(
+        _PLACEHOLDERS[1]
+    )
+    if len(segments) > 1 and segments == other_segments:
+        return lambda canonical_link: canonical_link.join(segments)
+
+    @functools.lru_cache(maxsize=None)
+    def render(canonical_link):
+        return header_template.render(rel_canonical=canonical_link)
+
+    return render
+
+
+def render_header(content_path, site, site_root, render, previous_header):
+    canonical_link = find_canonical_link(previous_header)
+    if canonical_link is None:
+        # Calculate a link to the content itself if there isn't an existing
+        # canonical link.
         canonical_path = content_path
         filename = os.path.basename(content_path)
         if filename in ("index.html", "index.htm"):
@@ -78,27 +141,104 @@ def replace_header(content_path, site, site_root, header_template):
             site, site_root, site_root, canonical_path
         )
 
-    new_header = header_template.render(rel_canonical=canonical_link)
-    return "\n".join([new_header] + output_lines)
+    return render(canonical_link)
 
 
-def main(args):
-    with open(args.template_path, "r", encoding="utf-8") as ft:
-        header_template = jinja2.Template(ft.read())
-    content_paths = args.content_path
-    for content_path in content_paths:
-        content = replace_header(
+def replace_header(content_path, site, site_root, header_template):
+    with open(content_path, "r", encoding="utf-8") as in_file:
+        previous_header, title_line = read_header(in_file, content_path)
+        rest = in_file.read()
+    new_header = render_header(
+        content_path, site, site_root, compile_header(header_template), previous_header
+    )
+    return "\n".join([new_header, title_line + rest])
+
+
+@functools.lru_cache()
+def load_header(template_path):
+    with open(template_path, "r", encoding="utf-8") as ft:
+        return compile_header(jinja2.Template(ft.read()))
+
+
+def update_header(content_path, site, site_root, template_path):
+    """Replace the header in ``content_path``.
+
+    Only the header is held in memory. The rest of the file is copied to the
+    new file in chunks.
+
+    Returns:
+        bool: False if the file was left alone because its header was
+        already up to date.
+    """
+    with open(content_path, "r", encoding="utf-8") as in_file:
+        previous_header, title_line = read_header(in_file, content_path)
+        new_header = render_header(
             os.path.abspath(content_path),
-            args.site,
-            os.path.abspath(args.site_root),
-            header_template,
+            site,
+            site_root,
+            load_header(template_path),
+            previous_header,
         )
-        with open(content_path, "w", encoding="utf-8") as out_file:
-            out_file.write(content)
+        if new_header == previous_header:
+            return False
+
+        with ssite.files.atomic_write(content_path) as out_file:
+            out_file.write(new_header)
+            out_file.write("\n")
+            out_file.write(title_line)
+            shutil.copyfileobj(in_file, out_file)
+    return True
+
+
+def _update_header_job(job):
+    return update_header(*job)
+
+
+def main(args):
+    site_root = os.path.abspath(args.site_root)
+    content_paths = ssite.files.expand_paths(args.content_path)
+    jobs = [
+        (content_path.path, args.site, site_root, args.template_path)
+        for content_path in content_paths
+    ]
+
+    updated = 0
+    unchanged = 0
+    failed = 0
+    for result in ssite.files.run_jobs(_update_header_job, jobs, jobs=args.jobs):
+        if result.error is not None:
+            failed += 1
+            print(
+                "Failed to update {}: {}".format(result.item[0], result.error),
+                file=sys.stderr,
+            )
+        elif result.result:
+            updated += 1
+        else:
+            unchanged += 1
+
+    print(
+        "Updated {} files, {} unchanged, {} failed.".format(
+            updated, unchanged, failed
+        ),
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
 
 
 def add_cli_args(parser):
     parser.add_argument("site", help="base URL of site")
     parser.add_argument("site_root", help="path to site root directory")
     parser.add_argument("template_path", help="path to header template (jinja2)")
-    parser.add_argument("content_path", help="path file(s) to update", nargs="+")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes. Default is the CPU count.",
+        type=int,
+    )
+    parser.add_argument(
+        "content_path",
+        help="path file(s), directories, or glob patterns to update",
+        nargs="+",
+    )
@@ -20,23 +20,202 @@ indexes for www.timswast.com.
 """
 
 import collections
+import datetime
+import html.parser
 import logging
+import mmap
+import os
+import re
 
 import dateutil.parser
+import dateutil.tz
 import pytz
 
 
 logger = logging.getLogger(__name__)
 
+HENTRY_MARKER = b"h-entry"
+
+# Files at least this large are memory-mapped instead of read.
+MMAP_THRESHOLD = 1024 * 1024
+
+# Whitespace which html5lib skips before the document content.
+_LEADING_WHITESPACE = "\t\n\f\r "
+
+_START_TAG = re.compile(rb"<([a-zA-Z][a-zA-Z0-9-]*)[^<>]*>")
+_CLASS_ATTR = re.compile(rb"""\sclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""")
+_WORD_PATTERN = re.compile(r"\w\w+")
+
 HEntry = collections.namedtuple(
-    "HEntry", ["name", "published", "path", "content", "summary", "photos"]
+    "HEntry",
+    ["name", "published", "path", "content", "summary", "photos", "categories"],
+    defaults=((),),
 )
 
 
+def _timezone_to_dict(published):
+    if published.tzinfo is None:
+        return None
+    # Time zones from pytz, such as those of posts without an offset, are
+    # saved by name, so that they keep their abbreviation, such as PDT.
+    zone = getattr(published.tzinfo, "zone", None)
+    if zone is not None:
+        return {"zone": zone}
+    return {"name": published.tzname()}
+
+
+def _timezone_from_dict(published, timezone):
+    if timezone is None or published.tzinfo is None:
+        return published
+    if "zone" in timezone:
+        return published.astimezone(pytz.timezone(timezone["zone"]))
+    return published.replace(
+        tzinfo=dateutil.tz.tzoffset(timezone["name"], published.utcoffset())
+    )
+
+
+def to_dict(entry):
+    """Convert ``entry`` to a JSON-serializable dictionary.
+
+    The time zone of the published date is saved along with its offset, so
+    that formatting it with ``%Z`` gives the same result after
+    :func:`from_dict`.
+    """
+    data = entry._asdict()
+    data["published"] = entry.published.isoformat()
+    data["timezone"] = _timezone_to_dict(entry.published)
+    data["photos"] = list(entry.photos)
+    data["categories"] = list(entry.categories)
+    return data
+
+
+def from_dict(data):
+    """Convert a dictionary created by :func:`to_dict` to an ``HEntry``."""
+    data = dict(data)
+    data["published"] = _timezone_from_dict(
+        datetime.datetime.fromisoformat(data["published"]), data.pop("timezone", None)
+    )
+    data["photos"] = tuple(data["photos"])
+    data["categories"] = tuple(data.get("categories", ()))
+    return HEntry(**data)
+
+
+class _TextExtractor(html.parser.HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._seen_tag = False
+
+    def handle_starttag(self, tag, attrs):
+        self._seen_tag = True
+
+    def handle_data(self, data):
+        if not self.parts and not self._seen_tag:
+            data = data.lstrip(_LEADING_WHITESPACE)
+        if data:
+            self.parts.append(data)
+
+
+def html_text(markup):
+    """Get the text content of ``markup``.
+
+    The same as the ``text`` of a BeautifulSoup document, but without
+    building a tree.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(markup.replace("\r\n", "\n").replace("\r", "\n"))
+    extractor.close()
+    return "".join(extractor.parts)
+
+
+def tokenize(text):
+    """Split ``text`` into lower-case words, skipping numbers."""
+    return [
+        word for word in _WORD_PATTERN.findall(text.casefold()) if not word.isdigit()
+    ]
+
+
+def read_hentry_markup(filepath, slice_entry=False):
+    """Read the markup of a post, if it might contain an h-entry.
+
+    The file is searched for the h-entry class name as bytes, so files
+    without one are skipped without decoding or parsing them.
+
+    Args:
+        slice_entry (bool):
+            If set, return only the element with the first h-entry class,
+            when it can be found by scanning the tags. This assumes the tags
+            of the element are balanced. Otherwise, the whole file is
+            returned.
+
+    Returns:
+        Optional[str]:
+            The markup, or ``None`` if the file doesn't contain ``h-entry``.
+    """
+    with open(filepath, "rb") as markup_file:
+        if os.fstat(markup_file.fileno()).st_size < MMAP_THRESHOLD:
+            return _hentry_markup(markup_file.read(), slice_entry)
+        with mmap.mmap(markup_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _hentry_markup(data, slice_entry)
+
+
+def _hentry_markup(data, slice_entry):
+    position = data.find(HENTRY_MARKER)
+    if position == -1:
+        return None
+
+    bounds = _entry_bounds(data, position) if slice_entry else None
+    if bounds is None:
+        bounds = (0, len(data))
+    start, end = bounds
+    return bytes(data[start:end]).decode("utf-8")
+
+
+def _entry_bounds(data, position):
+    # Find the tag which contains the h-entry class.
+    tag_start = data.rfind(b"<", 0, position)
+    if tag_start == -1:
+        return None
+    tag_match = _START_TAG.match(data, tag_start)
+    if tag_match is None or tag_match.end() <= position:
+        return None
+    class_match = _CLASS_ATTR.search(tag_match.group(0))
+    if class_match is None:
+        return None
+    class_value = next(value for value in class_match.groups() if value is not None)
+    if HENTRY_MARKER not in class_value.split():
+        return None
+
+    # Find the matching end tag by counting nested tags of the same name.
+    tag_name = re.escape(tag_match.group(1))
+    tag_pattern = re.compile(rb"<(/?)" + tag_name + rb"[\s/>]", re.IGNORECASE)
+    depth = 1
+    for match in tag_pattern.finditer(data, tag_match.end()):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            tag_end = data.find(b">", match.end() - 1)
+            if tag_end == -1:
+                return None
+            return tag_start, tag_end + 1
+    return None
+
+
 def photo_template(photo_elem, is_in_content=False):
     classes = photo_elem.attrs.get("class", [])
     is_pixel_art = "u-pixel-art" in classes or "pixel-art" in classes
     is_thumbnail = "thumbnail" in classes
+
+    # Alternate formats are listed as <source> siblings in a <picture>.
+    sources = []
+    if photo_elem.parent is not None and photo_elem.parent.name == "picture":
+        for source_elem in photo_elem.parent.find_all("source", recursive=False):
+            sources.append(
+                {
+                    "type": source_elem.attrs.get("type"),
+                    "srcset": source_elem.attrs.get("srcset"),
+                }
+            )
+
     return {
         "id": photo_elem.attrs.get("id"),
         "src": photo_elem["src"],
@@ -46,9 +225,44 @@ def photo_template(photo_elem, is_in_content=False):
         "is_in_content": is_in_content,
         "width": photo_elem.attrs.get("width"),
         "height": photo_elem.attrs.get("height"),
+        "srcset": photo_elem.attrs.get("srcset"),
+        "sources": sources,
+        # Filled in by ssite.images when placeholders are enabled.
+        "placeholder": None,
     }
 
 
+def root_photo_elems(entry):
+    """Find photos which are direct children of the h-entry.
+
+    Only direct children are used so as not to pick up photos from the
+    h-card. A photo wrapped in a ``<picture>`` element counts as a direct
+    child.
+    """
+    for child in entry.find_all(True, recursive=False):
+        if child.name == "picture":
+            child = child.find("img", recursive=False)
+        if child is not None and "u-photo" in child.attrs.get("class", []):
+            yield child
+
+
+def extract_categories(entry):
+    """Find the p-category names of ``entry``, skipping nested h-entries.
+
+    Returns:
+        Tuple[str, ...]: Category names, without duplicates, in document
+        order.
+    """
+    categories = []
+    for category_elem in entry.find_all(class_="p-category"):
+        if category_elem.find_parent(class_="h-entry") is not entry:
+            continue
+        category = category_elem.get_text().strip()
+        if category and category not in categories:
+            categories.append(category)
+    return tuple(categories)
+
+
 def extract_hentry(path, path_date, doc, default_timezone="America/Los_Angeles"):
     # Find the first h-entry.
     # Getting just the first h-entry skips any inline replies.
@@ -105,12 +319,7 @@ def extract_hentry(path, path_date, doc, default_timezone="America/Los_Angeles")
     if summary_elem:
         summary = "".join(map(str, summary_elem.children))
 
-    photo_elems_root = entry.find_all(
-        class_="u-photo",
-        # Find only direct children so as not to pick up photos from the
-        # h-card.
-        recursive=False,
-    )
+    photo_elems_root = root_photo_elems(entry)
     photo_elems_content = content_elem.find_all(class_="u-photo")
     photos = []
     for photo_elem in photo_elems_root:
@@ -118,4 +327,12 @@ def extract_hentry(path, path_date, doc, default_timezone="America/Los_Angeles")
     for photo_elem in photo_elems_content:
         photos.append(photo_template(photo_elem, is_in_content=True))
 
-    return HEntry(title, date, path, content, summary=summary, photos=tuple(photos))
+    return HEntry(
+        title,
+        date,
+        path,
+        content,
+        summary=summary,
+        photos=tuple(photos),
+        categories=extract_categories(entry),
+    )
@@ -0,0 +1,333 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure the images of indexed entries and mark them for lazy loading.
+
+Low-quality placeholders, tiny copies of images encoded as data URIs, can be
+shown while the full images load.
+
+Image sizes and placeholders are cached by the SHA-256 of each image, so an
+image is only decoded once, however many times it is copied or moved. The
+hash of each path is cached by its modification time and size, so unchanged
+images aren't read at all.
+"""
+
+import base64
+import hashlib
+import html.parser
+import io
+import json
+import logging
+import os
+import os.path
+import re
+
+from PIL import Image, ImageOps
+
+import ssite.blog
+import ssite.files
+import ssite.probe
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = ".image-cache.json"
+CACHE_VERSION = 1
+
+PLACEHOLDER_FILENAME = "placeholder.txt"
+PLACEHOLDER_SIZE = 16
+
+# Images which are rendered without loading="lazy", since they are likely to
+# be visible when the page loads.
+DEFAULT_EAGER_IMAGES = 3
+
+
+def new_cache():
+    return {"version": CACHE_VERSION, "paths": {}, "images": {}}
+
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except FileNotFoundError:
+        return new_cache()
+    except ValueError as exc:
+        logger.warning(f"Ignoring invalid image cache {cache_path}: {exc}")
+        return new_cache()
+    if cache.get("version") != CACHE_VERSION:
+        return new_cache()
+    return cache
+
+
+def save_cache(cache_path, cache):
+    with ssite.files.atomic_write(cache_path) as cache_file:
+        json.dump(cache, cache_file, sort_keys=True)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def content_hash(cache, path):
+    """Get the SHA-256 of the file at ``path``, reading it only if it changed."""
+    key = os.path.abspath(path)
+    signature = _file_signature(path)
+    record = cache["paths"].get(key)
+    if record is None or record["signature"] != signature:
+        digest = hashlib.sha256()
+        with open(path, "rb") as image_file:
+            for chunk in iter(lambda: image_file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        record = {"signature": signature, "sha256": digest.hexdigest()}
+        cache["paths"][key] = record
+    return record["sha256"]
+
+
+def image_record(cache, path):
+    """Get the cached metadata for the image at ``path``.
+
+    Returns:
+        dict:
+            Metadata shared by every copy of the image. ``width`` and
+            ``height`` are the displayed size of the image, or ``None`` if
+            the image couldn't be decoded, such as for an SVG.
+    """
+    image_hash = content_hash(cache, path)
+    record = cache["images"].get(image_hash)
+    if record is None:
+        try:
+            width, height = ssite.probe.display_size(ssite.probe.probe_image(path))
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Could not measure {path}: {exc}")
+            width, height = None, None
+        record = {"width": width, "height": height}
+        cache["images"][image_hash] = record
+    return record
+
+
+def _photo_record(photo, site_root, cache):
+    # Site-relative sources don't depend on the page they're in.
+    content_path = os.path.join(site_root, "index.html")
+    path = ssite.blog.calculate_filepath(site_root, content_path, photo["src"])
+    if path is None:
+        return None, None
+    try:
+        return path, image_record(cache, path)
+    except OSError as exc:
+        logger.warning(f"Could not read {path}: {exc}")
+        return path, None
+
+
+def _measured_photo(photo, site_root, cache):
+    if photo.get("width") and photo.get("height"):
+        return photo
+    _, record = _photo_record(photo, site_root, cache)
+    if record is None or record["width"] is None:
+        return photo
+
+    width, height = record["width"], record["height"]
+    if photo.get("width"):
+        width = int(photo["width"])
+        height = round(width * record["height"] / record["width"])
+    elif photo.get("height"):
+        height = int(photo["height"])
+        width = round(height * record["width"] / record["height"])
+    return dict(photo, width=str(width), height=str(height))
+
+
+def with_photo_sizes(entries, site_root, cache):
+    """Copy ``entries``, with the missing size of each photo filled in.
+
+    Photo sources are expected to be site-relative, as they are after
+    :func:`ssite.index.replace_urls_with_absolute`. If only one dimension is
+    set, the other is calculated from the aspect ratio of the image. Photos
+    which can't be read are left unchanged.
+
+    ``entries`` aren't changed, so sizes are measured again when an image
+    changes, rather than saved with the entries.
+
+    Returns:
+        List[ssite.hentry.HEntry]: The entries, with copies of their photos.
+    """
+    return [
+        entry._replace(
+            photos=tuple(
+                _measured_photo(photo, site_root, cache) for photo in entry.photos
+            )
+        )
+        for entry in entries
+    ]
+
+
+def make_placeholder(path, size=PLACEHOLDER_SIZE):
+    """Encode a tiny, blurry copy of the image at ``path`` as a data URI.
+
+    The image is shrunk to fit in ``size`` by ``size`` pixels. JPEGs are
+    decoded at a reduced scale, so the full image is never decoded.
+
+    Returns:
+        str: A ``data:image/png;base64,...`` URI.
+    """
+    with Image.open(path) as im:
+        im.draft("RGB", (size, size))
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail((size, size))
+        has_alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+        im = im.convert("RGBA" if has_alpha else "RGB")
+        data = io.BytesIO()
+        im.save(data, format="PNG", optimize=True)
+    return "data:image/png;base64,{}".format(
+        base64.b64encode(data.getvalue()).decode("ascii")
+    )
+
+
+def syndicated_placeholder(image_dir, original_path):
+    """Get the placeholder for a content-addressed image directory.
+
+    The placeholder is saved in ``image_dir``, so it is only made once per
+    image content.
+    """
+    placeholder_path = os.path.join(image_dir, PLACEHOLDER_FILENAME)
+    try:
+        with open(placeholder_path, "r", encoding="ascii") as placeholder_file:
+            return placeholder_file.read()
+    except FileNotFoundError:
+        pass
+
+    placeholder = make_placeholder(original_path)
+    with ssite.files.atomic_write(placeholder_path, encoding="ascii") as out_file:
+        out_file.write(placeholder)
+    return placeholder
+
+
+def _photo_with_placeholder(photo, site_root, cache):
+    path, record = _photo_record(photo, site_root, cache)
+    if record is None or record["width"] is None:
+        return dict(photo, placeholder=None)
+    if "placeholder" not in record:
+        record["placeholder"] = make_placeholder(path)
+    return dict(photo, placeholder=record["placeholder"])
+
+
+def with_photo_placeholders(entries, site_root, cache):
+    """Copy ``entries``, with the ``placeholder`` of each photo set.
+
+    Placeholders are cached with the sizes of images, by content hash, so a
+    placeholder always matches the current content of its image. Any
+    placeholder already set on a photo is replaced. See
+    :func:`make_placeholder`.
+
+    Returns:
+        List[ssite.hentry.HEntry]: The entries, with copies of their photos.
+    """
+    return [
+        entry._replace(
+            photos=tuple(
+                _photo_with_placeholder(photo, site_root, cache)
+                for photo in entry.photos
+            )
+        )
+        for entry in entries
+    ]
+
+
+def photo_sizes(entries):
+    """Map the source of each photo of ``entries`` to its width and height."""
+    sizes = {}
+    for entry in entries:
+        for photo in entry.photos:
+            if photo.get("width") and photo.get("height"):
+                sizes[photo["src"]] = (photo["width"], photo["height"])
+    return sizes
+
+
+class _ImageTagFinder(html.parser.HTMLParser):
+    """Find the ``<img>`` tags in markup, with their positions."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "img":
+            return
+        line, column = self.getpos()
+        # Like browsers, use the first of any repeated attribute.
+        values = {}
+        for name, value in attrs:
+            values.setdefault(name, value)
+        self.tags.append((line, column, self.get_starttag_text(), values))
+
+    handle_startendtag = handle_starttag
+
+
+def _find_image_tags(markup):
+    """Find the ``<img>`` tags in ``markup``.
+
+    Returns:
+        List[Tuple[int, str, Dict[str, Optional[str]]]]:
+            The offset and text of each tag, and its attributes, with
+            character references in their values replaced.
+    """
+    finder = _ImageTagFinder()
+    finder.feed(markup)
+    finder.close()
+    line_offsets = [0]
+    line_offsets.extend(match.end() for match in re.finditer("\n", markup))
+    return [
+        (line_offsets[line - 1] + column, text, attrs)
+        for line, column, text, attrs in finder.tags
+    ]
+
+
+def add_image_attributes(markup, eager_images=DEFAULT_EAGER_IMAGES, sizes=None):
+    """Add size and lazy loading attributes to the ``<img>`` tags in ``markup``.
+
+    Args:
+        eager_images (Optional[int]):
+            Number of images at the start of ``markup`` to leave without
+            ``loading="lazy"`` and ``decoding="async"``. If ``None``, no
+            images are marked for lazy loading.
+        sizes (Optional[Mapping[str, Tuple[str, str]]]):
+            Width and height of images by source, added to tags which have
+            neither.
+
+    Returns:
+        str: The markup, with only the ``<img>`` tags changed.
+    """
+    sizes = sizes or {}
+    parts = []
+    position = 0
+    for count, (offset, tag, tag_attrs) in enumerate(_find_image_tags(markup), start=1):
+        attrs = []
+        src = tag_attrs.get("src")
+        if src in sizes and "width" not in tag_attrs and "height" not in tag_attrs:
+            attrs.append('width="{}" height="{}"'.format(*sizes[src]))
+        if eager_images is not None and count > eager_images:
+            if "loading" not in tag_attrs:
+                attrs.append('loading="lazy"')
+            if "decoding" not in tag_attrs:
+                attrs.append('decoding="async"')
+        if not attrs:
+            continue
+
+        end = len(tag) - 2 if tag.endswith("/>") else len(tag) - 1
+        head = tag[:end].rstrip()
+        parts.append(markup[position : offset + len(head)])
+        parts.append(" " + " ".join(attrs))
+        position = offset + len(head)
+    parts.append(markup[position:])
+    return "".join(parts)
@@ -24,12 +24,29 @@ A post in the indexed directory is expected to have a path of the form:
 Content in a block with id="content-header" is not included in the preview
 text. The title element of the HTML document is used as the the title of the
 post.
+
+With --tags_dir, a page is kept up to date for each p-category of the posts,
+at TAGS_DIR/TAG/index.html. The INDEX region of each tag page is rendered
+with TAGS_DIR/index.html.jinja2. New tag pages are created by rendering
+TAGS_DIR/tag.html.jinja2, which must contain an INDEX region.
+
+Photos without a width and height are measured, so that the index can be
+laid out before its images load, and all but the first few images are loaded
+lazily. Sizes are cached by image content in the ssite cache directory,
+and aren't saved with the indexed entries.
+
+The indexed entries are saved in the ssite cache directory, outside of the
+site, so that --add can update the index by parsing only new posts. See
+ssite.files.cache_path.
 """
 
 from __future__ import print_function
 
 import collections
 import datetime
+import glob
+import json
+import logging
 import os
 import os.path
 import re
@@ -38,7 +55,21 @@ import bs4
 import jinja2
 
 import ssite.blog
+import ssite.compress
+import ssite.files
 import ssite.hentry
+import ssite.images
+
+
+logger = logging.getLogger(__name__)
+
+ENTRIES_SUFFIX = ".entries.json"
+ENTRIES_VERSION = 4
+
+TAG_TEMPLATE = "index.html.jinja2"
+TAG_PAGE_TEMPLATE = "tag.html.jinja2"
+
+Tag = collections.namedtuple("Tag", ["name", "entry_ids"])
 
 
 def replace_urls_with_absolute(soup, prefix, root, content_path):
@@ -64,10 +95,25 @@ def replace_urls_with_absolute(soup, prefix, root, content_path):
     return str(soup)
 
 
-def summary_from_path(site_root, index_root, path, path_date):
+def summary_from_path(
+    site_root, index_root, path, path_date, slice_entry=False, reader=None
+):
+    """Summarize the post at ``path``, relative to ``index_root``.
+
+    Args:
+        reader (Optional[ssite.files.ReadAhead]):
+            If set, read the post through ``reader`` instead of reading it
+            with ``slice_entry``.
+    """
     filepath = os.path.join(index_root, path)
-    with open(filepath, "r", encoding="utf-8") as fb:
-        return extract_summary(site_root, index_root, filepath, path_date, fb)
+    if reader is not None:
+        markup = reader.read(filepath)
+    else:
+        markup = ssite.hentry.read_hentry_markup(filepath, slice_entry=slice_entry)
+    if markup is None:
+        logger.warning(f"Skipping {filepath} because missing h-entry")
+        return None
+    return extract_summary(site_root, index_root, filepath, path_date, markup)
 
 
 def extract_summary(site_root, index_root, path, path_date, markup):
@@ -78,11 +124,26 @@ def extract_summary(site_root, index_root, path, path_date, markup):
     return ssite.hentry.extract_hentry(relative_path, path_date, doc)
 
 
-def summaries_from_paths(site_root, index_root, paths):
-    for path, path_date in paths:
-        summary = summary_from_path(site_root, index_root, path, path_date)
-        if summary is not None:
-            yield summary
+def summaries_from_paths(
+    site_root,
+    index_root,
+    paths,
+    slice_entries=False,
+    read_ahead=ssite.files.DEFAULT_READ_AHEAD,
+):
+    paths = list(paths)
+
+    def read(filepath):
+        return ssite.hentry.read_hentry_markup(filepath, slice_entry=slice_entries)
+
+    filepaths = [os.path.join(index_root, path) for path, _ in paths]
+    with ssite.files.ReadAhead(read, filepaths, read_ahead) as reader:
+        for path, path_date in paths:
+            summary = summary_from_path(
+                site_root, index_root, path, path_date, reader=reader
+            )
+            if summary is not None:
+                yield summary
 
 
 def split_region(contents, region_name):
@@ -157,39 +218,328 @@ def replace_region(contents, region_name, body):
     return f"{split_content[0]}{body}{split_content[2]}"
 
 
-def main(args):
-    indexed_dir = args.indexed_dir
-    index_path = args.index
-    if index_path is None:
-        index_path = os.path.join(indexed_dir, "index.html")
+def entries_path_for(index_path):
+    """Path to the list of indexed entries for the index at ``index_path``.
 
-    template_path = args.template
-    if template_path is None:
-        template_path = "{}.jinja2".format(index_path)
+    The entries are saved in the cache directory, rather than next to the
+    index file, so that they aren't published with the site.
+    """
+    return ssite.files.cache_path(
+        os.path.dirname(os.path.abspath(index_path)),
+        "{}{}".format(os.path.basename(index_path), ENTRIES_SUFFIX),
+    )
 
-    # TODO: allow working directories other than site root
-    site_root = os.getcwd()
 
-    blog_paths = ssite.blog.find_paths(indexed_dir)
-    entries = [
-        entry for entry in summaries_from_paths(site_root, indexed_dir, blog_paths)
-    ]
+def load_entries(entries_path):
+    """Load the entries saved by :func:`save_entries`.
+
+    Returns:
+        Optional[List[ssite.hentry.HEntry]]:
+            The entries, or ``None`` if the file is missing or unreadable.
+    """
+    try:
+        with open(entries_path, "r", encoding="utf-8") as entries_file:
+            data = json.load(entries_file)
+    except FileNotFoundError:
+        return None
+    except ValueError as exc:
+        logger.warning(f"Ignoring invalid entries file {entries_path}: {exc}")
+        return None
+    if data.get("version") != ENTRIES_VERSION:
+        return None
+    return [ssite.hentry.from_dict(entry) for entry in data["entries"]]
+
+
+def save_entries(entries_path, entries):
+    with ssite.files.atomic_write(entries_path) as entries_file:
+        json.dump(
+            {
+                "version": ENTRIES_VERSION,
+                "entries": [ssite.hentry.to_dict(entry) for entry in entries],
+            },
+            entries_file,
+        )
+
 
+def sort_entries(entries):
     # Sort the entries by date.
-    # I reverse it because I want most-recent posts to appear first.
-    entries.sort(key=lambda entry: entry.published, reverse=True)
+    # I reverse it because I want most-recent posts to appear first. Sort by
+    # path, too, so that the order doesn't depend on the order of the files
+    # in the directory.
+    entries.sort(key=lambda entry: (entry.published, entry.path), reverse=True)
+
+
+def add_entries(site_root, indexed_dir, entries, add_paths, slice_entries=False):
+    """Add or replace the entries for ``add_paths`` in ``entries``.
+
+    Entries are keyed by path. An entry is removed if its post no longer
+    contains an h-entry.
+
+    Args:
+        entries (List[ssite.hentry.HEntry]): Entries, sorted by date.
+        add_paths (Iterable[str]):
+            Paths to the index.html files (or their directories) of posts.
+
+    Returns:
+        List[ssite.hentry.HEntry]: The updated entries, sorted by date.
+    """
+    by_path = {entry.path: entry for entry in entries}
+    indexed_root = os.path.abspath(indexed_dir)
+    for add_path in add_paths:
+        if os.path.isdir(add_path):
+            add_path = os.path.join(add_path, "index.html")
+        relative_path = os.path.relpath(os.path.abspath(add_path), start=indexed_root)
+        blog_paths = list(ssite.blog.blogfiles([relative_path]))
+        if not blog_paths:
+            raise ValueError(f"{add_path} is not a post in {indexed_dir}")
+
+        path, path_date = blog_paths[0]
+        by_path.pop(f"{os.path.dirname(path)}/", None)
+        entry = summary_from_path(
+            site_root, indexed_dir, path, path_date, slice_entry=slice_entries
+        )
+        if entry is not None:
+            by_path[entry.path] = entry
+
+    entries = list(by_path.values())
+    sort_entries(entries)
+    return entries
+
 
+def load_template(template_path):
     with open(template_path, "r", encoding="utf-8") as ft:
-        jinja_template = jinja2.Template(ft.read())
+        return jinja2.Template(ft.read())
+
+
+def render_index_region(
+    index_path,
+    jinja_template,
+    entries,
+    eager_images=ssite.images.DEFAULT_EAGER_IMAGES,
+    **context,
+):
+    """Replace the <!--START/END INDEX--> region of ``index_path``.
+
+    Images in the region are given the size of the matching photo, if the
+    template doesn't set one. All but the first ``eager_images`` images are
+    loaded lazily. See :func:`ssite.images.add_image_attributes`.
 
-    # Update the index file by replacing the <!--START/END INDEX--> region.
+    Returns:
+        bool: True if the file changed.
+    """
     with open(index_path, "r+", encoding="utf-8") as index_file:
         original_content = index_file.read()
-        new_index = jinja_template.render(entries=entries) + "\n"
+        new_index = ssite.images.add_image_attributes(
+            jinja_template.render(entries=entries, **context),
+            eager_images=eager_images,
+            sizes=ssite.images.photo_sizes(entries),
+        )
+        new_index += "\n"
         new_content = replace_region(original_content, "INDEX", new_index)
+        # Leave the file (and its modification time) alone if nothing changed.
+        if new_content == original_content:
+            return False
         index_file.seek(0)
         index_file.truncate(0)  # Delete existing contents.
         index_file.write(new_content)
+    return True
+
+
+# Symbols which distinguish tags, such as C, C++, and C#, are spelled out.
+_TAG_SYMBOLS = {"+": " plus ", "#": " sharp ", "&": " and "}
+_TAG_SYMBOL_PATTERN = re.compile("|".join(re.escape(symbol) for symbol in _TAG_SYMBOLS))
+
+
+def tag_slug(tag):
+    """Name of the directory for the page listing entries with ``tag``."""
+    tag = _TAG_SYMBOL_PATTERN.sub(lambda match: _TAG_SYMBOLS[match.group(0)], tag)
+    return re.sub(r"\W+", "-", tag.casefold()).strip("-")
+
+
+def _tag_spelling(tag):
+    # Tags with the same spelling differ only by case and separators.
+    return re.sub(r"[\s_-]+", "", tag.casefold())
+
+
+def build_tag_index(entries):
+    """Build an inverted index from tags to entries.
+
+    Tags which differ only by case or punctuation share a page, so the index
+    is keyed by :func:`tag_slug`. The name of a tag is its first spelling in
+    ``entries``. A warning is logged when tags which differ by more than case
+    and separators, such as "C*" and "C", share a page.
+
+    Returns:
+        Dict[str, Tag]:
+            Mapping from tag slug to the tag, with the positions of its entries
+            in ``entries``, in the same order as ``entries``.
+    """
+    tags = {}
+    warned = set()
+    for entry_id, entry in enumerate(entries):
+        for category in entry.categories:
+            slug = tag_slug(category)
+            if not slug:
+                continue
+            tag = tags.setdefault(slug, Tag(category, []))
+            spelling = _tag_spelling(category)
+            if spelling != _tag_spelling(tag.name) and (slug, spelling) not in warned:
+                warned.add((slug, spelling))
+                logger.warning(
+                    f'Tags "{tag.name}" and "{category}" share the page "{slug}"'
+                )
+            if not tag.entry_ids or tag.entry_ids[-1] != entry_id:
+                tag.entry_ids.append(entry_id)
+    return tags
+
+
+def update_tag_pages(tags_dir, entries, eager_images=ssite.images.DEFAULT_EAGER_IMAGES):
+    """Render the INDEX region of a page for each tag in ``entries``.
+
+    Pages whose region is unchanged are left untouched. Pages for tags which
+    are no longer used are left alone.
+
+    Returns:
+        List[str]: Paths to the tag pages which were created or changed.
+    """
+    region_template = load_template(os.path.join(tags_dir, TAG_TEMPLATE))
+    page_template = None
+    changed = []
+    for slug, tag in sorted(build_tag_index(entries).items()):
+        tag_entries = [entries[entry_id] for entry_id in tag.entry_ids]
+        page_path = os.path.join(tags_dir, slug, "index.html")
+        is_new = not os.path.exists(page_path)
+        if is_new:
+            if page_template is None:
+                page_template = load_template(
+                    os.path.join(tags_dir, TAG_PAGE_TEMPLATE)
+                )
+            os.makedirs(os.path.dirname(page_path), exist_ok=True)
+            with ssite.files.atomic_write(page_path) as page_file:
+                page_file.write(page_template.render(tag=tag.name))
+
+        if (
+            render_index_region(
+                page_path,
+                region_template,
+                tag_entries,
+                eager_images=eager_images,
+                tag=tag.name,
+            )
+            or is_new
+        ):
+            changed.append(page_path)
+    return changed
+
+
+def update_index(
+    indexed_dir,
+    index_path,
+    template_path,
+    add_paths=None,
+    slice_entries=False,
+    read_ahead=ssite.files.DEFAULT_READ_AHEAD,
+    tags_dir=None,
+    eager_images=ssite.images.DEFAULT_EAGER_IMAGES,
+    placeholders=False,
+):
+    """Render the entries in ``indexed_dir`` into the index file.
+
+    The entries are saved in the cache directory. See
+    :func:`entries_path_for`. If ``add_paths`` is set and the saved entries
+    can be loaded, only the posts at ``add_paths`` are parsed and merged into
+    the saved entries. Otherwise, all posts in ``indexed_dir`` are parsed.
+
+    If ``slice_entries`` is set, only the h-entry element of each post is
+    parsed. See :func:`ssite.hentry.read_hentry_markup`. Posts are read ahead
+    of parsing them in background threads, according to ``read_ahead``.
+
+    If ``tags_dir`` is set, tag pages are updated, too. See
+    :func:`update_tag_pages`.
+
+    Photos without a width and height are measured when rendering, with the
+    sizes cached in the cache directory rather than saved with the entries.
+    All but the first ``eager_images`` images in each index are loaded
+    lazily. If ``eager_images`` is ``None``, every image is loaded eagerly.
+    If ``placeholders`` is set, a placeholder is added to each photo, too.
+    See :func:`ssite.images.make_placeholder`.
+
+    Returns:
+        bool: True if the index file changed.
+    """
+    # TODO: allow working directories other than site root
+    site_root = os.getcwd()
+    entries_path = entries_path_for(index_path)
+
+    entries = None
+    if add_paths is not None:
+        entries = load_entries(entries_path)
+    if entries is None:
+        blog_paths = ssite.blog.find_paths(indexed_dir)
+        entries = list(
+            summaries_from_paths(
+                site_root,
+                indexed_dir,
+                blog_paths,
+                slice_entries=slice_entries,
+                read_ahead=read_ahead,
+            )
+        )
+        sort_entries(entries)
+    else:
+        entries = add_entries(
+            site_root, indexed_dir, entries, add_paths, slice_entries=slice_entries
+        )
+
+    image_cache_path = ssite.files.cache_path(
+        os.path.abspath(indexed_dir), ssite.images.CACHE_FILENAME
+    )
+    image_cache = ssite.images.load_cache(image_cache_path)
+    rendered_entries = ssite.images.with_photo_sizes(entries, site_root, image_cache)
+    if placeholders:
+        rendered_entries = ssite.images.with_photo_placeholders(
+            rendered_entries, site_root, image_cache
+        )
+    ssite.images.save_cache(image_cache_path, image_cache)
+
+    changed = render_index_region(
+        index_path,
+        load_template(template_path),
+        rendered_entries,
+        eager_images=eager_images,
+    )
+    if tags_dir is not None:
+        update_tag_pages(tags_dir, rendered_entries, eager_images=eager_images)
+
+    save_entries(entries_path, entries)
+    return changed
+
+
+def main(args):
+    indexed_dir = args.indexed_dir
+    index_path = args.index
+    if index_path is None:
+        index_path = os.path.join(indexed_dir, "index.html")
+
+    template_path = args.template
+    if template_path is None:
+        template_path = "{}.jinja2".format(index_path)
+
+    update_index(
+        indexed_dir,
+        index_path,
+        template_path,
+        add_paths=args.add,
+        slice_entries=args.slice_entries,
+        read_ahead=ssite.files.read_ahead_options(args),
+        tags_dir=args.tags_dir,
+        eager_images=args.eager_images if args.eager_images >= 0 else None,
+        placeholders=args.placeholders,
+    )
+    ssite.compress.write_sidecars(index_path, formats=args.precompress)
+    if args.tags_dir is not None:
+        for page_path in glob.glob(os.path.join(args.tags_dir, "*", "index.html")):
+            ssite.compress.write_sidecars(page_path, formats=args.precompress)
 
 
 def add_cli_args(parser):
@@ -208,4 +558,50 @@ def add_cli_args(parser):
             "relative to the indexed directory."
         ),
     )
+    parser.add_argument(
+        "--add",
+        help=(
+            "path to a new or changed post to add to the index. Only the given "
+            "posts are parsed, using the entries saved in the ssite cache "
+            "directory by the last run. May be repeated."
+        ),
+        action="append",
+    )
+    parser.add_argument(
+        "--slice_entries",
+        help=(
+            "parse only the h-entry element of each post instead of the whole "
+            "document. Assumes the tags of the h-entry element are balanced."
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--tags_dir",
+        help=(
+            "path to a directory of tag pages to update with the entries of "
+            "each p-category."
+        ),
+    )
+    parser.add_argument(
+        "--eager_images",
+        help=(
+            "number of images at the top of each index to load eagerly. The "
+            'rest get loading="lazy" and decoding="async". A negative number '
+            "loads every image eagerly. Default is {}.".format(
+                ssite.images.DEFAULT_EAGER_IMAGES
+            )
+        ),
+        type=int,
+        default=ssite.images.DEFAULT_EAGER_IMAGES,
+    )
+    parser.add_argument(
+        "--placeholders",
+        help=(
+            "add a tiny, blurry copy of each image to its photo, as a data URI "
+            "in photo.placeholder, for templates to show while the image loads."
+        ),
+        action="store_true",
+    )
+    ssite.files.add_read_ahead_cli_args(parser)
+    ssite.compress.add_cli_args(parser)
     parser.add_argument("indexed_dir", help="path to root of a directory to be indexed")
@@ -0,0 +1,249 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Find links and images which refer to missing files in the site.
+
+Every file under the site root is listed once, up front. The href, src,
+srcset, and poster attributes of each page are then resolved the same way
+as ``ssite syndicate`` resolves image paths and looked up in that list, so
+checking a reference doesn't touch the file system.
+
+Links to other sites are not checked.
+"""
+
+from __future__ import print_function
+
+import collections
+import html.parser
+import os
+import os.path
+import re
+import sys
+import urllib.parse
+
+import ssite.blog
+import ssite.files
+
+
+IGNORED_DIRS = frozenset((".bzr", ".dat", ".hg", ".git", ".svn"))
+
+LINK_ATTRS = ("href", "src", "poster")
+
+Reference = collections.namedtuple("Reference", ["line", "attr", "value"])
+
+BrokenReference = collections.namedtuple(
+    "BrokenReference", ["path", "line", "attr", "value"]
+)
+
+SiteFiles = collections.namedtuple("SiteFiles", ["files", "dirs"])
+
+# Any URL with a scheme, such as https:, mailto:, or data:.
+_SCHEME_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+def scan_site(site_root):
+    """List every file and directory under ``site_root``.
+
+    Version-control directories are skipped. Symbolic links to directories
+    are followed, as a web server would, except for links back to a
+    directory which contains them, which would otherwise loop forever.
+
+    Returns:
+        SiteFiles:
+            Sets of paths relative to ``site_root``, with ``/`` separators.
+            The site root itself is the empty path.
+    """
+    files = set()
+    dirs = {""}
+    root_stat = os.stat(site_root)
+    pending = [("", frozenset([(root_stat.st_dev, root_stat.st_ino)]))]
+    while pending:
+        relative_dir, ancestors = pending.pop()
+        with os.scandir(os.path.join(site_root, relative_dir)) as entries:
+            for entry in entries:
+                path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                if not entry.is_dir():
+                    files.add(path)
+                    continue
+                if entry.name in IGNORED_DIRS:
+                    continue
+                dirs.add(path)
+                stat = entry.stat()
+                key = (stat.st_dev, stat.st_ino)
+                if key not in ancestors:
+                    pending.append((path, ancestors | {key}))
+    return SiteFiles(frozenset(files), frozenset(dirs))
+
+
+class ReferenceFinder(html.parser.HTMLParser):
+    """Collect the URLs which a page refers to, with their line numbers."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.references = []
+
+    def handle_starttag(self, tag, attrs):
+        line, _ = self.getpos()
+        for attr, value in attrs:
+            if not value:
+                continue
+            if attr in LINK_ATTRS:
+                self.references.append(Reference(line, attr, value.strip()))
+            elif attr == "srcset":
+                for candidate in value.split(","):
+                    url = candidate.split()
+                    if url:
+                        self.references.append(Reference(line, attr, url[0]))
+
+    handle_startendtag = handle_starttag
+
+
+def find_references(content_path):
+    """Find the URLs which the page at ``content_path`` refers to.
+
+    Returns:
+        List[Reference]: Each reference, in the order they appear.
+    """
+    finder = ReferenceFinder()
+    with open(content_path, "r", encoding="utf-8") as content_file:
+        finder.feed(content_file.read())
+    finder.close()
+    return finder.references
+
+
+def is_local(url):
+    """Whether ``url`` refers to a file in the site."""
+    if not url or url.startswith("#") or url.startswith("//"):
+        return False
+    return _SCHEME_PATTERN.match(url) is None
+
+
+def resolve(site_root, content_path, url):
+    """Find the path of the file ``url`` refers to, relative to ``site_root``.
+
+    Returns:
+        Optional[str]:
+            The path, with ``/`` separators, or ``None`` if ``url`` is
+            outside of the site root.
+    """
+    url = urllib.parse.unquote(url.split("#", 1)[0].split("?", 1)[0])
+    filepath = ssite.blog.calculate_filepath(site_root, content_path, url)
+    relative_path = os.path.relpath(filepath, start=site_root)
+    if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+        return None
+    relative_path = relative_path.replace(os.sep, "/")
+    if relative_path == ".":
+        return ""
+    return relative_path
+
+
+def exists(site_files, relative_path, is_dir_url=False):
+    """Whether ``relative_path`` is a file or a directory with an index.html."""
+    if relative_path is None:
+        return False
+    if not is_dir_url and relative_path in site_files.files:
+        return True
+    if relative_path in site_files.dirs:
+        index_path = f"{relative_path}/index.html" if relative_path else "index.html"
+        return index_path in site_files.files
+    return False
+
+
+def check_references(site_root, site_files, content_path, references):
+    """Find the references which point to missing files.
+
+    Yields:
+        BrokenReference: Each broken reference.
+    """
+    for reference in references:
+        url = reference.value
+        if not is_local(url):
+            continue
+        path = url.split("#", 1)[0].split("?", 1)[0]
+        if not path:
+            # A query or fragment of this page.
+            continue
+        relative_path = resolve(site_root, content_path, url)
+        if not exists(site_files, relative_path, is_dir_url=path.endswith("/")):
+            yield BrokenReference(
+                content_path, reference.line, reference.attr, reference.value
+            )
+
+
+def main(args):
+    # TODO: allow working directories other than site root
+    site_root = os.getcwd()
+    site_files = scan_site(site_root)
+    if args.content_path:
+        content_paths = [
+            os.path.abspath(input_path.path)
+            for input_path in ssite.files.expand_paths(args.content_path)
+        ]
+    else:
+        content_paths = [
+            os.path.join(site_root, path)
+            for path in sorted(site_files.files)
+            if path.lower().endswith(ssite.files.HTML_EXTENSIONS)
+        ]
+
+    references = 0
+    broken = 0
+    failed = 0
+    for result in ssite.files.run_jobs(find_references, content_paths, jobs=args.jobs):
+        if result.error is not None:
+            failed += 1
+            print(
+                "Failed to read {}: {}".format(result.item, result.error),
+                file=sys.stderr,
+            )
+            continue
+        references += len(result.result)
+        for reference in check_references(
+            site_root, site_files, result.item, result.result
+        ):
+            broken += 1
+            print(
+                "{}:{}: broken {} {}".format(
+                    os.path.relpath(reference.path, start=site_root),
+                    reference.line,
+                    reference.attr,
+                    reference.value,
+                )
+            )
+
+    print(
+        "Found {} broken of {} references in {} pages, {} failed.".format(
+            broken, references, len(content_paths), failed
+        ),
+        file=sys.stderr,
+    )
+    if broken or failed:
+        sys.exit(1)
+
+
+def add_cli_args(parser):
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes. Default is the CPU count.",
+        type=int,
+    )
+    parser.add_argument(
+        "content_path",
+        help=(
+            "path file(s), directories, or glob patterns to check. "
+            "Default is every HTML file in the site root."
+        ),
+        nargs="*",
+    )
@@ -15,29 +15,55 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Create a new note-type post."""
+"""Create a new note-type post.
 
+Many notes can be created at once with --import_file, for example to migrate
+posts exported from another site.
+"""
+
+from __future__ import print_function
+
+import collections
+import csv
 import datetime
+import functools
+import json
 import logging
 import os
 import os.path
 import re
 import shutil
+import sys
 
-import bs4
 import dateutil.parser
 import jinja2
 import pytz
 
+import ssite.files
+import ssite.hentry
+import ssite.index
+
 
 logger = logging.getLogger(__name__)
 
+NoteRecord = collections.namedtuple("NoteRecord", ["note", "published", "pixelart"])
+
+
+def note_text(note):
+    """Get the text content of the HTML in ``note``."""
+    return ssite.hentry.html_text(note)
+
+
+@functools.lru_cache()
+def load_template(template_path):
+    with open(template_path, "r", encoding="utf-8") as ft:
+        return jinja2.Template(ft.read())
+
 
 def render_note(template, note, published, pixelart_filename=None):
-    soup = bs4.BeautifulSoup(note, "html5lib")
     return template.render(
         note=note,
-        note_text=soup.text,
+        note_text=note_text(note),
         published=published,
         pixelarts=[pixelart_filename] if pixelart_filename else [],
     )
@@ -60,7 +86,7 @@ def add_note(template_path, note, published, pixelart_path=None, blog_dir="."):
         logger.warning(
             "Not adding note. " "Destination directory already exists: {}".format(exc)
         )
-        return
+        return None
 
     try:
         pixelart_filename = None
@@ -68,8 +94,7 @@ def add_note(template_path, note, published, pixelart_path=None, blog_dir="."):
             pixelart_filename = os.path.basename(pixelart_path)
             shutil.copy(pixelart_path, os.path.join(destination_dir, pixelart_filename))
 
-        with open(template_path, "r", encoding="utf-8") as ft:
-            note_template = jinja2.Template(ft.read())
+        note_template = load_template(template_path)
 
         note_path = os.path.join(destination_dir, "index.html")
         content = render_note(
@@ -82,11 +107,12 @@ def add_note(template_path, note, published, pixelart_path=None, blog_dir="."):
         # again.
         shutil.rmtree(destination_dir)
         raise
+    return note_path
 
 
-def main(args):
-    if args.published_date:
-        published = dateutil.parser.parse(args.published_date)
+def parse_published(published_date, published_timezone):
+    if published_date:
+        published = dateutil.parser.parse(published_date)
     else:
         published = datetime.datetime.now()
         # No need for microsecond-level precision.
@@ -94,9 +120,151 @@ def main(args):
 
     # Use specified timezone if no timezone is specified.
     if not published.tzinfo:
-        tz = pytz.timezone(args.published_timezone)
+        tz = pytz.timezone(published_timezone)
         published = tz.localize(published)
+    return published
+
+
+def _note_record(row):
+    if not isinstance(row, dict):
+        raise ValueError("expected an object with text and published fields")
+    if not row.get("text"):
+        raise ValueError("missing text")
+    return NoteRecord(row["text"], row.get("published"), row.get("pixelart") or None)
+
+
+def read_import_file(import_path, on_error=None):
+    """Read notes to import.
+
+    A file ending in ``.csv`` is read as CSV with a header row. Any other
+    file is read as newline-delimited JSON, with one object per line. Each
+    record has a ``text`` and a ``published`` date-time, and optionally the
+    path to a ``pixelart`` image.
+
+    Args:
+        on_error (Optional[Callable[[str], None]]):
+            Called with a message for each record which can't be read, such
+            as one without text, before skipping it. If not set, a
+            ``ValueError`` is raised instead.
+
+    Yields:
+        NoteRecord: Each note, in file order.
+    """
+    with open(import_path, "r", encoding="utf-8", newline="") as import_file:
+        if import_path.lower().endswith(".csv"):
+            reader = csv.DictReader(import_file)
+            rows = ((reader.line_num, row) for row in reader)
+        else:
+            rows = (
+                (line_number, line)
+                for line_number, line in enumerate(import_file, start=1)
+                if line.strip()
+            )
+        for line_number, row in rows:
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                record = _note_record(row)
+            except ValueError as exc:
+                message = f"{import_path}:{line_number}: {exc}"
+                if on_error is None:
+                    raise ValueError(message)
+                on_error(message)
+                continue
+            yield record
+
+
+def _import_note_job(job):
+    template_path, record, published_timezone, blog_dir = job
+    # Published dates must be given, so that importing the same file again
+    # doesn't add the notes a second time.
+    if not record.published:
+        raise ValueError("missing published date")
+    return add_note(
+        template_path,
+        record.note,
+        parse_published(record.published, published_timezone),
+        pixelart_path=record.pixelart,
+        blog_dir=blog_dir,
+    )
+
+
+def import_notes(template_path, records, published_timezone, blog_dir=".", jobs=None):
+    """Add notes from ``records`` in parallel worker processes.
+
+    Yields:
+        ssite.files.JobResult:
+            The result of each record. The result is the path to the new note,
+            or ``None`` if the note already exists.
+    """
+    return ssite.files.run_jobs(
+        _import_note_job,
+        ((template_path, record, published_timezone, blog_dir) for record in records),
+        jobs=jobs,
+    )
+
+
+def main_import(args):
+    added = []
+    skipped = 0
+    failed = 0
+
+    def skip_record(message):
+        nonlocal failed
+        failed += 1
+        print("Skipping note: {}".format(message), file=sys.stderr)
 
+    results = import_notes(
+        args.template_path,
+        read_import_file(args.import_file, on_error=skip_record),
+        args.published_timezone,
+        blog_dir=args.blog_dir,
+        jobs=args.jobs,
+    )
+    for result in results:
+        if result.error is not None:
+            failed += 1
+            print(
+                "Failed to add note published {}: {}".format(
+                    result.item[1].published, result.error
+                ),
+                file=sys.stderr,
+            )
+        elif result.result is None:
+            skipped += 1
+        else:
+            added.append(result.result)
+
+    print(
+        "Added {} notes, {} already existed, {} failed.".format(
+            len(added), skipped, failed
+        ),
+        file=sys.stderr,
+    )
+
+    if args.update_index and added:
+        index_path = args.index or os.path.join(args.blog_dir, "index.html")
+        ssite.index.update_index(
+            args.blog_dir,
+            index_path,
+            args.index_template or "{}.jinja2".format(index_path),
+            add_paths=added,
+        )
+
+    if failed:
+        sys.exit(1)
+
+
+def main(args):
+    if args.import_file:
+        main_import(args)
+        return
+
+    if args.note is None:
+        print("A note or --import_file is required.", file=sys.stderr)
+        sys.exit(2)
+
+    published = parse_published(args.published_date, args.published_timezone)
     add_note(
         args.template_path,
         args.note,
@@ -121,5 +289,31 @@ def add_cli_args(parser):
         help="What timezone to use when interpreting the --published_date argument?",
         default="America/Los_Angeles",
     )
+    parser.add_argument(
+        "--import_file",
+        help=(
+            "Path to a newline-delimited JSON or CSV file of notes to add, "
+            "with text, published, and optional pixelart fields."
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of worker processes for --import_file. Default is the CPU count.",
+        type=int,
+    )
+    parser.add_argument(
+        "--update_index",
+        help="Update the index of the blog directory after --import_file.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--index",
+        help="Path to the index file. Default is index.html in the blog directory.",
+    )
+    parser.add_argument(
+        "--index_template",
+        help="Path to the index body template. Default is the index path + .jinja2.",
+    )
     parser.add_argument("template_path", help="Path to note template (jinja2).")
-    parser.add_argument("note", help="Text or HTML content for note post.")
+    parser.add_argument("note", help="Text or HTML content for note post.", nargs="?")
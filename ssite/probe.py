@@ -0,0 +1,78 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Read image metadata from file headers.
+
+Pillow only reads the header when opening an image. Pixel data is decoded
+lazily, so probing an image with this module never decodes it.
+"""
+
+import collections
+
+from PIL import Image
+
+
+# https://www.exif.org/Exif2-2.PDF
+ORIENTATION_TAG = 0x0112
+
+# Orientations which rotate the image by 90 or 270 degrees.
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+ImageInfo = collections.namedtuple(
+    "ImageInfo", ["format", "width", "height", "frame_count", "orientation"]
+)
+
+
+def _orientation(im):
+    # Only look at EXIF data that was found while reading the header. Calling
+    # getexif() on some formats, such as PNG, loads the whole image to look
+    # for trailing metadata.
+    exif_bytes = im.info.get("exif")
+    if not exif_bytes:
+        return 1
+    exif = Image.Exif()
+    exif.load(exif_bytes)
+    return exif.get(ORIENTATION_TAG, 1)
+
+
+def probe_image(path):
+    """Read the format, size, frame count, and orientation of an image.
+
+    Returns:
+        ImageInfo: Metadata about the image at ``path``.
+    """
+    with Image.open(path) as im:
+        # n_frames skips over frame data without decoding it.
+        return ImageInfo(
+            format=im.format,
+            width=im.size[0],
+            height=im.size[1],
+            frame_count=getattr(im, "n_frames", 1),
+            orientation=_orientation(im),
+        )
+
+
+def display_size(info):
+    """Size of an image after applying its EXIF orientation.
+
+    Returns:
+        Tuple[int, int]: The width and height of the image, as displayed.
+    """
+    if info.orientation in TRANSPOSED_ORIENTATIONS:
+        return info.height, info.width
+    return info.width, info.height
+
+
+def is_animated(info):
+    return info.frame_count > 1
@@ -0,0 +1,442 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Link each post to the posts with the most similar text.
+
+Posts are compared by the cosine similarity of TF-IDF vectors of the words
+in their titles and content. The most similar posts are rendered into the
+<!--START RELATED--> region of each post which has one.
+
+Term counts and related posts are cached in the ssite cache directory,
+outside of the site. See ssite.files.cache_path. Only new and changed posts
+are parsed, and only their similarities, plus those of posts which were
+related to them, are recomputed. Similarities between unchanged posts keep
+the TF-IDF weights from when they were computed, until a --rebuild.
+
+Requires the optional numpy and scipy packages.
+"""
+
+from __future__ import print_function
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import os.path
+import sys
+
+try:
+    import numpy
+    import scipy.sparse
+except ImportError:
+    numpy = None
+    scipy = None
+
+import ssite.blog
+import ssite.files
+import ssite.hentry
+import ssite.index
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = ".related-cache.json"
+CACHE_VERSION = 1
+REGION_NAME = "RELATED"
+DEFAULT_LIMIT = 5
+DEFAULT_MAX_MEMORY = 256 * 1024 * 1024
+
+
+def entry_terms(entry):
+    """Count the words in the title and content of ``entry``.
+
+    Returns:
+        Dict[str, int]: Number of times each word appears.
+    """
+    content = entry.content or ""
+    try:
+        # Don't let the related posts themselves affect which posts are
+        # related.
+        content = ssite.index.replace_region(content, REGION_NAME, "")
+    except ValueError:
+        pass
+    text = "{}\n{}".format(entry.name or "", ssite.hentry.html_text(content))
+    return dict(collections.Counter(ssite.hentry.tokenize(text)))
+
+
+def tfidf_matrix(term_counts):
+    """Build a sparse matrix of TF-IDF vectors, one row per document.
+
+    Term frequencies are sublinear (1 + log(count)) and rows are normalized
+    to unit length, so that the dot product of two rows is their cosine
+    similarity.
+
+    Args:
+        term_counts (Sequence[Mapping[str, int]]): Words in each document.
+
+    Returns:
+        scipy.sparse.csr_matrix: Document-term matrix.
+    """
+    vocabulary = {}
+    document_frequency = collections.Counter()
+    for counts in term_counts:
+        document_frequency.update(counts.keys())
+    for term in sorted(document_frequency):
+        vocabulary[term] = len(vocabulary)
+
+    row_lengths = [len(counts) for counts in term_counts]
+    indptr = numpy.zeros(len(term_counts) + 1, dtype=numpy.int64)
+    numpy.cumsum(row_lengths, out=indptr[1:])
+    indices = numpy.empty(indptr[-1], dtype=numpy.int64)
+    counts_data = numpy.empty(indptr[-1], dtype=numpy.float64)
+    position = 0
+    for counts in term_counts:
+        for term, count in counts.items():
+            indices[position] = vocabulary[term]
+            counts_data[position] = count
+            position += 1
+
+    document_count = len(term_counts)
+    frequencies = numpy.array(
+        [document_frequency[term] for term in sorted(document_frequency)],
+        dtype=numpy.float64,
+    )
+    idf = numpy.log((1 + document_count) / (1 + frequencies)) + 1
+    data = (1 + numpy.log(counts_data)) * idf[indices]
+
+    matrix = scipy.sparse.csr_matrix(
+        (data, indices, indptr), shape=(document_count, len(vocabulary))
+    )
+    norms = numpy.sqrt(numpy.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (scipy.sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def _top(scores, limit):
+    # Indices of the largest positive scores, best first.
+    if limit < len(scores):
+        candidates = numpy.argpartition(-scores, limit)[:limit]
+    else:
+        candidates = numpy.arange(len(scores))
+    candidates = candidates[numpy.argsort(-scores[candidates], kind="stable")]
+    return [int(column) for column in candidates if scores[column] > 0]
+
+
+def similar_documents(matrix, rows, limit, max_memory=DEFAULT_MAX_MEMORY):
+    """Find the most similar documents to each of ``rows``.
+
+    Similarities are computed for blocks of rows at a time, with each block
+    of scores limited to about ``max_memory`` bytes.
+
+    Yields:
+        Tuple[int, numpy.ndarray, List[int]]:
+            Each row, its similarity to every document, and the most similar
+            documents, best first.
+    """
+    document_count = matrix.shape[0]
+    block_size = max(1, max_memory // max(1, document_count * 8))
+    transposed = matrix.T.tocsc()
+    rows = list(rows)
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start : start + block_size]
+        scores = (matrix[block_rows] @ transposed).toarray()
+        for block_index, row in enumerate(block_rows):
+            row_scores = scores[block_index]
+            # A document isn't related to itself.
+            row_scores[row] = 0
+            yield row, row_scores, _top(row_scores, limit)
+
+
+def new_cache(options):
+    return {"version": CACHE_VERSION, "options": options, "template": None, "posts": {}}
+
+
+def load_cache(cache_path, options):
+    """Load the cache at ``cache_path``.
+
+    Returns:
+        dict:
+            The cache, or a new empty cache if there isn't one, or if it was
+            written by a different version or with different ``options``.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except FileNotFoundError:
+        return new_cache(options)
+    except ValueError as exc:
+        logger.warning(f"Ignoring invalid cache {cache_path}: {exc}")
+        return new_cache(options)
+    if cache.get("version") != CACHE_VERSION or cache.get("options") != options:
+        return new_cache(options)
+    return cache
+
+
+def save_cache(cache_path, cache):
+    with ssite.files.atomic_write(cache_path) as cache_file:
+        json.dump(cache, cache_file, sort_keys=True)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load_posts(site_root, indexed_dir, cache, read_ahead):
+    """Find posts, parsing only those which changed since they were cached.
+
+    Returns:
+        Tuple[Dict[str, dict], Set[str]]:
+            Records for every post, keyed by entry path, and the paths of the
+            posts which were parsed. Posts without an h-entry have ``None``
+            terms, so that they aren't parsed again until they change.
+    """
+    cached_posts = cache["posts"]
+    posts = {}
+    stale_paths = []
+    for blog_path in ssite.blog.find_paths(indexed_dir):
+        key = "{}/".format(os.path.dirname(blog_path.path))
+        signature = _file_signature(os.path.join(indexed_dir, blog_path.path))
+        record = cached_posts.get(key)
+        if record is not None and record["signature"] == signature:
+            posts[key] = record
+        else:
+            posts[key] = {"signature": signature, "terms": None, "related": []}
+            stale_paths.append(blog_path)
+
+    parsed = set()
+    for entry in ssite.index.summaries_from_paths(
+        site_root, indexed_dir, stale_paths, read_ahead=read_ahead
+    ):
+        posts[entry.path].update(
+            name=entry.name,
+            published=entry.published.isoformat(),
+            terms=entry_terms(entry),
+        )
+        parsed.add(entry.path)
+    return posts, parsed
+
+
+def update_related(
+    site_root,
+    indexed_dir,
+    cache,
+    limit=DEFAULT_LIMIT,
+    max_memory=DEFAULT_MAX_MEMORY,
+    read_ahead=ssite.files.DEFAULT_READ_AHEAD,
+):
+    """Update the related posts of each post in ``indexed_dir``.
+
+    Args:
+        cache (dict):
+            Cache from :func:`load_cache`, which is updated in place.
+        limit (int): Maximum number of related posts per post.
+        max_memory (int):
+            Approximate maximum size in bytes of each block of similarity
+            scores.
+
+    Returns:
+        Set[str]: Paths of the posts whose related posts may have changed.
+    """
+    previous = {
+        key for key, record in cache["posts"].items() if record["terms"] is not None
+    }
+    posts, parsed = _load_posts(site_root, indexed_dir, cache, read_ahead)
+    keys = sorted(key for key, record in posts.items() if record["terms"] is not None)
+    changed = parsed | (previous - set(keys))
+
+    # Recompute the posts which changed, and the posts which were related to
+    # them.
+    recompute = {
+        key
+        for key in keys
+        if key in parsed
+        or any(related_key in changed for related_key, _ in posts[key]["related"])
+    }
+    updated = set(recompute)
+    if recompute:
+        rows = {key: row for row, key in enumerate(keys)}
+        matrix = tfidf_matrix([posts[key]["terms"] for key in keys])
+        candidates = collections.defaultdict(list)
+        for row, scores, top in similar_documents(
+            matrix,
+            sorted(rows[key] for key in recompute),
+            limit,
+            max_memory=max_memory,
+        ):
+            key = keys[row]
+            posts[key]["related"] = [
+                [keys[column], round(float(scores[column]), 6)] for column in top
+            ]
+            if key not in parsed:
+                continue
+            # A changed post may now be more related to a post which isn't
+            # being recomputed than the posts it is already related to.
+            for column in numpy.flatnonzero(scores > 0):
+                other_key = keys[column]
+                if other_key not in recompute:
+                    candidates[other_key].append([key, round(float(scores[column]), 6)])
+
+        for key, new_related in candidates.items():
+            related = sorted(
+                posts[key]["related"] + new_related,
+                key=lambda item: item[1],
+                reverse=True,
+            )[:limit]
+            if related != posts[key]["related"]:
+                posts[key]["related"] = related
+                updated.add(key)
+
+    cache["posts"] = posts
+    return updated
+
+
+def related_entries(site_root, indexed_dir, posts, key):
+    """Describe the related posts of ``key`` for rendering in a template."""
+    related = []
+    for related_key, score in posts[key]["related"]:
+        record = posts[related_key]
+        path = os.path.abspath(os.path.join(indexed_dir, related_key))
+        related.append(
+            {
+                "name": record["name"],
+                "published": record["published"],
+                "path": related_key,
+                "url": "/{}/".format(os.path.relpath(path, start=site_root)),
+                "score": score,
+            }
+        )
+    return related
+
+
+def write_related(site_root, indexed_dir, cache, keys, template):
+    """Render the RELATED region of each post in ``keys``.
+
+    Posts without a RELATED region are skipped.
+
+    Returns:
+        List[str]: Paths to the posts which were rewritten.
+    """
+    posts = cache["posts"]
+    start_line = "<!--START {}-->".format(REGION_NAME)
+    written = []
+    for key in sorted(keys):
+        filepath = os.path.join(indexed_dir, key, "index.html")
+        with open(filepath, "r", encoding="utf-8") as post_file:
+            content = post_file.read()
+        if start_line not in content:
+            continue
+
+        body = template.render(
+            entries=related_entries(site_root, indexed_dir, posts, key)
+        )
+        new_content = ssite.index.replace_region(content, REGION_NAME, body + "\n")
+        if new_content == content:
+            continue
+        with ssite.files.atomic_write(filepath) as post_file:
+            post_file.write(new_content)
+        written.append(filepath)
+        # The RELATED region isn't counted in the terms of a post, so
+        # rewriting it doesn't make the post stale.
+        posts[key]["signature"] = _file_signature(filepath)
+    return written
+
+
+def main(args):
+    if numpy is None:
+        print(
+            "ssite related requires the numpy and scipy packages. "
+            "Install them with: pip install ssite[related]",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+
+    # TODO: allow working directories other than site root
+    site_root = os.getcwd()
+    indexed_dir = args.indexed_dir
+    template_path = args.template
+    if template_path is None:
+        template_path = os.path.join(indexed_dir, "related.html.jinja2")
+    cache_path = ssite.files.cache_path(os.path.abspath(indexed_dir), CACHE_FILENAME)
+
+    with open(template_path, "rb") as template_file:
+        template_source = template_file.read()
+    template_key = hashlib.sha256(template_source).hexdigest()
+    template = ssite.index.load_template(template_path)
+
+    options = {"limit": args.limit}
+    if args.rebuild:
+        cache = new_cache(options)
+    else:
+        cache = load_cache(cache_path, options)
+
+    updated = update_related(
+        site_root,
+        indexed_dir,
+        cache,
+        limit=args.limit,
+        max_memory=args.max_memory * 1024 * 1024,
+        read_ahead=ssite.files.read_ahead_options(args),
+    )
+    if cache["template"] != template_key:
+        # Every post needs to be rendered with the new template.
+        updated = {
+            key for key, record in cache["posts"].items() if record["terms"] is not None
+        }
+        cache["template"] = template_key
+
+    written = write_related(site_root, indexed_dir, cache, updated, template)
+    save_cache(cache_path, cache)
+    print(
+        "Updated related posts of {} posts, rewrote {}.".format(
+            len(updated), len(written)
+        ),
+        file=sys.stderr,
+    )
+
+
+def add_cli_args(parser):
+    parser.add_argument(
+        "-t",
+        "--template",
+        help=(
+            "path to related posts template. Default is related.html.jinja2, "
+            "relative to the indexed directory."
+        ),
+    )
+    parser.add_argument(
+        "--limit",
+        help="maximum number of related posts per post. Default is {}.".format(
+            DEFAULT_LIMIT
+        ),
+        type=int,
+        default=DEFAULT_LIMIT,
+    )
+    parser.add_argument(
+        "--max_memory",
+        help=(
+            "approximate maximum size in MiB of the similarity scores computed "
+            "at once. Default is {}.".format(DEFAULT_MAX_MEMORY // (1024 * 1024))
+        ),
+        type=int,
+        default=DEFAULT_MAX_MEMORY // (1024 * 1024),
+    )
+    parser.add_argument(
+        "--rebuild",
+        help="ignore the cache and recompute the related posts of every post.",
+        action="store_true",
+    )
+    ssite.files.add_read_ahead_cli_args(parser)
+    parser.add_argument("indexed_dir", help="path to root of a directory to be indexed")
@@ -17,43 +17,358 @@
 
 """Remove specified text blocks from the contents of files. (Beta)"""
 
+from __future__ import print_function
+
+import collections
+import functools
 import re
+import sys
 
+import ssite.files
 
-def remove_blocks(contents, start_regex, end_regex):
-    output_lines = []
-    start_prog = re.compile(start_regex)
-    end_prog = re.compile(end_regex)
-    block_started = False
 
-    for line in contents.split("\n"):
-        if block_started:
+BlockRule = collections.namedtuple("BlockRule", ["start", "end"])
+
+
+def compile_rules(pairs):
+    """Compile pairs of start and end regular expressions.
+
+    Returns:
+        List[BlockRule]: Rules with compiled patterns.
+    """
+    return [BlockRule(re.compile(start), re.compile(end)) for start, end in pairs]
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_rules(pairs):
+    # Compile each rule set once per process, rather than once per call.
+    return tuple(compile_rules(pairs))
+
+
+def load_rules(rules_path):
+    """Read pairs of start and end regular expressions from a rules file.
+
+    Each line contains a start regex and an end regex, separated by a tab.
+    Blank lines and lines starting with ``#`` are ignored.
+
+    Returns:
+        List[Tuple[str, str]]: The start and end regex of each rule.
+    """
+    pairs = []
+    with open(rules_path, "r", encoding="utf-8") as rules_file:
+        for line_number, line in enumerate(rules_file, start=1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            parts = line.split("\t")
+            if len(parts) != 2:
+                raise ValueError(
+                    f"{rules_path}:{line_number}: expected a start regex and an "
+                    "end regex separated by a tab"
+                )
+            pairs.append(tuple(parts))
+    return pairs
+
+
+_ESCAPE_ARGUMENT_LENGTHS = {"x": 2, "u": 4, "U": 8}
+
+
+def _skip_escape_argument(char, chars):
+    """Consume the characters after an escape such as \\x, \\u, or \\N.
+
+    Returns:
+        bool:
+            False if the length of the argument isn't known, such as for
+            octal escapes and group references, which have a varying number
+            of digits.
+    """
+    if char in _ESCAPE_ARGUMENT_LENGTHS:
+        for _ in range(_ESCAPE_ARGUMENT_LENGTHS[char]):
+            next(chars, "")
+    elif char == "N":
+        for char in chars:
+            if char == "}":
+                break
+    elif char.isdigit():
+        return False
+    return True
+
+
+def _required_literal(pattern):
+    """Find a substring of every match of ``pattern``, if there is one.
+
+    Only literal characters outside of groups, classes, and alternations are
+    considered, so this returns ``None`` for patterns too complex to analyze.
+    """
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE) or "|" in pattern.pattern:
+        return None
+
+    runs = [""]
+    depth = 0
+    chars = iter(pattern.pattern)
+    for char in chars:
+        if char == "\\":
+            char = next(chars, "")
+            if char.isalnum() or not char:
+                # Escapes such as \d, \x3c, or \N{...} aren't literal
+                # characters. Skip their arguments, too.
+                if not _skip_escape_argument(char, chars):
+                    return None
+                runs.append("")
+                continue
+        elif char == "[":
+            # Skip the character class, including any escaped "]".
+            runs.append("")
+            for char in chars:
+                if char == "\\":
+                    next(chars, "")
+                elif char == "]":
+                    break
+            continue
+        elif char in "()":
+            depth += 1 if char == "(" else -1
+            runs.append("")
+            continue
+        elif char in "*?{":
+            # The previous character may be optional.
+            runs[-1] = runs[-1][:-1]
+            runs.append("")
+            if char == "{":
+                for char in chars:
+                    if char == "}":
+                        break
+            continue
+        elif char in ".^$+":
+            runs.append("")
+            continue
+
+        if depth == 0:
+            runs[-1] += char
+        else:
+            runs.append("")
+
+    literal = max(runs, key=len)
+    return literal or None
+
+
+def prefilter_literals(rules):
+    """Find literals, at least one of which is in every file with a block.
+
+    Returns:
+        Optional[List[bytes]]:
+            UTF-8 encoded literals, or ``None`` if the start pattern of any
+            rule doesn't have a required literal.
+    """
+    literals = []
+    for rule in rules:
+        literal = _required_literal(rule.start)
+        if literal is None:
+            return None
+        literals.append(literal.encode("utf-8"))
+    return literals
+
+
+def contains_any(path, literals, chunk_size=1024 * 1024):
+    """Check if the file at ``path`` contains any of ``literals``.
+
+    The file is read in chunks of bytes, without decoding or splitting it
+    into lines.
+    """
+    overlap = max(len(literal) for literal in literals) - 1
+    tail = b""
+    with open(path, "rb") as in_file:
+        while True:
+            chunk = in_file.read(chunk_size)
+            if not chunk:
+                return False
+            data = tail + chunk
+            if any(literal in data for literal in literals):
+                return True
+            tail = data[-overlap:] if overlap else b""
+
+
+def filter_lines(lines, rules, removed=None):
+    """Skip the lines in blocks matching any of ``rules``.
+
+    A block begins at a line matching the start pattern of a rule and ends
+    at the next line matching the end pattern of the same rule. Both lines
+    are removed along with the lines between them.
+
+    Args:
+        lines (Iterable[str]): Lines, without line endings.
+        rules (Sequence[BlockRule]): Compiled rules.
+        removed (Optional[collections.Counter]):
+            If set, count the removed blocks by start pattern.
+
+    Yields:
+        str: Lines outside of blocks.
+    """
+    end_prog = None
+
+    for line in lines:
+        if end_prog is not None:
             # Stop skipping lines when the end is reached.
             if end_prog.search(line):
-                block_started = False
+                end_prog = None
             # Skip lines if inside a block.
             continue
 
-        if start_prog.search(line):
-            block_started = True
-            continue
+        for rule in rules:
+            if rule.start.search(line):
+                end_prog = rule.end
+                if removed is not None:
+                    removed[rule.start.pattern] += 1
+                break
+        else:
+            yield line
+
+
+def _split_lines(in_file):
+    # Yield the same lines as in_file.read().split("\n"), one at a time.
+    line = ""
+    for line in in_file:
+        yield line[:-1] if line.endswith("\n") else line
+    if line == "" or line.endswith("\n"):
+        yield ""
+
+
+def _write_lines(out_file, lines):
+    # Write the same text as "\n".join(lines), one line at a time.
+    for line_number, line in enumerate(lines):
+        if line_number:
+            out_file.write("\n")
+        out_file.write(line)
+
+
+def remove_blocks(contents, start_regex, end_regex):
+    rules = _compiled_rules(((start_regex, end_regex),))
+    return "\n".join(filter_lines(contents.split("\n"), rules))
+
+
+class _NoBlocks(Exception):
+    pass
+
 
-        output_lines.append(line)
+def remove_blocks_from_file(content_path, rules, literals=None):
+    """Remove blocks from ``content_path``, one line at a time.
 
-    return "\n".join(output_lines)
+    The output is written to a temporary file, which replaces
+    ``content_path`` once all lines have been processed. The file is left
+    untouched if no block was found.
+
+    Args:
+        literals (Optional[Sequence[bytes]]):
+            Result of :func:`prefilter_literals`. If set, files which contain
+            none of these are skipped without reading them line by line.
+
+    Returns:
+        int: The number of blocks removed.
+    """
+    if literals is not None and not contains_any(content_path, literals):
+        return 0
+
+    removed = collections.Counter()
+    try:
+        with open(content_path, "r", encoding="utf-8") as in_file:
+            with ssite.files.atomic_write(content_path) as out_file:
+                _write_lines(
+                    out_file, filter_lines(_split_lines(in_file), rules, removed)
+                )
+                if not removed:
+                    raise _NoBlocks()
+    except _NoBlocks:
+        pass
+    return sum(removed.values())
+
+
+def _remove_blocks_job(job):
+    # Rules are sent to workers as pairs of regexes, so that each worker
+    # compiles them once rather than once per file.
+    content_path, pairs, literals = job
+    return remove_blocks_from_file(content_path, _compiled_rules(pairs), literals)
 
 
 def main(args):
+    pairs = list(args.block or [])
+    for rules_path in args.rules or []:
+        pairs.extend(load_rules(rules_path))
+
     content_paths = args.content_path
-    for content_path in content_paths:
-        with open(content_path, "r", encoding="utf-8") as in_file:
-            content = in_file.read()
-        content = remove_blocks(content, args.start_regex, args.end_regex)
-        with open(content_path, "w", encoding="utf-8") as out_file:
-            out_file.write(content)
+    if not pairs:
+        if len(content_paths) < 3:
+            print(
+                "Expected START_REGEX END_REGEX CONTENT_PATH, or --block or "
+                "--rules with CONTENT_PATH.",
+                file=sys.stderr,
+            )
+            sys.exit(2)
+        pairs.append(tuple(content_paths[:2]))
+        content_paths = content_paths[2:]
+
+    pairs = tuple(tuple(pair) for pair in pairs)
+    literals = prefilter_literals(_compiled_rules(pairs))
+    jobs = [
+        (input_path.path, pairs, literals)
+        for input_path in ssite.files.expand_paths(content_paths)
+    ]
+
+    changed = 0
+    blocks = 0
+    failed = 0
+    for result in ssite.files.run_jobs(_remove_blocks_job, jobs, jobs=args.jobs):
+        if result.error is not None:
+            failed += 1
+            print(
+                "Failed to update {}: {}".format(result.item[0], result.error),
+                file=sys.stderr,
+            )
+        elif result.result:
+            changed += 1
+            blocks += result.result
+
+    print(
+        "Removed {} blocks from {} of {} files, {} failed.".format(
+            blocks, changed, len(jobs), failed
+        ),
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
 
 
 def add_cli_args(parser):
-    parser.add_argument("start_regex", help="regex indicating start of a block")
-    parser.add_argument("end_regex", help="regex indicating end of a block")
-    parser.add_argument("content_path", help="path file(s) to update", nargs="+")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="number of worker processes. Default is the CPU count.",
+        type=int,
+    )
+    parser.add_argument(
+        "--block",
+        help=(
+            "regexes indicating the start and end of a block. May be repeated "
+            "to remove several kinds of blocks in one pass."
+        ),
+        metavar=("START_REGEX", "END_REGEX"),
+        nargs=2,
+        action="append",
+    )
+    parser.add_argument(
+        "--rules",
+        help=(
+            "path to a file with a start regex and an end regex, separated by "
+            "a tab, on each line. May be repeated."
+        ),
+        action="append",
+    )
+    parser.add_argument(
+        "content_path",
+        help=(
+            "path file(s), directories, or glob patterns to update. "
+            "Directories are searched for HTML files. Unless --block or "
+            "--rules is given, the first two arguments are the regexes "
+            "indicating the start and the end of a block."
+        ),
+        metavar="[START_REGEX END_REGEX] CONTENT_PATH",
+        nargs="+",
+    )
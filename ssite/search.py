@@ -0,0 +1,424 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write a search index of the posts in a blog directory.
+
+The index is a directory of JSON files, so that a static site can be searched
+by JavaScript in the browser:
+
+    index.json
+        {"version": 1, "prefix_length": 2, "shards": ["ab", ...],
+         "documents": [[url, name, published, snippet], null, ...]}
+
+        Documents are referred to by their position in this list. Removed
+        posts leave a null, so that the IDs in unchanged shards stay valid.
+
+    terms-PREFIX.json
+        {"term": [id, weight, id, weight, ...], ...}
+
+        Postings for each term which starts with PREFIX, the first
+        prefix_length characters of the term. A term shorter than
+        prefix_length is its own prefix. Postings are sorted by weight, the
+        number of times the term appears in the post, counting words in the
+        title three times and words in the summary twice.
+
+Terms are lower-case words of at least two letters, as split by ``\\w+``.
+To search, split and lower-case the query the same way, and fetch the shard
+for the prefix of each word.
+
+The terms of each post are cached in the ssite cache directory, keyed on
+the output directory, so that the cache isn't published with the shards.
+See ssite.files.cache_path. Only new and changed posts are parsed, and only
+the shards containing their old or new terms are rewritten.
+"""
+
+from __future__ import print_function
+
+import collections
+import json
+import logging
+import os
+import os.path
+import sys
+
+import ssite.blog
+import ssite.compress
+import ssite.files
+import ssite.hentry
+import ssite.index
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = ".search-cache.json"
+CACHE_VERSION = 1
+INDEX_FILENAME = "index.json"
+INDEX_VERSION = 1
+SHARD_FILENAME_PREFIX = "terms-"
+DEFAULT_PREFIX_LENGTH = 2
+SNIPPET_LENGTH = 200
+
+NAME_WEIGHT = 3
+SUMMARY_WEIGHT = 2
+CONTENT_WEIGHT = 1
+
+# Region of links to related posts, written by ssite related.
+RELATED_REGION_NAME = "RELATED"
+
+_JSON_SEPARATORS = (",", ":")
+
+
+def snippet(text, length=SNIPPET_LENGTH):
+    """Shorten ``text`` to at most ``length`` characters, at a word break."""
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    shortened = text[: length - 1].rsplit(" ", 1)[0]
+    return shortened + "…"
+
+
+def entry_document(entry):
+    """Find the terms of ``entry`` and describe it for search results.
+
+    Returns:
+        Tuple[Dict[str, int], str]: Weight of each term, and a snippet.
+    """
+    content = entry.content or ""
+    try:
+        # Links to related posts aren't part of this post.
+        content = ssite.index.replace_region(content, RELATED_REGION_NAME, "")
+    except ValueError:
+        pass
+    content_text = ssite.hentry.html_text(content)
+    summary_text = ssite.hentry.html_text(entry.summary or "")
+
+    terms = collections.Counter()
+    for text, weight in (
+        (entry.name or "", NAME_WEIGHT),
+        (summary_text, SUMMARY_WEIGHT),
+        (content_text, CONTENT_WEIGHT),
+    ):
+        for term in ssite.hentry.tokenize(text):
+            terms[term] += weight
+    return dict(terms), snippet(summary_text or content_text)
+
+
+def term_prefix(term, prefix_length):
+    return term[:prefix_length]
+
+
+def new_cache(options):
+    return {"version": CACHE_VERSION, "options": options, "next_id": 0, "posts": {}}
+
+
+def load_cache(cache_path, options):
+    """Load the cache at ``cache_path``.
+
+    Returns:
+        dict:
+            The cache, or a new empty cache if there isn't one, or if it was
+            written by a different version or with different ``options``.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except FileNotFoundError:
+        return new_cache(options)
+    except ValueError as exc:
+        logger.warning(f"Ignoring invalid cache {cache_path}: {exc}")
+        return new_cache(options)
+    if cache.get("version") != CACHE_VERSION or cache.get("options") != options:
+        return new_cache(options)
+    return cache
+
+
+def save_cache(cache_path, cache):
+    with ssite.files.atomic_write(cache_path) as cache_file:
+        json.dump(cache, cache_file, sort_keys=True)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def update_documents(
+    site_root, indexed_dir, cache, read_ahead=ssite.files.DEFAULT_READ_AHEAD
+):
+    """Parse the posts which changed since they were cached.
+
+    Posts without an h-entry are cached with ``None`` terms, so that they
+    aren't parsed again until they change.
+
+    Args:
+        cache (dict): Cache from :func:`load_cache`, which is updated in place.
+
+    Returns:
+        Dict[str, Optional[dict]]:
+            The previous record of each post which was added, changed, or
+            removed, keyed by entry path. New posts have a ``None`` record.
+    """
+    cached_posts = cache["posts"]
+    posts = {}
+    changed = {}
+    stale_paths = []
+    for blog_path in ssite.blog.find_paths(indexed_dir):
+        key = "{}/".format(os.path.dirname(blog_path.path))
+        signature = _file_signature(os.path.join(indexed_dir, blog_path.path))
+        record = cached_posts.get(key)
+        if record is not None and record["signature"] == signature:
+            posts[key] = record
+        else:
+            posts[key] = {"signature": signature, "id": None, "terms": None}
+            stale_paths.append(blog_path)
+            if record is not None and record["terms"] is not None:
+                changed[key] = record
+
+    for key, record in cached_posts.items():
+        if key not in posts and record["terms"] is not None:
+            changed[key] = record
+
+    # Number new posts in the order they were published.
+    stale_paths.sort(key=lambda blog_path: (blog_path.published, blog_path.path))
+    for entry in ssite.index.summaries_from_paths(
+        site_root, indexed_dir, stale_paths, read_ahead=read_ahead
+    ):
+        record = posts[entry.path]
+        previous = changed.get(entry.path)
+        if previous is not None:
+            record["id"] = previous["id"]
+        else:
+            record["id"] = cache["next_id"]
+            cache["next_id"] += 1
+            changed[entry.path] = None
+
+        path = os.path.abspath(os.path.join(indexed_dir, entry.path))
+        terms, text = entry_document(entry)
+        record.update(
+            terms=terms,
+            document=[
+                "/{}/".format(os.path.relpath(path, start=site_root)),
+                entry.name,
+                entry.published.isoformat(),
+                text,
+            ],
+        )
+
+    cache["posts"] = posts
+    return changed
+
+
+def _shard_path(output_dir, prefix):
+    return os.path.join(output_dir, "{}{}.json".format(SHARD_FILENAME_PREFIX, prefix))
+
+
+def _load_shard(path):
+    try:
+        with open(path, "r", encoding="utf-8") as shard_file:
+            return json.load(shard_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _sorted_postings(postings):
+    # Highest weight first, then oldest document first.
+    postings.sort(key=lambda posting: (-posting[1], posting[0]))
+    return [value for posting in postings for value in posting]
+
+
+def write_index(output_dir, cache, changed, rebuild=False):
+    """Write the shards with terms from ``changed`` posts, and index.json.
+
+    Args:
+        changed (Dict[str, Optional[dict]]):
+            Previous records of the changed posts, from
+            :func:`update_documents`.
+        rebuild (bool):
+            If set, write every shard from scratch, instead of updating the
+            existing shards, and remove shards which are no longer needed.
+
+    Returns:
+        List[str]: Paths to the files which were written.
+    """
+    index_path = os.path.join(output_dir, INDEX_FILENAME)
+    if not changed and not rebuild and os.path.exists(index_path):
+        return []
+
+    prefix_length = cache["options"]["prefix_length"]
+    posts = cache["posts"]
+    indexed = [record for record in posts.values() if record["terms"] is not None]
+
+    # Shards containing the old or new terms of changed posts.
+    changed_ids = set()
+    dirty = set()
+    for key, previous in changed.items():
+        for record in (previous, posts.get(key)):
+            if record is None or record["terms"] is None:
+                continue
+            changed_ids.add(record["id"])
+            dirty.update(term_prefix(term, prefix_length) for term in record["terms"])
+
+    new_postings = collections.defaultdict(lambda: collections.defaultdict(list))
+    for record in indexed:
+        if not rebuild and record["id"] not in changed_ids:
+            continue
+        for term, weight in record["terms"].items():
+            prefix = term_prefix(term, prefix_length)
+            new_postings[prefix][term].append([record["id"], weight])
+    if rebuild:
+        dirty = set(new_postings)
+
+    shards = set()
+    for record in indexed:
+        shards.update(term_prefix(term, prefix_length) for term in record["terms"])
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for prefix in sorted(dirty):
+        path = _shard_path(output_dir, prefix)
+        if prefix not in shards:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+
+        shard = {}
+        if not rebuild:
+            for term, flat in _load_shard(path).items():
+                postings = [
+                    [flat[i], flat[i + 1]]
+                    for i in range(0, len(flat), 2)
+                    if flat[i] not in changed_ids
+                ]
+                if postings:
+                    shard[term] = postings
+        for term, postings in new_postings[prefix].items():
+            shard.setdefault(term, []).extend(postings)
+
+        with ssite.files.atomic_write(path) as shard_file:
+            json.dump(
+                {
+                    term: _sorted_postings(postings)
+                    for term, postings in sorted(shard.items())
+                },
+                shard_file,
+                ensure_ascii=False,
+                separators=_JSON_SEPARATORS,
+            )
+        written.append(path)
+
+    documents = [None] * cache["next_id"]
+    for record in indexed:
+        documents[record["id"]] = record["document"]
+    with ssite.files.atomic_write(index_path) as index_file:
+        json.dump(
+            {
+                "version": INDEX_VERSION,
+                "prefix_length": prefix_length,
+                "shards": sorted(shards),
+                "documents": documents,
+            },
+            index_file,
+            ensure_ascii=False,
+            separators=_JSON_SEPARATORS,
+        )
+    written.append(index_path)
+    if rebuild:
+        _remove_stale_shards(output_dir, shards)
+    return written
+
+
+def _remove_stale_shards(output_dir, shards):
+    for name in os.listdir(output_dir):
+        stem, extension = os.path.splitext(name)
+        if (
+            extension == ".json"
+            and stem.startswith(SHARD_FILENAME_PREFIX)
+            and stem[len(SHARD_FILENAME_PREFIX) :] not in shards
+        ):
+            os.remove(os.path.join(output_dir, name))
+
+
+def update_search_index(
+    site_root,
+    indexed_dir,
+    output_dir,
+    prefix_length=DEFAULT_PREFIX_LENGTH,
+    rebuild=False,
+    read_ahead=ssite.files.DEFAULT_READ_AHEAD,
+):
+    """Update the search index in ``output_dir`` with the posts which changed.
+
+    Returns:
+        List[str]: Paths to the files which were written.
+    """
+    cache_path = ssite.files.cache_path(os.path.abspath(output_dir), CACHE_FILENAME)
+    options = {"prefix_length": prefix_length}
+    cache = None if rebuild else load_cache(cache_path, options)
+    if cache is None or not cache["posts"]:
+        # Without a cache, the existing shards can't be updated.
+        rebuild = True
+        cache = new_cache(options)
+
+    changed = update_documents(site_root, indexed_dir, cache, read_ahead=read_ahead)
+    written = write_index(output_dir, cache, changed, rebuild=rebuild)
+    save_cache(cache_path, cache)
+    return written
+
+
+def main(args):
+    # TODO: allow working directories other than site root
+    site_root = os.getcwd()
+    output_dir = args.output
+    if output_dir is None:
+        output_dir = os.path.join(args.indexed_dir, "search")
+
+    written = update_search_index(
+        site_root,
+        args.indexed_dir,
+        output_dir,
+        prefix_length=args.prefix_length,
+        rebuild=args.rebuild,
+        read_ahead=ssite.files.read_ahead_options(args),
+    )
+    for path in written:
+        ssite.compress.write_sidecars(path, formats=args.precompress)
+    print("Wrote {} search index files.".format(len(written)), file=sys.stderr)
+
+
+def add_cli_args(parser):
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "directory to write the search index to. "
+            "Default is search, relative to the indexed directory."
+        ),
+    )
+    parser.add_argument(
+        "--prefix_length",
+        help=(
+            "number of leading characters of each term used to choose its "
+            "shard. Default is {}.".format(DEFAULT_PREFIX_LENGTH)
+        ),
+        type=int,
+        default=DEFAULT_PREFIX_LENGTH,
+    )
+    parser.add_argument(
+        "--rebuild",
+        help="ignore the cache and write every shard from scratch.",
+        action="store_true",
+    )
+    ssite.files.add_read_ahead_cli_args(parser)
+    ssite.compress.add_cli_args(parser)
+    parser.add_argument("indexed_dir", help="path to root of a directory to be indexed")
@@ -0,0 +1,227 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write a sitemap.xml of the posts in a blog directory.
+
+Posts are found by their paths, the same as ``ssite index``, but they are
+not parsed. The last modification time of each post is its file's mtime.
+
+A sitemap is limited to 50,000 URLs and 50 MB. Larger sitemaps are split
+into sitemap-1.xml, sitemap-2.xml, and so on, and sitemap.xml becomes a
+sitemap index which lists them. See https://www.sitemaps.org/protocol.html
+"""
+
+import collections
+import datetime
+import glob
+import os
+import os.path
+import re
+from xml.sax.saxutils import escape
+
+import ssite.blog
+import ssite.files
+
+
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+
+SitemapUrl = collections.namedtuple("SitemapUrl", ["loc", "lastmod"])
+
+_XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>\n'
+_URLSET_START = (
+    _XML_DECLARATION
+    + b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+_URLSET_END = b"</urlset>\n"
+_INDEX_START = (
+    _XML_DECLARATION
+    + b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+_INDEX_END = b"</sitemapindex>\n"
+
+
+def format_lastmod(timestamp):
+    """Format a POSIX timestamp as a W3C date-time in UTC."""
+    return (
+        datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc)
+        .replace(microsecond=0)
+        .isoformat()
+    )
+
+
+def post_urls(site, site_root, indexed_dir):
+    """Find the URL and modification time of each post in ``indexed_dir``.
+
+    Yields:
+        SitemapUrl: Each post, most recently published first.
+    """
+    blog_paths = sorted(
+        ssite.blog.find_paths(indexed_dir),
+        key=lambda blog_path: (blog_path.published, blog_path.path),
+        reverse=True,
+    )
+    for blog_path in blog_paths:
+        filepath = os.path.abspath(os.path.join(indexed_dir, blog_path.path))
+        # Link to directories instead of index.html files for prettier URLs.
+        loc = ssite.blog.calculate_absolute_url(site, site_root, filepath, "./")
+        yield SitemapUrl(loc, format_lastmod(os.stat(filepath).st_mtime))
+
+
+def _element(tag, loc, lastmod):
+    return (
+        f"<{tag}><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></{tag}>\n"
+    ).encode("utf-8")
+
+
+def shard_path(output_path, number):
+    root, extension = os.path.splitext(output_path)
+    return f"{root}-{number}{extension}"
+
+
+def _remove_stale_shards(output_path, shard_count):
+    root, extension = os.path.splitext(output_path)
+    pattern = re.compile(
+        re.escape(os.path.basename(root)) + r"-([0-9]+)" + re.escape(extension) + "$"
+    )
+    for path in glob.glob(f"{glob.escape(root)}-*{extension}"):
+        match = pattern.match(os.path.basename(path))
+        if match and int(match.group(1)) > shard_count:
+            os.remove(path)
+
+
+def write_sitemap(
+    urls, output_path, site, site_root, max_urls=MAX_URLS, max_bytes=MAX_BYTES
+):
+    """Write ``urls`` to a sitemap, split into shards if needed.
+
+    URLs are written to disk as they are read from ``urls``. Shards are
+    written to temporary files, which replace the previous sitemap once all
+    URLs have been written.
+
+    Args:
+        urls (Iterable[SitemapUrl]): URLs to include.
+        output_path (str): Path to sitemap.xml.
+        site (str): Base URL of the site, used for the URLs of shards.
+        site_root (str): Path to the site root directory.
+
+    Returns:
+        List[str]: Paths to the shards, or just ``output_path`` if all URLs
+        fit in one sitemap.
+    """
+    # Temporary file and the lastmod of the newest URL in each shard.
+    shards = []
+    shard_file = None
+    shard_urls = 0
+    shard_bytes = 0
+
+    try:
+        for url in urls:
+            element = _element("url", url.loc, url.lastmod)
+            if (
+                shard_file is None
+                or shard_urls >= max_urls
+                or shard_bytes + len(element) + len(_URLSET_END) > max_bytes
+            ):
+                if shard_file is not None:
+                    shard_file.write(_URLSET_END)
+                    shard_file.close()
+                shard_file = ssite.files.temporary_file(output_path, mode="wb")
+                shards.append([shard_file, url.lastmod])
+                shard_file.write(_URLSET_START)
+                shard_urls = 0
+                shard_bytes = len(_URLSET_START)
+
+            shard_file.write(element)
+            shards[-1][1] = max(shards[-1][1], url.lastmod)
+            shard_urls += 1
+            shard_bytes += len(element)
+
+        if shard_file is not None:
+            shard_file.write(_URLSET_END)
+            shard_file.close()
+    except BaseException:
+        for temp_file, _ in shards:
+            temp_file.close()
+            os.unlink(temp_file.name)
+        raise
+
+    if len(shards) <= 1:
+        # Everything fits in one sitemap, so there is no need for an index.
+        if shards:
+            ssite.files.move_into_place(shards[0][0].name, output_path)
+        else:
+            with ssite.files.atomic_write(output_path, mode="wb") as out_file:
+                out_file.write(_URLSET_START + _URLSET_END)
+        _remove_stale_shards(output_path, 0)
+        return [output_path]
+
+    paths = []
+    for number, (temp_file, _) in enumerate(shards, start=1):
+        path = shard_path(output_path, number)
+        ssite.files.move_into_place(temp_file.name, path)
+        paths.append(path)
+
+    with ssite.files.atomic_write(output_path, mode="wb") as out_file:
+        out_file.write(_INDEX_START)
+        for path, (_, lastmod) in zip(paths, shards):
+            loc = ssite.blog.calculate_absolute_url(
+                site, site_root, os.path.abspath(path), os.path.basename(path)
+            )
+            out_file.write(_element("sitemap", loc, lastmod))
+        out_file.write(_INDEX_END)
+    _remove_stale_shards(output_path, len(paths))
+    return paths
+
+
+def main(args):
+    # TODO: allow working directories other than site root
+    site_root = os.getcwd()
+    output_path = args.output
+    if output_path is None:
+        output_path = os.path.join(args.indexed_dir, "sitemap.xml")
+
+    write_sitemap(
+        post_urls(args.site, site_root, args.indexed_dir),
+        output_path,
+        args.site,
+        site_root,
+        max_urls=args.max_urls,
+        max_bytes=args.max_bytes,
+    )
+
+
+def add_cli_args(parser):
+    parser.add_argument(
+        "-o",
+        "--output",
+        help=(
+            "path to write the sitemap to. "
+            "Default is sitemap.xml, relative to the indexed directory."
+        ),
+    )
+    parser.add_argument(
+        "--max_urls",
+        help="maximum number of URLs per sitemap file.",
+        type=int,
+        default=MAX_URLS,
+    )
+    parser.add_argument(
+        "--max_bytes",
+        help="maximum size in bytes of each sitemap file.",
+        type=int,
+        default=MAX_BYTES,
+    )
+    parser.add_argument("site", help="base URL of site (must end in /)")
+    parser.add_argument("indexed_dir", help="path to root of a directory to be indexed")
@@ -0,0 +1,158 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache syndicated entries and rendered feed fragments between builds.
+
+An entry is keyed by its path relative to the indexed directory (the same as
+``HEntry.path``). A cached entry is used as long as neither its HTML file nor
+any of its local images have changed, and its syndicated images still exist.
+"""
+
+import json
+import logging
+import os
+import os.path
+
+import ssite.hentry
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 3
+
+
+def new_cache(options):
+    # Round-trip through JSON so that options compare equal to loaded ones.
+    return {
+        "version": CACHE_VERSION,
+        "options": json.loads(json.dumps(options)),
+        "entries": {},
+    }
+
+
+def load_cache(cache_path, options):
+    """Load the cache at ``cache_path``.
+
+    Returns an empty cache if it doesn't exist or was created with different
+    ``options``.
+    """
+    cache = new_cache(options)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            loaded = json.load(cache_file)
+    except FileNotFoundError:
+        return cache
+    except ValueError as exc:
+        logger.warning(f"Ignoring invalid cache {cache_path}: {exc}")
+        return cache
+
+    if (
+        loaded.get("version") != cache["version"]
+        or loaded.get("options") != cache["options"]
+    ):
+        return cache
+    return loaded
+
+
+def save_cache(cache_path, cache, keep_paths=None):
+    """Write ``cache`` to ``cache_path``.
+
+    If ``keep_paths`` is set, entries for other paths are dropped.
+    """
+    if keep_paths is not None:
+        keep_paths = set(keep_paths)
+        cache["entries"] = {
+            path: record
+            for path, record in cache["entries"].items()
+            if path in keep_paths
+        }
+
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as cache_file:
+        json.dump(cache, cache_file)
+    os.replace(temp_path, cache_path)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _is_fresh(record, filepath):
+    try:
+        if record["signature"] != _file_signature(filepath):
+            return False
+        for image_path, (signature, destination_dir) in record["images"].items():
+            if _file_signature(image_path) != signature:
+                return False
+            if not os.path.isdir(destination_dir):
+                return False
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def is_fresh(cache, path, filepath):
+    """Check if there is a fresh cached entry for ``path``."""
+    record = cache["entries"].get(path)
+    return record is not None and _is_fresh(record, filepath)
+
+
+def get_entry(cache, path, filepath):
+    """Get the cached entry for ``path``.
+
+    Returns:
+        Tuple[bool, Optional[ssite.hentry.HEntry]]:
+            Whether a fresh cached value was found, and the cached entry.
+            The entry is ``None`` for files which were skipped, such as those
+            without an h-entry.
+    """
+    record = cache["entries"].get(path)
+    if record is None or not _is_fresh(record, filepath):
+        return False, None
+    if record["entry"] is None:
+        return True, None
+    return True, ssite.hentry.from_dict(record["entry"])
+
+
+def put_entry(cache, path, filepath, entry, images):
+    """Cache ``entry`` for ``path``.
+
+    Args:
+        images (Mapping[str, str]):
+            Mapping from local image path to the directory it was syndicated
+            to.
+    """
+    cache["entries"][path] = {
+        "signature": _file_signature(filepath),
+        "images": {
+            image_path: [_file_signature(image_path), destination_dir]
+            for image_path, destination_dir in images.items()
+        },
+        "entry": ssite.hentry.to_dict(entry) if entry is not None else None,
+        "fragments": {},
+    }
+
+
+def get_fragment(cache, path, template_key):
+    record = cache["entries"].get(path)
+    if record is None:
+        return None
+    return record["fragments"].get(template_key)
+
+
+def put_fragment(cache, path, template_key, fragment):
+    record = cache["entries"].get(path)
+    if record is not None:
+        record["fragments"][template_key] = fragment
@@ -14,6 +14,7 @@
 
 """Commands to syndicate content to other platforms."""
 
+from . import gc
 from . import rss
 
 
@@ -25,7 +26,12 @@ def add_cli_args(parser):
     subparsers = parser.add_subparsers(title="syndication commands", dest="syndicate")
     rss_parser = subparsers.add_parser("rss", help=_module_help(rss))
     rss.add_cli_args(rss_parser)
+    gc_parser = subparsers.add_parser("gc", help=_module_help(gc))
+    gc.add_cli_args(gc_parser)
 
 
 def main(args):
-    rss.main(args)
+    if args.syndicate == "gc":
+        gc.main(args)
+    else:
+        rss.main(args)
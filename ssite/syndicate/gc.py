@@ -0,0 +1,137 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Remove syndicated images which are no longer referenced by a feed."""
+
+from __future__ import print_function
+
+import os
+import os.path
+import re
+import shutil
+import sys
+
+
+IMAGE_DIR_PATTERN = re.compile(r"images/(sha256-[0-9a-f]{64})/")
+
+
+def referenced_image_dirs(feed_paths):
+    """Find the content-addressed image directories used in feeds.
+
+    Returns:
+        Set[str]: Names of referenced ``sha256-*`` directories.
+    """
+    referenced = set()
+    for feed_path in feed_paths:
+        with open(feed_path, "r", encoding="utf-8") as feed_file:
+            for line in feed_file:
+                referenced.update(IMAGE_DIR_PATTERN.findall(line))
+    return referenced
+
+
+def find_orphans(output_dir, referenced):
+    """Find image directories in ``output_dir`` not in ``referenced``.
+
+    Returns:
+        List[str]: Paths to unreferenced image directories.
+    """
+    images_dir = os.path.join(output_dir, "images")
+    if not os.path.isdir(images_dir):
+        return []
+
+    orphans = []
+    with os.scandir(images_dir) as dir_entries:
+        for dir_entry in dir_entries:
+            if (
+                dir_entry.is_dir()
+                and dir_entry.name.startswith("sha256-")
+                and dir_entry.name not in referenced
+            ):
+                orphans.append(dir_entry.path)
+    return sorted(orphans)
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for filename in files:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total
+
+
+def collect_garbage(output_dir, feed_paths, dry_run=False):
+    """Remove image directories which aren't referenced by ``feed_paths``.
+
+    Returns:
+        List[Tuple[str, int]]:
+            Path and size in bytes of each removed (or, if ``dry_run``, each
+            removable) directory.
+    """
+    referenced = referenced_image_dirs(feed_paths)
+    removed = []
+    for orphan in find_orphans(output_dir, referenced):
+        removed.append((orphan, dir_size(orphan)))
+        if not dry_run:
+            shutil.rmtree(orphan)
+    return removed
+
+
+def main(args):
+    output_dir = args.output_dir
+    feed_paths = args.feed or [os.path.join(output_dir, "blog.xml")]
+
+    if not referenced_image_dirs(feed_paths) and not args.allow_empty:
+        # An empty or truncated feed would otherwise delete every image.
+        print(
+            "No images referenced by {}. Pass --allow_empty to remove all "
+            "syndicated images.".format(", ".join(feed_paths)),
+            file=sys.stderr,
+        )
+        return
+
+    removed = collect_garbage(output_dir, feed_paths, dry_run=args.dry_run)
+    verb = "Would remove" if args.dry_run else "Removed"
+    for path, size in removed:
+        print("{} {} ({} bytes)".format(verb, path, size))
+    print(
+        "{} {} unreferenced image directories ({} bytes).".format(
+            verb, len(removed), sum(size for _, size in removed)
+        )
+    )
+
+
+def add_cli_args(parser):
+    parser.add_argument(
+        "--output_dir",
+        help="path containing syndicated images. ",
+        default="syndicate/",
+    )
+    parser.add_argument(
+        "--feed",
+        help=(
+            "path to a feed whose images should be kept. May be repeated. "
+            "Default is blog.xml, relative to the output directory."
+        ),
+        action="append",
+    )
+    parser.add_argument(
+        "--dry_run",
+        help="report unreferenced image directories without removing them.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--allow_empty",
+        help="remove all images if the feeds don't reference any.",
+        action="store_true",
+    )
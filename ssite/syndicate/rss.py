@@ -14,7 +14,11 @@
 
 """Syndicate content to an RSS file."""
 
+import argparse
+import collections
+import glob
 import hashlib
+import logging
 import os
 import os.path
 import shutil
@@ -22,17 +26,44 @@ import subprocess
 
 import bs4
 import jinja2
-from PIL import Image, ImageSequence
+from PIL import Image, ImageOps
 
 import ssite.blog
+import ssite.compress
+import ssite.files
 import ssite.hentry
+import ssite.images
+import ssite.probe
+import ssite.syndicate.cache
+import ssite.syndicate.gc
+
+
+logger = logging.getLogger(__name__)
+
+ImageOptions = collections.namedtuple(
+    "ImageOptions",
+    ["resize_width", "srcset_widths", "formats", "placeholders"],
+    defaults=(False,),
+)
+DEFAULT_IMAGE_OPTIONS = ImageOptions(resize_width=600, srcset_widths=(), formats=())
+
+FeedOutput = collections.namedtuple(
+    "FeedOutput", ["template_path", "output_path", "entry_template_path"]
+)
+
+CACHE_FILENAME = ".blog-cache.json"
+
+# Alternate formats which may be written alongside the original format.
+ALTERNATE_FORMATS = ("webp", "avif")
+
+# Images which are resized and given placeholders.
+# TODO: what other image formats should we resize?
+BITMAP_EXTENSIONS = (".png", ".gif", ".jpg", ".jpeg")
 
 
 def is_animated(im):
-    for frame_id, _ in enumerate(ImageSequence.Iterator(im)):
-        if frame_id > 0:
-            return True
-    return False
+    # Pillow determines this from the file without decoding any frames.
+    return getattr(im, "is_animated", False)
 
 
 def resize_static_image(im, resized_path, resize_to, is_pixel_art=True):
@@ -80,11 +111,125 @@ def resize_image(original_path, resized_path, resize_width=600, is_pixel_art=Tru
     return resize_to
 
 
-def syndicate_images(soup, syndication_url, output_dir, site_root, content_path):
+def resized_filename(width, extension):
+    return "resized-{}px{}".format(width, extension)
+
+
+def resize_image_variants(
+    original_path,
+    destination_dir,
+    extension,
+    resize_width=600,
+    srcset_widths=(),
+    formats=(),
+    is_pixel_art=True,
+    image_info=None,
+):
+    """Write resized copies of an image to ``destination_dir``.
+
+    The image is always resized to ``resize_width``. It is also resized to
+    each of ``srcset_widths`` that is narrower than the original. The original
+    image is decoded at most once, and only if a variant is missing. Each
+    resized frame is encoded in the original format plus each of ``formats``.
+
+    Sizes are calculated from ``image_info``, which is probed from the
+    original image if not provided.
+
+    Returns:
+        Dict[str, List[Tuple[str, Tuple[int, int]]]]:
+            Mapping from file extension to a list of ``(path, size)`` pairs,
+            ordered by width.
+    """
+    if image_info is None:
+        image_info = ssite.probe.probe_image(original_path)
+    orig_w, orig_h = ssite.probe.display_size(image_info)
+    orig_aspect_ratio = orig_w / orig_h
+    animated = ssite.probe.is_animated(image_info)
+    # Decode the image only once a variant needs to be written.
+    im = None
+
+    widths = {resize_width}
+    widths.update(width for width in srcset_widths if width < orig_w)
+
+    extensions = [extension]
+    if not animated:
+        # gifsicle only writes GIFs, so alternate formats are static-only.
+        registered_extensions = Image.registered_extensions()
+        for image_format in formats:
+            if ".{}".format(image_format) not in registered_extensions:
+                logger.warning(f"Skipping {image_format}: not supported by Pillow")
+                continue
+            extensions.append(".{}".format(image_format))
+
+    variants = collections.OrderedDict((ext, []) for ext in extensions)
+    for width in sorted(widths):
+        resize_to = (width, int(width / orig_aspect_ratio))
+        resized_frame = None
+        for ext in extensions:
+            resized_path = os.path.join(destination_dir, resized_filename(width, ext))
+            variants[ext].append((resized_path, resize_to))
+            if os.path.exists(resized_path):
+                continue
+
+            if animated:
+                resize_animation(
+                    original_path, resized_path, resize_to, is_pixel_art=is_pixel_art
+                )
+                continue
+
+            if im is None:
+                im = Image.open(original_path)
+                if image_info.orientation != 1:
+                    # Resized images don't keep EXIF data, so apply the
+                    # orientation to the pixels.
+                    im = ImageOps.exif_transpose(im)
+            if resized_frame is None:
+                resized_frame = im.resize(
+                    resize_to,
+                    # Use Image.NEAREST for sharp pixel art images.
+                    # Use Image.LANCZOS for high quality photo resizing.
+                    resample=Image.NEAREST if is_pixel_art else Image.LANCZOS,
+                )
+            frame = resized_frame
+            if ext != extension and frame.mode not in ("RGB", "RGBA"):
+                frame = frame.convert("RGBA")
+            frame.save(resized_path, optimize=True)
+
+    return variants
+
+
+def format_srcset(syndication_url, output_dir, variants):
+    return ", ".join(
+        "{}{} {}w".format(
+            syndication_url, os.path.relpath(path, start=output_dir), size[0]
+        )
+        for path, size in variants
+    )
+
+
+def syndicate_images(
+    soup,
+    syndication_url,
+    output_dir,
+    site_root,
+    content_path,
+    image_options=DEFAULT_IMAGE_OPTIONS,
+):
     """Write syndicated images to ``output_dir``.
 
-    Modifies image source attributes in``soup``.
+    Modifies image source attributes in``soup``. If ``image_options`` requests
+    additional widths, a ``srcset`` attribute is added. If it requests
+    alternate formats, the image is wrapped in a ``<picture>`` element with a
+    ``<source>`` per format. If it requests placeholders, a placeholder is
+    saved in the directory of each bitmap image. See
+    :func:`ssite.images.syndicated_placeholder`.
+
+    Returns:
+        Dict[str, str]:
+            Mapping from each local image path to the directory it was
+            syndicated to.
     """
+    syndicated = {}
     for img in soup.find_all("img"):
         img_props = ssite.hentry.photo_template(img)
         local_path = ssite.blog.calculate_filepath(site_root, content_path, img["src"])
@@ -104,6 +249,7 @@ def syndicate_images(soup, syndication_url, output_dir, site_root, content_path)
             output_dir, "images", "sha256-{}".format(image_hash)
         )
         os.makedirs(destination_dir, exist_ok=True)
+        syndicated[local_path] = destination_dir
 
         extension = os.path.splitext(local_path)[1].lower()
         destination_original = os.path.join(
@@ -115,28 +261,59 @@ def syndicate_images(soup, syndication_url, output_dir, site_root, content_path)
 
         width = None
         height = None
+        resized = False
+        # Don't try to resize SVGs or other non-bitmap formats.
+        is_bitmap = extension in BITMAP_EXTENSIONS
+        if is_bitmap:
+            image_info = ssite.probe.probe_image(local_path)
+            width, height = ssite.probe.display_size(image_info)
+            if image_options.placeholders:
+                ssite.images.syndicated_placeholder(
+                    destination_dir, destination_original
+                )
 
         if (
-            # Don't try to resize SVGs or other non-bitmap formats.
-            # TODO: what other image formats should we resize?
-            extension in (".png", ".gif", ".jpg", ".jpeg")
+            is_bitmap
             # Keep thumbnails at their original resolution.
             and not img_props["is_thumbnail"]
+            # Photos which are already small enough don't need resizing. Pixel
+            # art is scaled up so that it stays sharp.
+            and (img_props["is_pixel_art"] or width > image_options.resize_width)
         ):
-            destination_resized = os.path.join(
-                destination_dir, "resized-600px{}".format(extension)
+            variants = resize_image_variants(
+                local_path,
+                destination_dir,
+                extension,
+                resize_width=image_options.resize_width,
+                srcset_widths=image_options.srcset_widths,
+                formats=image_options.formats,
+                is_pixel_art=img_props["is_pixel_art"],
+                image_info=image_info,
             )
 
-            if not os.path.exists(destination_resized):
-                width, height = resize_image(
-                    local_path,
-                    destination_resized,
-                    is_pixel_art=img_props["is_pixel_art"],
+            resized = True
+            original_variants = variants.pop(extension)
+            destination_resized, (width, height) = next(
+                (path, size)
+                for path, size in original_variants
+                if size[0] == image_options.resize_width
+            )
+            if len(original_variants) > 1:
+                img["srcset"] = format_srcset(
+                    syndication_url, output_dir, original_variants
                 )
-            else:
-                # Already resized, grab the image size.
-                im = Image.open(destination_resized)
-                width, height = im.size
+
+            if variants:
+                picture = soup.new_tag("picture")
+                img.wrap(picture)
+                for alt_extension, alt_variants in variants.items():
+                    image_format = Image.registered_extensions()[alt_extension]
+                    source = soup.new_tag("source")
+                    source["type"] = Image.MIME[image_format]
+                    source["srcset"] = format_srcset(
+                        syndication_url, output_dir, alt_variants
+                    )
+                    img.insert_before(source)
 
         else:
             # TODO: render SVGs?
@@ -145,10 +322,14 @@ def syndicate_images(soup, syndication_url, output_dir, site_root, content_path)
         img["src"] = "{}{}".format(
             syndication_url, os.path.relpath(destination_resized, start=output_dir)
         )
-        if height:
-            img["height"] = str(height)
-        if width:
-            img["width"] = str(width)
+        # Keep the dimensions written by the author, unless the image changed.
+        if resized or not (img.has_attr("width") or img.has_attr("height")):
+            if height:
+                img["height"] = str(height)
+            if width:
+                img["width"] = str(width)
+
+    return syndicated
 
 
 def replace_urls_with_absolute(soup, prefix, root, content_path):
@@ -169,63 +350,361 @@ def replace_urls_with_absolute(soup, prefix, root, content_path):
 
 
 def summary_from_path(
-    site_root, index_root, path, path_date, syndication_url, output_dir
+    site_root,
+    index_root,
+    path,
+    path_date,
+    syndication_url,
+    output_dir,
+    image_options=DEFAULT_IMAGE_OPTIONS,
+    images=None,
+    slice_entry=False,
+    reader=None,
 ):
     filepath = os.path.join(index_root, path)
-    with open(filepath, "r", encoding="utf-8") as fb:
-        return extract_summary(
-            site_root, index_root, filepath, path_date, fb, syndication_url, output_dir
-        )
+    if reader is not None:
+        markup = reader.read(filepath)
+    else:
+        markup = ssite.hentry.read_hentry_markup(filepath, slice_entry=slice_entry)
+    if markup is None:
+        logger.warning(f"Skipping {filepath} because missing h-entry")
+        return None
+    return extract_summary(
+        site_root,
+        index_root,
+        filepath,
+        path_date,
+        markup,
+        syndication_url,
+        output_dir,
+        image_options=image_options,
+        images=images,
+    )
 
 
 def extract_summary(
-    site_root, index_root, path, path_date, markup, syndication_url, output_dir
+    site_root,
+    index_root,
+    path,
+    path_date,
+    markup,
+    syndication_url,
+    output_dir,
+    image_options=DEFAULT_IMAGE_OPTIONS,
+    images=None,
 ):
+    """Extract an h-entry, syndicating its images.
+
+    If ``images`` is set, it is updated with the mapping returned by
+    :func:`syndicate_images`.
+    """
     doc = bs4.BeautifulSoup(markup, "html5lib")
     replace_urls_with_absolute(doc, "/", site_root, path)
-    syndicate_images(doc, syndication_url, output_dir, site_root, path)
+    syndicated = syndicate_images(
+        doc, syndication_url, output_dir, site_root, path, image_options=image_options
+    )
+    if images is not None:
+        images.update(syndicated)
     relative_path = os.path.relpath(path, start=index_root)
     relative_path = f"{os.path.dirname(relative_path)}/"
-    return ssite.hentry.extract_hentry(relative_path, path_date, doc)
+    entry = ssite.hentry.extract_hentry(relative_path, path_date, doc)
+    if entry is not None and image_options.placeholders:
+        add_placeholders(entry, output_dir)
+    return entry
+
 
+def add_placeholders(entry, output_dir):
+    """Set the ``placeholder`` of each syndicated photo of ``entry``.
 
-def summaries_from_paths(site_root, index_root, paths, syndication_url, output_dir):
+    The placeholder is read from the content-addressed directory in the
+    source of the photo, so it always matches the image. Any placeholder
+    already set on a photo is replaced, and a missing placeholder is made
+    again from the original image in that directory.
+    """
+    for photo in entry.photos:
+        photo["placeholder"] = None
+        match = ssite.syndicate.gc.IMAGE_DIR_PATTERN.search(photo["src"])
+        if match is None:
+            continue
+        image_dir = os.path.join(output_dir, "images", match.group(1))
+        originals = glob.glob(os.path.join(glob.escape(image_dir), "original.*"))
+        if not originals:
+            continue
+        extension = os.path.splitext(originals[0])[1].lower()
+        if extension not in BITMAP_EXTENSIONS:
+            continue
+        photo["placeholder"] = ssite.images.syndicated_placeholder(
+            image_dir, originals[0]
+        )
+
+
+def summaries_from_paths(
+    site_root,
+    index_root,
+    paths,
+    syndication_url,
+    output_dir,
+    image_options=DEFAULT_IMAGE_OPTIONS,
+    slice_entries=False,
+):
     for path, path_date in paths:
         summary = summary_from_path(
-            site_root, index_root, path, path_date, syndication_url, output_dir
+            site_root,
+            index_root,
+            path,
+            path_date,
+            syndication_url,
+            output_dir,
+            image_options=image_options,
+            slice_entry=slice_entries,
         )
         if summary is not None:
             yield summary
 
 
+def cached_summary(
+    cache,
+    site_root,
+    index_root,
+    blog_path,
+    syndication_url,
+    output_dir,
+    image_options=DEFAULT_IMAGE_OPTIONS,
+    slice_entry=False,
+    reader=None,
+):
+    cache_key = cache_key_from_path(blog_path.path)
+    filepath = os.path.join(index_root, blog_path.path)
+    found, summary = ssite.syndicate.cache.get_entry(cache, cache_key, filepath)
+    if found:
+        return summary
+
+    images = {}
+    summary = summary_from_path(
+        site_root,
+        index_root,
+        blog_path.path,
+        blog_path.published,
+        syndication_url,
+        output_dir,
+        image_options=image_options,
+        images=images,
+        slice_entry=slice_entry,
+        reader=reader,
+    )
+    ssite.syndicate.cache.put_entry(cache, cache_key, filepath, summary, images)
+    return summary
+
+
+def cache_key_from_path(path):
+    # Use the same path as HEntry.path so that fragments can be looked up
+    # from an entry.
+    return f"{os.path.dirname(path)}/"
+
+
+def newest_summaries(blog_paths, summarize, limit=None):
+    """Summarize the newest ``limit`` entries in ``blog_paths``.
+
+    Paths are summarized newest first, by the date in the path. Older paths
+    are only summarized until ``limit`` entries have been found.
+
+    Returns:
+        List[ssite.hentry.HEntry]: Entries, sorted with most-recent first.
+    """
+    blog_paths = sorted(
+        blog_paths, key=lambda blog_path: blog_path.published, reverse=True
+    )
+    entries = []
+    limit_date = None
+    for blog_path in blog_paths:
+        # Keep going while the path date is the same as the last entry so
+        # that posts from the same day are sorted by their full timestamp.
+        if limit is not None and len(entries) >= limit:
+            if limit_date is None or blog_path.published < limit_date:
+                break
+
+        entry = summarize(blog_path)
+        if entry is not None:
+            entries.append(entry)
+            limit_date = blog_path.published
+
+    # Sort the entries by date.
+    # I reverse it because I want most-recent posts to appear first.
+    entries.sort(key=lambda entry: entry.published, reverse=True)
+    if limit is not None:
+        entries = entries[:limit]
+    return entries
+
+
+def render_fragments(entry_template, template_key, entries, cache):
+    """Render each entry with ``entry_template``, reusing cached fragments."""
+    fragments = []
+    for entry in entries:
+        fragment = ssite.syndicate.cache.get_fragment(cache, entry.path, template_key)
+        if fragment is None:
+            fragment = entry_template.render(entry=entry)
+            ssite.syndicate.cache.put_fragment(
+                cache, entry.path, template_key, fragment
+            )
+        fragments.append(fragment)
+    return fragments
+
+
+def load_template(template_path):
+    """Load a template and a key which changes whenever the template does."""
+    with open(template_path, "r", encoding="utf-8") as ft:
+        source = ft.read()
+    template_key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    return jinja2.Template(source), template_key
+
+
+def render_feed(feed, entries, output_dir, cache, precompress=()):
+    """Write ``entries`` to a feed file using the templates in ``feed``.
+
+    The feed file is only rewritten if its content changed. Compressed
+    copies are written for each of ``precompress``.
+    """
+    jinja_template, _ = load_template(feed.template_path)
+    fragments = []
+    if feed.entry_template_path:
+        entry_template, entry_template_key = load_template(feed.entry_template_path)
+        fragments = render_fragments(entry_template, entry_template_key, entries, cache)
+
+    feed_path = os.path.join(output_dir, feed.output_path)
+    new_content = jinja_template.render(entries=entries, fragments=fragments) + "\n"
+    try:
+        with open(feed_path, "rt", encoding="utf-8") as feed_file:
+            original_content = feed_file.read()
+    except FileNotFoundError:
+        original_content = None
+
+    if new_content != original_content:
+        with open(feed_path, "wt", encoding="utf-8") as feed_file:
+            feed_file.write(new_content)
+
+    ssite.compress.write_sidecars(feed_path, formats=precompress)
+
+
 def main(args):
     indexed_dir = args.indexed_dir
     output_dir = args.output_dir
     site_url = args.site_url
     syndication_url = args.syndication_url
     template_path = args.template
-    xml_path = os.path.join(output_dir, "blog.xml")
+    image_options = ImageOptions(
+        resize_width=args.image_width,
+        srcset_widths=tuple(args.srcset_widths),
+        formats=tuple(args.image_formats),
+        placeholders=args.placeholders,
+    )
+    feeds = [FeedOutput(template_path, "blog.xml", args.entry_template)]
+    feeds.extend(args.feed)
+    cache_path = args.cache
+    if cache_path is None:
+        cache_path = ssite.files.cache_path(output_dir, CACHE_FILENAME)
 
     # TODO: allow working directories other than site root
     site_root = os.getcwd()
 
-    with open(template_path, "r", encoding="utf-8") as ft:
-        jinja_template = jinja2.Template(ft.read())
-    blog_paths = ssite.blog.find_paths(indexed_dir)
-    entries = [
-        entry
-        for entry in summaries_from_paths(
-            site_root, indexed_dir, blog_paths, syndication_url, output_dir
+    # Cached entries are only valid if they were syndicated the same way.
+    cache_options = {
+        "site_root": site_root,
+        "syndication_url": syndication_url,
+        "image_options": image_options._asdict(),
+        "slice_entries": args.slice_entries,
+    }
+    if args.no_cache:
+        cache = ssite.syndicate.cache.new_cache(cache_options)
+    else:
+        cache = ssite.syndicate.cache.load_cache(cache_path, cache_options)
+
+    blog_paths = list(ssite.blog.find_paths(indexed_dir))
+
+    def read(filepath):
+        return ssite.hentry.read_hentry_markup(
+            filepath, slice_entry=args.slice_entries
         )
-    ]
 
-    # Sort the entries by date.
-    # I reverse it because I want most-recent posts to appear first.
-    entries.sort(key=lambda entry: entry.published, reverse=True)
+    def uncached_filepaths():
+        # Read ahead in the same order as newest_summaries, skipping posts
+        # which won't be parsed because they are cached.
+        for blog_path in sorted(
+            blog_paths, key=lambda blog_path: blog_path.published, reverse=True
+        ):
+            filepath = os.path.join(indexed_dir, blog_path.path)
+            cache_key = cache_key_from_path(blog_path.path)
+            if not ssite.syndicate.cache.is_fresh(cache, cache_key, filepath):
+                yield filepath
+
+    reader = ssite.files.ReadAhead(
+        read, uncached_filepaths(), ssite.files.read_ahead_options(args)
+    )
+
+    def summarize(blog_path):
+        return cached_summary(
+            cache,
+            site_root,
+            indexed_dir,
+            blog_path,
+            syndication_url,
+            output_dir,
+            image_options=image_options,
+            reader=reader,
+        )
+
+    with reader:
+        entries = newest_summaries(blog_paths, summarize, limit=args.limit)
+
+    # Render every feed from the same entries so that posts are only parsed
+    # and syndicated once, no matter how many formats are written.
+    for feed in feeds:
+        render_feed(feed, entries, output_dir, cache, precompress=args.precompress)
+
+    ssite.syndicate.cache.save_cache(
+        cache_path,
+        cache,
+        keep_paths=[cache_key_from_path(blog_path.path) for blog_path in blog_paths],
+    )
+
 
-    with open(xml_path, "wt", encoding="utf-8") as xml_file:
-        new_content = jinja_template.render(entries=entries) + "\n"
-        xml_file.write(new_content)
+def _comma_separated(item_type):
+    def parse(value):
+        return [item_type(item.strip()) for item in value.split(",") if item.strip()]
+
+    return parse
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            "expected a positive number, got {}".format(value)
+        )
+    return number
+
+
+def _feed_output(value):
+    parts = value.split("=")
+    if len(parts) not in (2, 3) or not all(parts):
+        raise argparse.ArgumentTypeError(
+            "expected TEMPLATE=OUTPUT or TEMPLATE=OUTPUT=ENTRY_TEMPLATE, "
+            'got "{}"'.format(value)
+        )
+    if len(parts) == 2:
+        parts.append(None)
+    return FeedOutput(*parts)
+
+
+def _image_formats(value):
+    formats = _comma_separated(str)(value)
+    for image_format in formats:
+        if image_format not in ALTERNATE_FORMATS:
+            raise argparse.ArgumentTypeError(
+                'unknown image format "{}", expected one of {}'.format(
+                    image_format, ", ".join(ALTERNATE_FORMATS)
+                )
+            )
+    return formats
 
 
 def add_cli_args(parser):
@@ -250,4 +729,84 @@ def add_cli_args(parser):
         help="path to index blog.xml template.",
         default="syndicate/blog.jinja2.xml",
     )
+    parser.add_argument(
+        "--entry_template",
+        help=(
+            "path to a template for a single entry. Rendered entries are "
+            "cached and passed to the blog.xml template as fragments."
+        ),
+    )
+    parser.add_argument(
+        "--feed",
+        help=(
+            "additional feed to write, such as Atom or JSON Feed, as "
+            "TEMPLATE=OUTPUT or TEMPLATE=OUTPUT=ENTRY_TEMPLATE. OUTPUT is "
+            "relative to the output directory. May be repeated. All feeds are "
+            "rendered from the same parsed entries."
+        ),
+        type=_feed_output,
+        action="append",
+        default=[],
+    )
+    parser.add_argument(
+        "--limit",
+        help="maximum number of entries to include in the feed.",
+        type=_positive_int,
+    )
+    parser.add_argument(
+        "--cache",
+        help=(
+            "path to the cache of syndicated entries. Default is "
+            "{} in a directory for the output directory in the ssite cache "
+            "directory, outside of the site.".format(CACHE_FILENAME)
+        ),
+    )
+    parser.add_argument(
+        "--no_cache",
+        help="ignore entries cached from previous runs.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--image_width",
+        help="width in pixels of the resized src of syndicated images.",
+        type=int,
+        default=DEFAULT_IMAGE_OPTIONS.resize_width,
+    )
+    parser.add_argument(
+        "--srcset_widths",
+        help=(
+            "comma-separated list of additional widths in pixels to include in "
+            "the srcset of syndicated images. For example: 320,1200"
+        ),
+        type=_comma_separated(int),
+        default=[],
+    )
+    parser.add_argument(
+        "--image_formats",
+        help=(
+            "comma-separated list of alternate formats (webp, avif) to write "
+            "alongside the original image format."
+        ),
+        type=_image_formats,
+        default=[],
+    )
+    parser.add_argument(
+        "--placeholders",
+        help=(
+            "add a tiny, blurry copy of each syndicated image to its photo, as "
+            "a data URI in photo.placeholder, for templates to show while the "
+            "image loads."
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--slice_entries",
+        help=(
+            "parse only the h-entry element of each post instead of the whole "
+            "document. Assumes the tags of the h-entry element are balanced."
+        ),
+        action="store_true",
+    )
+    ssite.files.add_read_ahead_cli_args(parser)
+    ssite.compress.add_cli_args(parser)
     parser.add_argument("indexed_dir", help="path to root of a directory to be indexed")
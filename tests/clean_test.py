@@ -12,9 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+import random
+import textwrap
+
+import bs4
 import pytest
 
 import ssite.clean
+import ssite.files
 
 
 @pytest.mark.parametrize(
@@ -33,3 +39,210 @@ import ssite.clean
 def test_remove_extra_whitespace(before, expected):
     actual = ssite.clean.remove_extra_whitespace(before)
     assert actual == expected
+
+
+def fixpoint_remove_html_cruft(text):
+    """The original multi-pass cleaner, used as a reference implementation."""
+    soup = bs4.BeautifulSoup(text, "html.parser")
+    isnotclean = True
+    while isnotclean:
+        isnotclean = False
+        for tag in soup.descendants:
+            if isinstance(tag, bs4.element.NavigableString):
+                text = tag.string
+                wrapped = textwrap.fill(text, width=80)
+                if text != wrapped:
+                    tag.string.replace_with(wrapped)
+                    isnotclean = True
+                continue
+            if not isinstance(tag, bs4.element.Tag):
+                continue
+            if tag.name == "p" and not tag.contents:
+                tag.decompose()
+                isnotclean = True
+                continue
+            if tag.name == "style":
+                tag.decompose()
+                isnotclean = True
+                continue
+            if tag.name == "span":
+                tag.unwrap()
+                isnotclean = True
+                continue
+            if tag.name == "a":
+                ssite.clean.unredirect_links(tag)
+            del tag["id"]
+            del tag["class"]
+            del tag["style"]
+    return soup.prettify()
+
+
+def random_document(rng, max_depth=4):
+    words = ["lorem", "ipsum", "dolor-sit", "amet,", "consectetur", "x" * 90]
+    whitespace = [" ", "  ", "\n", "\n  ", "\t", "\xa0"]
+
+    def text():
+        return "".join(
+            rng.choice(words) + rng.choice(whitespace)
+            for _ in range(rng.randint(0, 25))
+        )
+
+    def element(depth):
+        if depth >= max_depth or rng.random() < 0.3:
+            return text()
+        name = rng.choice(["p", "span", "span", "a", "em", "div", "style"])
+        attrs = rng.choice(
+            [
+                "",
+                ' class="c1"',
+                ' id="h.1" style="color: red"',
+                ' href="https://www.google.com/url?q=https://example.com/&amp;sa=D"',
+            ]
+        )
+        if name == "style":
+            # The reference implementation crashes on text within <style>
+            # with recent versions of BeautifulSoup.
+            return "<style></style>"
+        children = "".join(element(depth + 1) for _ in range(rng.randint(0, 4)))
+        return f"<{name}{attrs}>{children}</{name}>"
+
+    return "".join(element(0) for _ in range(rng.randint(1, 8)))
+
+
+@pytest.mark.parametrize(
+    "html_doc",
+    (
+        "<p></p>",
+        "<p><span></span></p>",
+        "<div><p><span><p></p></span></p>Text</div>",
+        '<p class="c1"><span style="font-weight: 700">Bold</span> text</p>',
+        "<p>   </p><p>\n</p>",
+        "<span><span>Nested <span>spans</span></span></span>",
+        '<a class="c2" href="https://www.google.com/url?q=https://example.com/">'
+        "Link</a>",
+        "<!-- A comment that is long enough that it needs to be wrapped when it "
+        "is cleaned up by the cleaner -->",
+        "<p>" + "A very long paragraph with many words. " * 20 + "</p>",
+    ),
+)
+def test_remove_html_cruft_matches_fixpoint(html_doc):
+    expected = fixpoint_remove_html_cruft(html_doc)
+    assert ssite.clean.remove_html_cruft(html_doc) == expected
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_remove_html_cruft_matches_fixpoint_random(seed):
+    html_doc = random_document(random.Random(seed))
+    expected = fixpoint_remove_html_cruft(html_doc)
+    assert ssite.clean.remove_html_cruft(html_doc) == expected
+
+
+def test_remove_html_cruft_removes_style_with_contents():
+    actual = ssite.clean.remove_html_cruft(
+        "<style>.c1 { color: red; }</style><p>Hello</p>"
+    )
+    assert actual == "<p>\n Hello\n</p>\n"
+
+
+def test_remove_html_cruft_many_spans():
+    html_doc = "<p>" + '<span class="c1">word </span>' * 10000 + "</p>"
+    actual = ssite.clean.remove_html_cruft(html_doc)
+    assert "span" not in actual
+    assert actual.count("word") == 10000
+
+
+@pytest.mark.parametrize("chunk_size", (7, 64 * 1024))
+def test_clean_streaming(chunk_size):
+    html_doc = (
+        "<html><head><style>.c1 { color: red; }</style></head>"
+        '<body class="c2"><p class="c1"><span class="c3">Some  text (</span>'
+        '<a class="c4" href="https://www.google.com/url?q=https://example.com/'
+        '&amp;sa=D"><span>a link</span></a><span>). More &amp; text.</span></p>'
+        '<p><span></span></p><p>Second</p><img class="c5" src="a.png">'
+        "</body></html>"
+    )
+    out_file = io.StringIO()
+
+    ssite.clean.clean_streaming(io.StringIO(html_doc), out_file, chunk_size=chunk_size)
+
+    assert out_file.getvalue() == (
+        "<html>\n<head>\n</head>\n<body>\n"
+        '<p>Some text (<a href="https://example.com/">a link</a>). More &amp; '
+        "text.\n\n"
+        "<p>Second\n\n"
+        '<img src="a.png"/>\n</body>\n</html>\n'
+    )
+
+
+def default_clean(html_doc):
+    html_clean = ssite.clean.remove_html_cruft(html_doc)
+    html_clean = ssite.clean.remove_closing_tags(html_clean)
+    return ssite.clean.remove_extra_whitespace(html_clean)
+
+
+@pytest.mark.parametrize("chunk_size", (7, 64 * 1024))
+@pytest.mark.parametrize(
+    "html_doc",
+    (
+        "<p>a\xa0\xa0b and\xa0c</p>",
+        "<div><script>\n  if (a < b && c) {\n    x();\n  }\n</script></div>",
+        '<div><pre class="c1">  line 1\n    line &lt;2&gt;\n\n</pre></div>',
+        "<pre>a <span>(</span><b>bold</b>\n  <a href='#x'> c </a></pre><p>After</p>",
+        "<textarea>  a  &lt; b\n  &amp; c</textarea>",
+    ),
+)
+def test_clean_streaming_matches_default(html_doc, chunk_size):
+    out_file = io.StringIO()
+
+    ssite.clean.clean_streaming(io.StringIO(html_doc), out_file, chunk_size=chunk_size)
+
+    assert out_file.getvalue() == default_clean(html_doc)
+
+
+def test_clean_streaming_writes_long_text_before_next_tag(monkeypatch):
+    monkeypatch.setattr(ssite.clean, "_MAX_TEXT_BUFFER", 100)
+    out_file = io.StringIO()
+    cleaner = ssite.clean.StreamingCleaner(out_file)
+    words = ["word{}".format(i) for i in range(1000)]
+
+    cleaner.feed("<p>")
+    for word in words:
+        cleaner.feed(word + " ")
+        assert cleaner._text_size < 100 + len(word) + 1
+    assert len(out_file.getvalue().split()) > 900
+    cleaner.close()
+
+    # Words aren't split, even when they span a flush.
+    assert out_file.getvalue().split() == ["<p>" + words[0]] + words[1:]
+
+
+def test_clean_batch_reports_failures(tmp_path):
+    input_dir = tmp_path / "input"
+    (input_dir / "sub").mkdir(parents=True)
+    (input_dir / "a.html").write_text('<p class="c1"><span>A</span></p>')
+    (input_dir / "sub" / "b.html").write_text("<p><span>B</span></p>")
+    (input_dir / "bad.html").write_bytes(b"\xff\xfe not utf-8")
+    output_dir = tmp_path / "output"
+
+    results = ssite.clean.clean_batch(
+        ssite.files.expand_paths([str(input_dir)]), output_dir=str(output_dir), jobs=2
+    )
+
+    failed = [result.item[0] for result in results if result.error is not None]
+    assert failed == [str(input_dir / "bad.html")]
+    assert (output_dir / "a.html").read_text() == "<p>A\n\n"
+    assert (output_dir / "sub" / "b.html").read_text() == "<p>B\n\n"
+
+
+def test_clean_batch_rejects_duplicate_destinations(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "index.html").write_text("<p>{}</p>".format(name))
+    input_paths = ssite.files.expand_paths(
+        [str(tmp_path / "a" / "index.html"), str(tmp_path / "b" / "index.html")]
+    )
+
+    with pytest.raises(ValueError):
+        ssite.clean.clean_batch(input_paths, output_dir=str(tmp_path / "out"))
+
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,38 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import os
+
+import ssite.compress
+
+
+def test_write_sidecars_only_when_changed(tmp_path):
+    path = str(tmp_path / "index.html")
+    with open(path, "w") as f:
+        f.write("<p>Hello</p>\n" * 100)
+
+    assert ssite.compress.write_sidecars(path, formats=["gz"]) == [f"{path}.gz"]
+    with gzip.open(f"{path}.gz", "rt") as f:
+        assert f.read() == "<p>Hello</p>\n" * 100
+
+    # Unchanged source, so the sidecar is fresh.
+    assert ssite.compress.write_sidecars(path, formats=["gz"]) == []
+
+    with open(path, "w") as f:
+        f.write("<p>Goodbye</p>\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert ssite.compress.write_sidecars(path, formats=["gz"]) == [f"{path}.gz"]
+    with gzip.open(f"{path}.gz", "rt") as f:
+        assert f.read() == "<p>Goodbye</p>\n"
@@ -0,0 +1,198 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os.path
+import threading
+
+import pytest
+
+import ssite.files
+
+
+def test_expand_paths_directory():
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    blog_dir = os.path.join(test_dir, "data", "testblog")
+
+    paths = ssite.files.expand_paths([blog_dir])
+
+    assert [path.relative_path for path in paths] == [
+        "2012/01/01/index.html",
+        "2012/01/01/other.html",
+        "2012/04/30/index.html",
+        "2012/index.html",
+        "2013/12/31/index.html",
+    ]
+    assert paths[0].path == os.path.join(blog_dir, "2012/01/01/index.html")
+
+
+def test_expand_paths_glob_and_file():
+    test_dir = os.path.dirname(os.path.abspath(__file__))
+    blog_dir = os.path.join(test_dir, "data", "testblog")
+
+    paths = ssite.files.expand_paths(
+        [
+            os.path.join(blog_dir, "2012", "*", "*", "index.html"),
+            os.path.join(blog_dir, "2012", "index.html"),
+            # Duplicates are skipped.
+            os.path.join(blog_dir, "2012", "04", "30", "index.html"),
+        ]
+    )
+
+    assert [path.relative_path for path in paths] == [
+        "01/01/index.html",
+        "04/30/index.html",
+        "index.html",
+    ]
+
+
+def test_cache_path_is_outside_directory(tmp_path, cache_dir):
+    site_dir = tmp_path / "site"
+    other_dir = tmp_path / "other" / "site"
+
+    path = ssite.files.cache_path(str(site_dir), ".cache.json")
+
+    assert os.path.dirname(os.path.dirname(path)) == str(cache_dir)
+    assert os.path.basename(path) == ".cache.json"
+    assert os.path.isdir(os.path.dirname(path))
+    assert path == ssite.files.cache_path(str(site_dir) + os.sep, ".cache.json")
+    assert path != ssite.files.cache_path(str(other_dir), ".cache.json")
+
+
+def _reciprocal(value):
+    return 1 / value
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_run_jobs_reports_failures(jobs):
+    results = list(ssite.files.run_jobs(_reciprocal, [1, 0, 4], jobs=jobs))
+
+    assert [result.item for result in results] == [1, 0, 4]
+    assert [result.result for result in results] == [1.0, None, 0.25]
+    assert isinstance(results[1].error, ZeroDivisionError)
+
+
+def _exit_on_zero(value):
+    if value == 0:
+        os._exit(1)
+    return value
+
+
+def test_run_jobs_isolates_worker_crash():
+    results = list(ssite.files.run_jobs(_exit_on_zero, [1, 0, 2, 3], jobs=2))
+
+    assert [result.item for result in results] == [1, 0, 2, 3]
+    assert [result.result for result in results] == [1, None, 2, 3]
+    assert results[1].error is not None
+
+
+def test_check_destinations_rejects_duplicates(tmp_path):
+    paths = ssite.files.expand_paths(
+        [str(tmp_path / "a" / "index.html"), str(tmp_path / "b" / "index.html")]
+    )
+
+    ssite.files.check_destinations(paths[:1], str(tmp_path / "out"))
+    with pytest.raises(ValueError, match="would both be written to"):
+        ssite.files.check_destinations(paths, str(tmp_path / "out"))
+
+
+def test_atomic_write_keeps_original_on_error(tmp_path):
+    path = str(tmp_path / "file.txt")
+    with open(path, "w") as f:
+        f.write("original")
+
+    with pytest.raises(ValueError):
+        with ssite.files.atomic_write(path) as f:
+            f.write("partial")
+            raise ValueError("oops")
+
+    with open(path) as f:
+        assert f.read() == "original"
+    assert os.listdir(str(tmp_path)) == ["file.txt"]
+
+
+@pytest.fixture
+def sized_files(tmp_path):
+    paths = []
+    for index in range(6):
+        path = tmp_path / "{}.html".format(index)
+        path.write_text("x" * 100)
+        paths.append(str(path))
+    return paths
+
+
+def test_read_ahead_stays_within_depth_and_memory(sized_files):
+    lock = threading.Lock()
+    read_paths = []
+    limits = []
+
+    def read(path):
+        with lock:
+            read_paths.append(path)
+        with open(path) as f:
+            return f.read()
+
+    options = ssite.files.ReadAheadOptions(depth=3, max_bytes=250)
+    with ssite.files.ReadAhead(read, sized_files, options) as reader:
+        for index, path in enumerate(sized_files):
+            assert reader.read(path) == "x" * 100
+            with lock:
+                # Only two 100-byte files fit in 250 bytes, so reading stays
+                # at most two files ahead of the requested one.
+                limits.append(len(read_paths) - (index + 1))
+
+    assert max(limits) <= 2
+    assert sorted(read_paths) == sorted(sized_files)
+
+
+def test_read_ahead_skips_unrequested_paths(sized_files):
+    calls = []
+
+    def read(path):
+        calls.append(path)
+        return os.path.basename(path)
+
+    options = ssite.files.ReadAheadOptions(depth=2, max_bytes=None)
+    with ssite.files.ReadAhead(read, sized_files, options) as reader:
+        assert reader.read(sized_files[2]) == "2.html"
+        # Not read ahead, so it is read now.
+        assert reader.read("other.html") == "other.html"
+        assert reader.read(sized_files[3]) == "3.html"
+
+    assert calls.count(sized_files[2]) == 1
+    assert "other.html" in calls
+
+
+def test_read_ahead_disabled_reads_on_request(sized_files):
+    calls = []
+
+    def read(path):
+        calls.append(path)
+        return path
+
+    reader = ssite.files.ReadAhead(read, sized_files, ssite.files.NO_READ_AHEAD)
+    with reader:
+        assert reader.read(sized_files[1]) == sized_files[1]
+
+    assert calls == [sized_files[1]]
+
+
+def test_read_ahead_raises_read_errors(tmp_path):
+    def read(path):
+        with open(path) as f:
+            return f.read()
+
+    missing = str(tmp_path / "missing.html")
+    with ssite.files.ReadAhead(read, [missing]) as reader:
+        with pytest.raises(FileNotFoundError):
+            reader.read(missing)
@@ -0,0 +1,176 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import hashlib
+import os
+
+import pytest
+
+import ssite.files
+import ssite.fingerprint
+
+
+PAGE = """<html><head>
+<link rel="stylesheet" href="/css/style.css?v=1">
+<title>Blog</title>
+</head><body>
+<p>Written by hand: <img src="../css/logo.png" alt=""></p>
+<!--START INDEX-->
+<img src='../css/logo.png' srcset="../css/logo.png 1x,  /other.png 2x" alt="">
+<a href="/css/">CSS</a>
+<!--END INDEX-->
+</body></html>
+"""
+
+
+def short_hash(content):
+    return hashlib.sha256(content).hexdigest()[: ssite.fingerprint.HASH_LENGTH]
+
+
+@pytest.fixture
+def site_root(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_bytes(b"body {}")
+    (tmp_path / "css" / "logo.png").write_bytes(b"png")
+    (tmp_path / "blog").mkdir()
+    (tmp_path / "blog" / "index.html").write_text(PAGE)
+    return tmp_path
+
+
+def fingerprint(site_root, manifest):
+    assets = ssite.fingerprint.find_assets([str(site_root / "css")])
+    written, renames = ssite.fingerprint.fingerprint_assets(
+        str(site_root), assets, manifest
+    )
+    changed = ssite.fingerprint.rewrite_file(
+        str(site_root / "blog" / "index.html"), str(site_root), renames
+    )
+    return written, changed
+
+
+def test_fingerprint_rewrites_references(site_root):
+    manifest = ssite.fingerprint.new_manifest()
+
+    written, changed = fingerprint(site_root, manifest)
+
+    style_name = "style.{}.css".format(short_hash(b"body {}"))
+    logo_name = "logo.{}.png".format(short_hash(b"png"))
+    assert sorted(written) == sorted(
+        [str(site_root / "css" / style_name), str(site_root / "css" / logo_name)]
+    )
+    assert (site_root / "css" / style_name).read_bytes() == b"body {}"
+    assert changed
+    # The reference outside of the generated parts is left alone.
+    assert (site_root / "blog" / "index.html").read_text() == (
+        PAGE.replace("style.css", style_name).replace(
+            "../css/logo.png 1x,  /other.png 2x",
+            "../css/{} 1x, /other.png 2x".format(logo_name),
+        )
+        # The src attribute keeps its quotes.
+        .replace("'../css/logo.png'", "'../css/{}'".format(logo_name))
+    )
+    assert manifest["assets"]["css/style.css"]["fingerprinted"] == (
+        "css/" + style_name
+    )
+
+
+def test_fingerprint_skips_unchanged_assets(site_root, monkeypatch):
+    manifest = ssite.fingerprint.new_manifest()
+    fingerprint(site_root, manifest)
+
+    def fail(path):
+        raise AssertionError("unchanged asset should not be hashed")
+
+    monkeypatch.setattr(ssite.fingerprint, "hash_file", fail)
+    assert fingerprint(site_root, manifest) == ([], False)
+
+
+def test_fingerprint_updates_references_to_changed_asset(site_root):
+    manifest = ssite.fingerprint.new_manifest()
+    fingerprint(site_root, manifest)
+    old_name = "style.{}.css".format(short_hash(b"body {}"))
+    (site_root / "css" / "style.css").write_bytes(b"body { color: red }")
+    os.utime(site_root / "css" / "style.css", ns=(0, 1))
+
+    written, changed = fingerprint(site_root, manifest)
+
+    new_name = "style.{}.css".format(short_hash(b"body { color: red }"))
+    assert written == [str(site_root / "css" / new_name)]
+    assert changed
+    # The old copy is kept for pages which still refer to it.
+    assert (site_root / "css" / old_name).read_bytes() == b"body {}"
+    assert manifest["assets"]["css/style.css"]["previous"] == ["css/" + old_name]
+    content = (site_root / "blog" / "index.html").read_text()
+    assert 'href="/css/{}?v=1"'.format(new_name) in content
+
+
+def test_fingerprint_updates_references_to_any_previous_copy(site_root):
+    manifest = ssite.fingerprint.new_manifest()
+    fingerprint(site_root, manifest)
+    page = (site_root / "blog" / "index.html").read_text()
+    for mtime, content in enumerate((b"body { color: red }", b"body { color: blue }")):
+        (site_root / "css" / "style.css").write_bytes(content)
+        os.utime(site_root / "css" / "style.css", ns=(0, mtime + 1))
+        fingerprint(site_root, manifest)
+
+    # A page written before the last two changes still refers to the first copy.
+    (site_root / "blog" / "index.html").write_text(page)
+    _, changed = fingerprint(site_root, manifest)
+
+    new_name = "style.{}.css".format(short_hash(b"body { color: blue }"))
+    assert changed
+    content = (site_root / "blog" / "index.html").read_text()
+    assert 'href="/css/{}?v=1"'.format(new_name) in content
+
+
+def test_remove_previous_keeps_history(site_root):
+    manifest = ssite.fingerprint.new_manifest()
+    fingerprint(site_root, manifest)
+    old_name = "style.{}.css".format(short_hash(b"body {}"))
+    (site_root / "css" / (old_name + ".gz")).write_bytes(b"")
+    (site_root / "css" / "style.css").write_bytes(b"body { color: red }")
+    os.utime(site_root / "css" / "style.css", ns=(0, 1))
+    fingerprint(site_root, manifest)
+
+    removed = ssite.fingerprint.remove_previous(str(site_root), manifest)
+
+    assert sorted(removed) == [
+        str(site_root / "css" / old_name),
+        str(site_root / "css" / (old_name + ".gz")),
+    ]
+    assert manifest["assets"]["css/style.css"]["previous"] == ["css/" + old_name]
+
+
+def test_main_keeps_manifest_outside_of_site(site_root, capsys):
+    parser = argparse.ArgumentParser()
+    ssite.fingerprint.add_cli_args(parser)
+    args = parser.parse_args(
+        [
+            str(site_root),
+            "--asset",
+            str(site_root / "css"),
+            "--precompress",
+            "",
+            str(site_root / "blog"),
+        ]
+    )
+
+    ssite.fingerprint.main(args)
+
+    assert not (site_root / ssite.fingerprint.MANIFEST_FILENAME).exists()
+    manifest = ssite.fingerprint.load_manifest(
+        ssite.files.cache_path(str(site_root), ssite.fingerprint.MANIFEST_FILENAME)
+    )
+    assert "css/style.css" in manifest["assets"]
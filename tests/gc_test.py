@@ -0,0 +1,52 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import pytest
+
+from ssite.syndicate import gc
+
+
+KEPT = "sha256-" + "a" * 64
+ORPHAN = "sha256-" + "b" * 64
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    for image_dir in (KEPT, ORPHAN):
+        (tmp_path / "images" / image_dir).mkdir(parents=True)
+        (tmp_path / "images" / image_dir / "original.png").write_bytes(b"12345")
+    (tmp_path / "blog.xml").write_text(
+        "<img src=\"https://syndicate.example.com/images/{}/original.png\">".format(
+            KEPT
+        )
+    )
+    return tmp_path
+
+
+def test_collect_garbage_removes_orphans(output_dir):
+    removed = gc.collect_garbage(str(output_dir), [str(output_dir / "blog.xml")])
+
+    assert removed == [(str(output_dir / "images" / ORPHAN), 5)]
+    assert os.listdir(str(output_dir / "images")) == [KEPT]
+
+
+def test_collect_garbage_dry_run_keeps_orphans(output_dir):
+    removed = gc.collect_garbage(
+        str(output_dir), [str(output_dir / "blog.xml")], dry_run=True
+    )
+
+    assert removed == [(str(output_dir / "images" / ORPHAN), 5)]
+    assert sorted(os.listdir(str(output_dir / "images"))) == [KEPT, ORPHAN]
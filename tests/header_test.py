@@ -0,0 +1,153 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import os
+
+import jinja2
+import pytest
+
+import ssite.header
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    (
+        ("<!DOCTYPE html>\n<html>\n<head>\n", None),
+        (
+            '<head>\n<link rel="stylesheet" href="/s.css">\n'
+            '<link rel="canonical" href="https://example.com/a/">\n'
+            '<link rel="canonical" href="https://example.com/b/">\n',
+            "https://example.com/a/",
+        ),
+        (
+            "<head><link href='https://example.com/a/' rel='alternate canonical'/>",
+            "https://example.com/a/",
+        ),
+        (
+            '<head><!-- <link rel="canonical" href="https://example.com/x/"> -->',
+            None,
+        ),
+    ),
+)
+def test_find_canonical_link(header, expected):
+    assert ssite.header.find_canonical_link(header) == expected
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "header.jinja2.html").write_text(
+        '<!DOCTYPE html>\n<link rel="canonical" href="{{ rel_canonical }}">'
+    )
+    tmp_path = tmp_path / "site"
+    (tmp_path / "a").mkdir(parents=True)
+    (tmp_path / "a" / "index.html").write_text(
+        "<!DOCTYPE html>\n<title>A</title>\n<p>A</p>\n"
+    )
+    (tmp_path / "b.html").write_text(
+        '<link rel="canonical" href="https://example.com/elsewhere/">\n'
+        "<title>B</title>\n"
+    )
+    return tmp_path
+
+
+def run_header(site, *content_paths, jobs=1):
+    parser = argparse.ArgumentParser()
+    ssite.header.add_cli_args(parser)
+    args = parser.parse_args(
+        [
+            "--jobs",
+            str(jobs),
+            "https://example.com/",
+            str(site),
+            str(site.parent / "header.jinja2.html"),
+        ]
+        + [str(path) for path in content_paths]
+    )
+    ssite.header.main(args)
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_main_updates_directory(site, jobs):
+    run_header(site, site, jobs=jobs)
+
+    assert (site / "a" / "index.html").read_text() == (
+        "<!DOCTYPE html>\n"
+        '<link rel="canonical" href="https://example.com/a/">\n'
+        "<title>A</title>\n<p>A</p>\n"
+    )
+    assert (site / "b.html").read_text() == (
+        "<!DOCTYPE html>\n"
+        '<link rel="canonical" href="https://example.com/elsewhere/">\n'
+        "<title>B</title>\n"
+    )
+
+
+def test_main_skips_unchanged_headers(site):
+    run_header(site, site / "a" / "index.html")
+    path = site / "a" / "index.html"
+    os.utime(path, ns=(0, 0))
+
+    run_header(site, path)
+
+    assert os.stat(path).st_mtime_ns == 0
+
+
+def test_main_reports_failures(site, capsys):
+    (site / "c.html").write_text("<p>No title</p>\n")
+
+    with pytest.raises(SystemExit):
+        run_header(site, site / "*.html")
+
+    assert "no <title> tag found" in capsys.readouterr().err
+    assert (site / "b.html").read_text().startswith("<!DOCTYPE html>\n")
+
+
+@pytest.mark.parametrize(
+    ("template", "expected"),
+    (
+        (
+            '<link rel="canonical" href="{{ rel_canonical }}">',
+            '<link rel="canonical" href="https://example.com/?a=1&b=2">',
+        ),
+        (
+            '<link rel="canonical" href="{{ rel_canonical | e }}">',
+            '<link rel="canonical" href="https://example.com/?a=1&amp;b=2">',
+        ),
+        ("{{ rel_canonical | length }}", "28"),
+    ),
+)
+def test_compile_header_matches_template(template, expected):
+    render = ssite.header.compile_header(jinja2.Template(template))
+    assert render("https://example.com/?a=1&b=2") == expected
+
+
+def test_replace_header_keeps_rest_of_file(site):
+    path = site / "long.html"
+    rest = "<title>Long</title>\n" + "<p>line</p>\n" * 10000 + "<p>no newline</p>"
+    path.write_text("<head>\n<meta charset=utf-8>\n" + rest)
+
+    content = ssite.header.replace_header(
+        str(path),
+        "https://example.com/",
+        str(site),
+        jinja2.Template("<head>{{ rel_canonical }}"),
+    )
+    assert content == "<head>https://example.com/long.html\n" + rest
+
+    run_header(site, path)
+    assert path.read_text() == (
+        "<!DOCTYPE html>\n"
+        '<link rel="canonical" href="https://example.com/long.html">\n' + rest
+    )
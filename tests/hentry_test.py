@@ -0,0 +1,152 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+import bs4
+import dateutil.parser
+import pytest
+import pytz
+
+import ssite.hentry
+import ssite.index
+
+
+ENTRY = (
+    '<article class="post h-entry">'
+    '<span class="p-name">Hello</span>'
+    '<div class="e-content"><article>Nested</article><p>Text</p></div>'
+    "</ARTICLE >"
+)
+
+
+@pytest.fixture(params=[False, True], ids=["read", "mmap"])
+def use_mmap(request, monkeypatch):
+    if request.param:
+        monkeypatch.setattr(ssite.hentry, "MMAP_THRESHOLD", 1)
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "markup,expected",
+    [
+        # No h-entry at all.
+        ("<!DOCTYPE html><meta http-equiv=refresh content='0; url=/'>", None),
+        # Sliced to just the entry.
+        (
+            "<!DOCTYPE html><title>Hi</title><nav>Menu</nav>\n"
+            + ENTRY
+            + "<footer>Footer</footer>",
+            ENTRY,
+        ),
+        # Unquoted class attribute.
+        (
+            "<header></header><div class=h-entry>Hi</div><p>After</p>",
+            "<div class=h-entry>Hi</div>",
+        ),
+        # The first mention isn't in a class, so keep the whole document.
+        (
+            "<p>About h-entry markup</p><div class='h-entry'>Hi</div>",
+            "<p>About h-entry markup</p><div class='h-entry'>Hi</div>",
+        ),
+        # The entry isn't closed, so keep the whole document.
+        (
+            "<p>Before</p><div class='h-entry'><div>Hi</div>",
+            "<p>Before</p><div class='h-entry'><div>Hi</div>",
+        ),
+    ],
+)
+def test_read_hentry_markup_slices_entry(tmp_path, use_mmap, markup, expected):
+    path = tmp_path / "index.html"
+    path.write_bytes(markup.encode("utf-8"))
+
+    assert ssite.hentry.read_hentry_markup(str(path), slice_entry=True) == expected
+    if expected is not None:
+        assert ssite.hentry.read_hentry_markup(str(path)) == markup
+
+
+def test_summary_from_sliced_entry_matches_document(tmp_path):
+    post_dir = tmp_path / "2016" / "05" / "05" / "note"
+    post_dir.mkdir(parents=True)
+    (post_dir / "index.html").write_text(
+        '<!DOCTYPE html><title>Hello</title><a href="../../">Up</a>\n'
+        '<article class="h-entry"><span class="p-name">Hello</span>'
+        '<time class="dt-published" datetime="2016-05-05T08:00:00"></time>'
+        '<img class="u-photo" src="photo.png" alt="Photo">'
+        '<div class="e-content"><p><a href="other/">Some</a> text.</p></div>'
+        "</article>\n<footer>Footer</footer>\n",
+        encoding="utf-8",
+    )
+
+    def summarize(slice_entry):
+        return ssite.index.summary_from_path(
+            str(tmp_path),
+            str(tmp_path),
+            "2016/05/05/note/index.html",
+            datetime.datetime(2016, 5, 5),
+            slice_entry=slice_entry,
+        )
+
+    assert summarize(True) == summarize(False)
+    assert summarize(True).photos[0]["src"] == "/2016/05/05/note/photo.png"
+
+
+def test_extract_hentry_categories_skip_nested_entries():
+    doc = bs4.BeautifulSoup(
+        '<article class="h-entry"><span class="p-name">Hello</span>'
+        '<div class="e-content">Text</div>'
+        '<a class="p-category" href="/tags/python/"> Python </a>'
+        '<span class="p-category">Photos</span>'
+        '<span class="p-category">Python</span>'
+        '<div class="h-entry"><span class="p-category">Reply</span></div>'
+        "</article>",
+        "html5lib",
+    )
+
+    entry = ssite.hentry.extract_hentry(
+        "2016/05/05/note/", datetime.datetime(2016, 5, 5), doc
+    )
+
+    assert entry.categories == ("Python", "Photos")
+    assert ssite.hentry.from_dict(ssite.hentry.to_dict(entry)) == entry
+
+
+@pytest.mark.parametrize(
+    "published",
+    (
+        pytz.timezone("America/Los_Angeles").localize(datetime.datetime(2018, 6, 1, 8)),
+        pytz.timezone("America/Los_Angeles").localize(datetime.datetime(2018, 1, 1)),
+        dateutil.parser.parse("2018-06-01T08:00:00-04:00"),
+        dateutil.parser.parse("2018-06-01T08:00:00Z"),
+        datetime.datetime(2018, 6, 1),
+    ),
+)
+def test_from_dict_keeps_time_zone_name(published):
+    entry = ssite.hentry.HEntry("Hello", published, "2018/06/01/hello/", "", None, ())
+
+    restored = ssite.hentry.from_dict(ssite.hentry.to_dict(entry))
+
+    assert restored == entry
+    assert restored.published.strftime("%Y-%m-%d %H:%M %Z %z") == (
+        published.strftime("%Y-%m-%d %H:%M %Z %z")
+    )
+
+
+def test_tokenize_skips_numbers_and_single_letters():
+    assert ssite.hentry.tokenize("A Bike ride in 2018, ÉTÉ") == [
+        "bike",
+        "ride",
+        "in",
+        "été",
+    ]
@@ -0,0 +1,176 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import datetime
+import io
+import shutil
+
+from PIL import Image
+
+import ssite.hentry
+import ssite.images
+import ssite.probe
+
+
+def entry_with_photos(*photos):
+    return ssite.hentry.HEntry(
+        "Photos",
+        datetime.datetime(2018, 6, 1),
+        "2018/06/01/photos/",
+        "",
+        None,
+        tuple(photos),
+    )
+
+
+def test_with_photo_sizes_measures_each_image_once(tmp_path, monkeypatch):
+    Image.new("RGB", (400, 200)).save(str(tmp_path / "wide.png"))
+    shutil.copy(str(tmp_path / "wide.png"), str(tmp_path / "copy.png"))
+    entries = [
+        entry_with_photos(
+            {"src": "/wide.png", "width": None, "height": None},
+            {"src": "/copy.png", "width": "100", "height": None},
+            {"src": "/missing.png", "width": None, "height": None},
+            {"src": "https://example.com/a.png", "width": None, "height": None},
+        )
+    ]
+    probe_image = ssite.probe.probe_image
+    probed = []
+
+    def probe(path):
+        probed.append(path)
+        return probe_image(path)
+
+    monkeypatch.setattr(ssite.probe, "probe_image", probe)
+    cache = ssite.images.new_cache()
+
+    measured = ssite.images.with_photo_sizes(entries, str(tmp_path), cache)
+
+    photos = measured[0].photos
+    assert (photos[0]["width"], photos[0]["height"]) == ("400", "200")
+    # The height is calculated from the aspect ratio.
+    assert (photos[1]["width"], photos[1]["height"]) == ("100", "50")
+    assert photos[2]["width"] is None
+    assert photos[3]["width"] is None
+    # Copies of an image share a content hash.
+    assert probed == [str(tmp_path / "wide.png")]
+
+    # The entries themselves are left alone.
+    assert entries[0].photos[0]["width"] is None
+
+    cache_path = str(tmp_path / "cache.json")
+    ssite.images.save_cache(cache_path, cache)
+    measured = ssite.images.with_photo_sizes(
+        entries, str(tmp_path), ssite.images.load_cache(cache_path)
+    )
+    assert measured[0].photos[0]["width"] == "400"
+    assert len(probed) == 1
+
+
+def test_add_image_attributes_lazy_loads_after_first_images():
+    markup = (
+        '<img src="/a.png">\n'
+        '<img src="/b.png" width="5" height="5"/>\n'
+        '<img src="/c.png" loading="eager">\n'
+        "<IMG src=/d.png />\n"
+    )
+
+    result = ssite.images.add_image_attributes(
+        markup, eager_images=1, sizes={"/a.png": ("4", "2"), "/b.png": ("8", "8")}
+    )
+
+    assert result == (
+        '<img src="/a.png" width="4" height="2">\n'
+        '<img src="/b.png" width="5" height="5" loading="lazy" decoding="async"/>\n'
+        '<img src="/c.png" loading="eager" decoding="async">\n'
+        '<IMG src=/d.png loading="lazy" decoding="async" />\n'
+    )
+
+
+def test_add_image_attributes_parses_attribute_values():
+    markup = (
+        '<p>1 < 2</p><img alt="a > b" src="/a.png?x=1&amp;y=2">'
+        '<script>"<img src=/b.png>"</script><img src=/c.png loading>'
+    )
+
+    result = ssite.images.add_image_attributes(
+        markup, eager_images=0, sizes={"/a.png?x=1&y=2": ("4", "2")}
+    )
+
+    assert result == (
+        '<p>1 < 2</p><img alt="a > b" src="/a.png?x=1&amp;y=2" width="4" '
+        'height="2" loading="lazy" decoding="async">'
+        '<script>"<img src=/b.png>"</script>'
+        '<img src=/c.png loading decoding="async">'
+    )
+
+
+def test_add_image_attributes_without_lazy_loading():
+    markup = '<img src="/a.png"><img src="/b.png">'
+
+    assert ssite.images.add_image_attributes(markup, eager_images=None) == markup
+
+
+def test_make_placeholder_is_tiny_png(tmp_path):
+    Image.new("RGBA", (1000, 500), color=(0, 0, 255, 128)).save(
+        str(tmp_path / "blue.png")
+    )
+
+    placeholder = ssite.images.make_placeholder(str(tmp_path / "blue.png"))
+
+    prefix = "data:image/png;base64,"
+    assert placeholder.startswith(prefix)
+    with Image.open(io.BytesIO(base64.b64decode(placeholder[len(prefix) :]))) as im:
+        assert im.size == (16, 8)
+        assert im.mode == "RGBA"
+
+
+def test_with_photo_placeholders_makes_each_placeholder_once(tmp_path, monkeypatch):
+    Image.new("RGB", (400, 200)).save(str(tmp_path / "wide.png"))
+    shutil.copy(str(tmp_path / "wide.png"), str(tmp_path / "copy.png"))
+    entries = [
+        entry_with_photos({"src": "/wide.png"}, {"src": "/copy.png"}),
+        entry_with_photos({"src": "/wide.png"}),
+    ]
+    make_placeholder = ssite.images.make_placeholder
+    made = []
+
+    def placeholder(path):
+        made.append(path)
+        return make_placeholder(path)
+
+    monkeypatch.setattr(ssite.images, "make_placeholder", placeholder)
+    cache = ssite.images.new_cache()
+
+    entries = ssite.images.with_photo_placeholders(entries, str(tmp_path), cache)
+
+    assert made == [str(tmp_path / "wide.png")]
+    placeholders = [photo["placeholder"] for entry in entries for photo in entry.photos]
+    assert len(set(placeholders)) == 1
+    assert placeholders[0].startswith("data:image/png;base64,")
+
+
+def test_with_photo_placeholders_replaces_stale_placeholder(tmp_path):
+    Image.new("RGB", (400, 200), color=(255, 0, 0)).save(str(tmp_path / "photo.png"))
+    entries = [entry_with_photos({"src": "/photo.png", "placeholder": "stale"})]
+
+    measured = ssite.images.with_photo_placeholders(
+        entries, str(tmp_path), ssite.images.new_cache()
+    )
+
+    assert measured[0].photos[0]["placeholder"] == ssite.images.make_placeholder(
+        str(tmp_path / "photo.png")
+    )
+    assert entries[0].photos[0]["placeholder"] == "stale"
@@ -146,3 +146,197 @@ def test_split_region_errors(content, region_name, expected_error_message):
     with pytest.raises(ValueError) as excinfo:
         ssite.index.split_region(content, region_name)
     assert expected_error_message in str(excinfo.value)
+
+
+def write_post(blog_dir, path, name):
+    post_dir = blog_dir / path
+    post_dir.mkdir(parents=True, exist_ok=True)
+    (post_dir / "index.html").write_text(
+        f'<article class="h-entry"><span class="p-name">{name}</span>'
+        '<div class="e-content">Text.</div></article>'
+    )
+    return post_dir / "index.html"
+
+
+@pytest.fixture
+def blog_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    blog_dir = tmp_path / "blog"
+    blog_dir.mkdir()
+    (blog_dir / "index.html").write_text("<!--START INDEX-->\n<!--END INDEX-->\n")
+    (blog_dir / "index.html.jinja2").write_text(
+        "{% for entry in entries %}{{ entry.name }}\n{% endfor %}"
+    )
+    write_post(blog_dir, "2018/06/01/a", "A")
+    write_post(blog_dir, "2018/06/03/c", "C")
+    return blog_dir
+
+
+def update_index(blog_dir, add_paths=None):
+    ssite.index.update_index(
+        str(blog_dir),
+        str(blog_dir / "index.html"),
+        str(blog_dir / "index.html.jinja2"),
+        add_paths=add_paths,
+    )
+    return (blog_dir / "index.html").read_text()
+
+
+def test_update_index_add_parses_only_new_posts(blog_dir, monkeypatch):
+    update_index(blog_dir)
+    new_post = write_post(blog_dir, "2018/06/02/b", "B")
+    write_post(blog_dir, "2018/06/03/c", "Changed, but not added")
+    parsed = []
+    summary_from_path = ssite.index.summary_from_path
+
+    def record_summary(site_root, index_root, path, path_date, **kwargs):
+        parsed.append(path)
+        return summary_from_path(site_root, index_root, path, path_date, **kwargs)
+
+    monkeypatch.setattr(ssite.index, "summary_from_path", record_summary)
+
+    content = update_index(blog_dir, add_paths=[str(new_post)])
+
+    assert parsed == [os.path.join("2018", "06", "02", "b", "index.html")]
+    assert content == "<!--START INDEX-->\nC\nB\nA\n\n<!--END INDEX-->\n"
+
+
+def test_update_index_add_replaces_and_removes_entries(blog_dir):
+    update_index(blog_dir)
+    write_post(blog_dir, "2018/06/03/c", "C2")
+    (blog_dir / "2018/06/01/a/index.html").write_text("<p>No longer an entry.</p>")
+
+    content = update_index(
+        blog_dir,
+        add_paths=[str(blog_dir / "2018/06/03/c"), str(blog_dir / "2018/06/01/a")],
+    )
+
+    assert content == "<!--START INDEX-->\nC2\n\n<!--END INDEX-->\n"
+    assert content == update_index(blog_dir)
+
+
+def test_update_index_add_without_saved_entries_rebuilds(blog_dir):
+    content = update_index(blog_dir, add_paths=[str(blog_dir / "2018/06/01/a")])
+
+    assert content == "<!--START INDEX-->\nC\nA\n\n<!--END INDEX-->\n"
+    entries_path = ssite.index.entries_path_for(str(blog_dir / "index.html"))
+    assert os.path.exists(entries_path)
+    assert not os.path.exists(str(blog_dir / "index.html.entries.json"))
+
+
+def test_update_index_add_rejects_paths_outside_blog(blog_dir, tmp_path):
+    update_index(blog_dir)
+
+    with pytest.raises(ValueError, match="is not a post"):
+        update_index(blog_dir, add_paths=[str(tmp_path / "other" / "index.html")])
+
+
+def test_build_tag_index_merges_similar_tags():
+    entries = [
+        ssite.hentry.HEntry(
+            name, datetime.datetime(2018, 6, day), path, "", None, (), categories
+        )
+        for name, day, path, categories in (
+            ("C", 3, "c/", ("Python", "Web Dev")),
+            ("B", 2, "b/", ("photos",)),
+            ("A", 1, "a/", ("python", "web-dev", "!!!")),
+        )
+    ]
+
+    tags = ssite.index.build_tag_index(entries)
+
+    assert tags == {
+        "python": ssite.index.Tag("Python", [0, 2]),
+        "web-dev": ssite.index.Tag("Web Dev", [0, 2]),
+        "photos": ssite.index.Tag("photos", [1]),
+    }
+
+
+@pytest.mark.parametrize(
+    "tag,expected",
+    (
+        ("Web Dev", "web-dev"),
+        ("C", "c"),
+        ("C++", "c-plus-plus"),
+        ("C#", "c-sharp"),
+        ("R&D", "r-and-d"),
+        ("!!!", ""),
+    ),
+)
+def test_tag_slug(tag, expected):
+    assert ssite.index.tag_slug(tag) == expected
+
+
+def test_build_tag_index_warns_about_shared_pages(caplog):
+    entries = [
+        ssite.hentry.HEntry("A", datetime.datetime(2018, 6, 1), "a/", "", None, (), tags)
+        for tags in (("C", "C++", "Web Dev"), ("C*", "web-dev"), ("C*",))
+    ]
+
+    tags = ssite.index.build_tag_index(entries)
+
+    assert sorted(tags) == ["c", "c-plus-plus", "web-dev"]
+    assert [record.getMessage() for record in caplog.records] == [
+        'Tags "C" and "C*" share the page "c"'
+    ]
+
+
+def test_update_index_writes_changed_tag_pages(blog_dir):
+    tags_dir = blog_dir.parent / "tags"
+    tags_dir.mkdir()
+    (tags_dir / "tag.html.jinja2").write_text(
+        "<h1>{{ tag }}</h1>\n<!--START INDEX-->\n<!--END INDEX-->\n"
+    )
+    (tags_dir / "index.html.jinja2").write_text(
+        "{% for entry in entries %}{{ entry.name }}\n{% endfor %}"
+    )
+    (blog_dir / "2018/06/01/a/index.html").write_text(
+        '<article class="h-entry"><span class="p-name">A</span>'
+        '<div class="e-content">Text.</div>'
+        '<span class="p-category">Cats</span><span class="p-category">Dogs</span>'
+        "</article>"
+    )
+    (blog_dir / "2018/06/03/c/index.html").write_text(
+        '<article class="h-entry"><span class="p-name">C</span>'
+        '<div class="e-content">Text.</div><span class="p-category">Cats</span>'
+        "</article>"
+    )
+
+    ssite.index.update_index(
+        str(blog_dir),
+        str(blog_dir / "index.html"),
+        str(blog_dir / "index.html.jinja2"),
+        tags_dir=str(tags_dir),
+    )
+
+    assert (tags_dir / "cats" / "index.html").read_text() == (
+        "<h1>Cats</h1>\n<!--START INDEX-->\nC\nA\n\n<!--END INDEX-->"
+    )
+    assert (tags_dir / "dogs" / "index.html").read_text() == (
+        "<h1>Dogs</h1>\n<!--START INDEX-->\nA\n\n<!--END INDEX-->"
+    )
+
+    os.utime(str(tags_dir / "cats" / "index.html"), ns=(0, 0))
+    os.utime(str(tags_dir / "dogs" / "index.html"), ns=(0, 0))
+    write_post(blog_dir, "2018/06/03/c", "C2")
+
+    changed = ssite.index.update_tag_pages(
+        str(tags_dir),
+        ssite.index.load_entries(
+            ssite.index.entries_path_for(str(blog_dir / "index.html"))
+        ),
+    )
+    assert changed == []
+
+    ssite.index.update_index(
+        str(blog_dir),
+        str(blog_dir / "index.html"),
+        str(blog_dir / "index.html.jinja2"),
+        add_paths=[str(blog_dir / "2018/06/03/c")],
+        tags_dir=str(tags_dir),
+    )
+
+    assert (tags_dir / "cats" / "index.html").read_text() == (
+        "<h1>Cats</h1>\n<!--START INDEX-->\nA\n\n<!--END INDEX-->"
+    )
+    assert os.stat(str(tags_dir / "dogs" / "index.html")).st_mtime_ns == 0
@@ -0,0 +1,105 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+
+import pytest
+
+import ssite.links
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><link rel="stylesheet" href="/style.css"></head>
+<body>
+<a href="../02/">Previous</a>
+<a href="/blog/missing/">Missing</a>
+<img src="photo.jpg" srcset="photo.jpg 1x, photo%402x.jpg 2x">
+<video poster="poster.jpg"></video>
+<a href="https://example.com/">Elsewhere</a>
+<a href="mailto:me@example.com">Mail</a>
+<a href="#top">Top</a>
+<a href="?page=2">Next page</a>
+<a href="../../../../../outside.html">Outside</a>
+</body>
+</html>
+"""
+
+
+@pytest.fixture
+def site_root(tmp_path):
+    (tmp_path / "style.css").write_text("")
+    post_dir = tmp_path / "blog" / "03"
+    post_dir.mkdir(parents=True)
+    (post_dir / "index.html").write_text(PAGE)
+    (post_dir / "photo.jpg").write_text("")
+    (post_dir / "photo@2x.jpg").write_text("")
+    (tmp_path / "blog" / "02").mkdir()
+    (tmp_path / "blog" / "02" / "index.html").write_text("")
+    (tmp_path / "blog" / "missing").mkdir()
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "HEAD").write_text("")
+    return tmp_path
+
+
+def test_scan_site_skips_version_control(site_root):
+    site_files = ssite.links.scan_site(str(site_root))
+
+    assert "blog/03/photo.jpg" in site_files.files
+    assert "blog/missing" in site_files.dirs
+    assert "" in site_files.dirs
+    assert not any(path.startswith(".git") for path in site_files.files)
+
+
+def test_scan_site_stops_at_symlink_cycles(site_root):
+    (site_root / "blog" / "03" / "up").symlink_to(site_root / "blog")
+    (site_root / "shared").symlink_to(site_root / "blog" / "03")
+
+    site_files = ssite.links.scan_site(str(site_root))
+
+    assert "blog/03/up" in site_files.dirs
+    assert not any(path.startswith("blog/03/up/") for path in site_files.dirs)
+    assert "shared/photo.jpg" in site_files.files
+
+
+def test_check_references_reports_missing_files(site_root):
+    site_files = ssite.links.scan_site(str(site_root))
+    content_path = str(site_root / "blog" / "03" / "index.html")
+    references = ssite.links.find_references(content_path)
+
+    broken = list(
+        ssite.links.check_references(
+            str(site_root), site_files, content_path, references
+        )
+    )
+
+    assert [(ref.line, ref.attr, ref.value) for ref in broken] == [
+        (6, "href", "/blog/missing/"),
+        (8, "poster", "poster.jpg"),
+        (13, "href", "../../../../../outside.html"),
+    ]
+
+
+def test_main_exits_with_error_for_broken_links(site_root, monkeypatch, capsys):
+    monkeypatch.chdir(site_root)
+    parser = argparse.ArgumentParser()
+    ssite.links.add_cli_args(parser)
+
+    with pytest.raises(SystemExit) as exc_info:
+        ssite.links.main(parser.parse_args(["-j", "1"]))
+
+    assert exc_info.value.code == 1
+    out, err = capsys.readouterr()
+    assert out.splitlines()[0] == "blog/03/index.html:6: broken href /blog/missing/"
+    assert "Found 3 broken of 12 references in 2 pages" in err
@@ -0,0 +1,146 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+
+import bs4
+import pytest
+
+import ssite.note
+
+
+NOTE_TEMPLATE = (
+    '<!DOCTYPE html>\n<title>{{ note_text }}</title>\n<article class="h-entry">'
+    '<time class="dt-published" datetime="{{ published.isoformat() }}"></time>'
+    '<span class="p-name e-content">{{ note }}</span>'
+    "{% for pixelart in pixelarts %}"
+    '<img class="u-photo" src="{{ pixelart }}" alt="">'
+    "{% endfor %}</article>\n"
+)
+
+
+@pytest.mark.parametrize(
+    "note",
+    [
+        "Hello, world!",
+        "  leading and trailing whitespace  ",
+        "\r\nWindows\r\nline endings\r\n",
+        "a &amp; b &copy 2018 x&nbsp;y",
+        "<p>Two</p>\n<p>paragraphs</p>",
+        "<b> bold</b> and <a href='https://example.com/'>a link</a>",
+        "<!-- comment -->Text<br>after",
+        "<script>var x = '<b>';</script>script",
+    ],
+)
+def test_note_text_matches_html5lib(note):
+    assert ssite.note.note_text(note) == bs4.BeautifulSoup(note, "html5lib").text
+
+
+@pytest.fixture
+def blog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "note.jinja2.html").write_text(NOTE_TEMPLATE)
+    blog_dir = tmp_path / "blog"
+    blog_dir.mkdir()
+    (blog_dir / "index.html").write_text(
+        "<ul>\n<!--START INDEX-->\n<!--END INDEX-->\n</ul>\n"
+    )
+    (blog_dir / "index.html.jinja2").write_text(
+        "{% for entry in entries %}<li>{{ entry.path }}</li>\n{% endfor %}"
+    )
+    return blog_dir
+
+
+def run_import(blog, import_path, jobs):
+    parser = argparse.ArgumentParser()
+    ssite.note.add_cli_args(parser)
+    args = parser.parse_args(
+        [
+            "--blog_dir",
+            str(blog),
+            "--import_file",
+            str(import_path),
+            "--jobs",
+            str(jobs),
+            "--update_index",
+            str(blog.parent / "note.jinja2.html"),
+        ]
+    )
+    ssite.note.main(args)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_import_ndjson_adds_notes_once(blog, capsys, jobs):
+    import_path = blog.parent / "notes.ndjson"
+    import_path.write_text(
+        json.dumps({"text": "First", "published": "2018-06-01T08:00:00"})
+        + "\n\n"
+        + json.dumps({"text": "Second", "published": "2018-06-02T09:30:00-04:00"})
+        + "\n"
+    )
+
+    run_import(blog, import_path, jobs)
+
+    first = (blog / "2018" / "06" / "01" / "note-080000" / "index.html").read_text()
+    assert 'datetime="2018-06-01T08:00:00-07:00"' in first
+    assert (blog / "2018" / "06" / "02" / "note-093000" / "index.html").exists()
+    assert (blog / "index.html").read_text() == (
+        "<ul>\n<!--START INDEX-->\n"
+        "<li>2018/06/02/note-093000/</li>\n"
+        "<li>2018/06/01/note-080000/</li>\n"
+        "\n<!--END INDEX-->\n</ul>\n"
+    )
+    assert "Added 2 notes, 0 already existed" in capsys.readouterr().err
+
+    run_import(blog, import_path, jobs)
+    assert "Added 0 notes, 2 already existed" in capsys.readouterr().err
+
+
+def test_import_csv_with_pixelart(blog, capsys):
+    (blog.parent / "cat.png").write_bytes(b"not really a png")
+    import_path = blog.parent / "notes.csv"
+    import_path.write_text(
+        "text,published,pixelart\n"
+        '"A cat, drawn",2018-06-01 08:00:00,cat.png\n'
+        "No date,,\n"
+    )
+
+    with pytest.raises(SystemExit):
+        run_import(blog, import_path, 1)
+
+    note_dir = blog / "2018" / "06" / "01" / "note-080000"
+    assert (note_dir / "cat.png").exists()
+    assert "<title>A cat, drawn</title>" in (note_dir / "index.html").read_text()
+    assert "missing published date" in capsys.readouterr().err
+
+
+def test_import_skips_invalid_records(blog, capsys):
+    import_path = blog.parent / "notes.ndjson"
+    import_path.write_text(
+        json.dumps({"published": "2018-06-01T08:00:00"})
+        + "\nnot json\n"
+        + json.dumps({"text": "Kept", "published": "2018-06-02T09:30:00"})
+        + "\n"
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        run_import(blog, import_path, 1)
+
+    assert exc_info.value.code == 1
+    assert (blog / "2018" / "06" / "02" / "note-093000" / "index.html").exists()
+    err = capsys.readouterr().err
+    assert "notes.ndjson:1: missing text" in err
+    assert "notes.ndjson:2: " in err
+    assert "Added 1 notes, 0 already existed, 2 failed." in err
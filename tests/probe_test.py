@@ -0,0 +1,54 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from PIL import Image
+
+import ssite.probe
+
+
+def test_probe_image_static(tmp_path):
+    path = str(tmp_path / "static.png")
+    Image.new("RGB", (40, 30)).save(path)
+
+    info = ssite.probe.probe_image(path)
+
+    assert info == ssite.probe.ImageInfo(
+        format="PNG", width=40, height=30, frame_count=1, orientation=1
+    )
+    assert not ssite.probe.is_animated(info)
+    assert ssite.probe.display_size(info) == (40, 30)
+
+
+def test_probe_image_animated(tmp_path):
+    path = str(tmp_path / "animated.gif")
+    frames = [Image.new("RGB", (16, 8), color=(color, 0, 0)) for color in (0, 128, 255)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+
+    info = ssite.probe.probe_image(path)
+
+    assert info.format == "GIF"
+    assert info.frame_count == 3
+    assert ssite.probe.is_animated(info)
+
+
+def test_probe_image_rotated(tmp_path):
+    path = str(tmp_path / "rotated.jpg")
+    exif = Image.Exif()
+    exif[ssite.probe.ORIENTATION_TAG] = 6
+    Image.new("RGB", (40, 30)).save(path, exif=exif)
+
+    info = ssite.probe.probe_image(path)
+
+    assert info.orientation == 6
+    assert ssite.probe.display_size(info) == (30, 40)
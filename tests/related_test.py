@@ -0,0 +1,160 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import jinja2
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+import ssite.index  # noqa: E402
+import ssite.related  # noqa: E402
+
+
+POSTS = {
+    "01": ("Baking bread", "Sourdough bread needs flour, water, and a starter."),
+    "02": ("More bread", "Rye bread with a sourdough starter and flour."),
+    "03": ("Cycling", "A long bike ride along the river trail."),
+    "04": ("Bike repair", "Fixing a flat tire after a ride on the trail."),
+}
+
+TEMPLATE = jinja2.Template(
+    '{% for entry in entries %}<a href="{{ entry.url }}">{{ entry.name }}</a>'
+    "{% endfor %}"
+)
+
+
+def write_post(site_root, day, name, text, region=True):
+    post_dir = site_root / "blog" / "2018" / "06" / day / "post"
+    post_dir.mkdir(parents=True, exist_ok=True)
+    related = "<!--START RELATED-->\n<!--END RELATED-->\n" if region else ""
+    (post_dir / "index.html").write_text(
+        '<article class="h-entry">\n'
+        '<h1 class="p-name">{}</h1>\n'
+        '<div class="e-content"><p>{}</p>\n{}</div>\n'
+        "</article>\n".format(name, text, related)
+    )
+    return post_dir / "index.html"
+
+
+@pytest.fixture
+def site_root(tmp_path):
+    for day, (name, text) in POSTS.items():
+        write_post(tmp_path, day, name, text)
+    return tmp_path
+
+
+def update(site_root, cache, limit=1):
+    updated = ssite.related.update_related(
+        str(site_root), str(site_root / "blog"), cache, limit=limit
+    )
+    ssite.related.write_related(
+        str(site_root), str(site_root / "blog"), cache, updated, TEMPLATE
+    )
+    return updated
+
+
+def related_region(site_root, day):
+    content = (
+        site_root / "blog" / "2018" / "06" / day / "post" / "index.html"
+    ).read_text()
+    return ssite.index.split_region(content, "RELATED")[1]
+
+
+def test_similar_documents_in_small_blocks():
+    matrix = ssite.related.tfidf_matrix(
+        [{"bread": 2, "flour": 1}, {"bread": 1, "rye": 1}, {"bike": 1}]
+    )
+
+    # Each block only has room for one row of scores.
+    results = list(
+        ssite.related.similar_documents(matrix, [0, 1, 2], 2, max_memory=8 * 3)
+    )
+
+    assert [(row, top) for row, _, top in results] == [(0, [1]), (1, [0]), (2, [])]
+    assert results[0][1][1] == pytest.approx(results[1][1][0])
+
+
+def test_update_related_writes_regions(site_root):
+    cache = ssite.related.new_cache({"limit": 1})
+
+    updated = update(site_root, cache)
+
+    assert updated == {"2018/06/{}/post/".format(day) for day in POSTS}
+    assert related_region(site_root, "01") == (
+        '<a href="/blog/2018/06/02/post/">More bread</a>\n'
+    )
+    assert related_region(site_root, "03") == (
+        '<a href="/blog/2018/06/04/post/">Bike repair</a>\n'
+    )
+
+
+def test_update_related_only_parses_changed_posts(site_root, monkeypatch):
+    cache = ssite.related.new_cache({"limit": 1})
+    update(site_root, cache)
+    cache_path = str(site_root / "cache.json")
+    ssite.related.save_cache(cache_path, cache)
+    cache = ssite.related.load_cache(cache_path, {"limit": 1})
+
+    # Posts about bread are now more related to a new post than each other.
+    write_post(
+        site_root,
+        "05",
+        "Bread and bikes",
+        "Sourdough rye bread with flour, water, and a starter.",
+    )
+    summaries_from_paths = ssite.index.summaries_from_paths
+    parsed = []
+
+    def summaries(site_root, indexed_dir, paths, **kwargs):
+        parsed.extend(path for path, _ in paths)
+        return summaries_from_paths(site_root, indexed_dir, paths, **kwargs)
+
+    monkeypatch.setattr(ssite.index, "summaries_from_paths", summaries)
+    updated = update(site_root, cache)
+
+    assert parsed == ["2018/06/05/post/index.html"]
+    assert "2018/06/05/post/" in updated
+    assert "2018/06/03/post/" not in updated
+    assert related_region(site_root, "01") == (
+        '<a href="/blog/2018/06/05/post/">Bread and bikes</a>\n'
+    )
+
+    # Writing the regions doesn't make the posts stale.
+    parsed.clear()
+    assert update(site_root, cache) == set()
+    assert parsed == []
+
+
+def test_update_related_drops_removed_posts(site_root):
+    cache = ssite.related.new_cache({"limit": 1})
+    update(site_root, cache)
+
+    os.remove(site_root / "blog" / "2018" / "06" / "02" / "post" / "index.html")
+    updated = update(site_root, cache)
+
+    assert "2018/06/02/post/" not in cache["posts"]
+    assert "2018/06/01/post/" in updated
+    assert "More bread" not in related_region(site_root, "01")
+
+
+def test_load_cache_ignores_different_options(site_root):
+    cache = ssite.related.new_cache({"limit": 1})
+    update(site_root, cache)
+    cache_path = str(site_root / "cache.json")
+    ssite.related.save_cache(cache_path, cache)
+
+    assert ssite.related.load_cache(cache_path, {"limit": 2})["posts"] == {}
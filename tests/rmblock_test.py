@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import os
+import re
+
 import pytest
 
 from ssite import rmblock
@@ -44,3 +48,160 @@ from ssite import rmblock
 def test_remove_blocks(content, start_block, end_block, expected):
     got = rmblock.remove_blocks(content, start_block, end_block)
     assert got == expected
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "",
+        "\n",
+        "No newline",
+        "a\n[START]",
+        "a\n[START]\n",
+        "a\n[START]\nb\n[END]",
+        "[START]\n[END]\n\nc\r\n[START]\nd\n",
+    ],
+)
+def test_remove_blocks_from_file_matches_remove_blocks(tmp_path, content):
+    path = tmp_path / "content.html"
+    path.write_bytes(content.encode("utf-8"))
+    rules = rmblock.compile_rules([(r"\[START\]$", r"\[END\]$")])
+
+    rmblock.remove_blocks_from_file(str(path), rules)
+
+    expected = rmblock.remove_blocks(
+        content.replace("\r\n", "\n"), r"\[START\]$", r"\[END\]$"
+    )
+    assert path.read_bytes().decode("utf-8") == expected
+
+
+def test_main_removes_blocks_from_rules(tmp_path):
+    rules_path = tmp_path / "rules.tsv"
+    rules_path.write_text(
+        "# Analytics\n"
+        "<!-- analytics -->\t<!-- /analytics -->\n"
+        "\n"
+        "<!-- ads -->\t<!-- /ads -->\n"
+    )
+    path = tmp_path / "content.html"
+    path.write_text(
+        "<p>Keep</p>\n"
+        "<!-- ads -->\n<p>Ad</p>\n<!-- /analytics -->\n<p>Ad</p>\n<!-- /ads -->\n"
+        "<!-- analytics -->\n<script></script>\n<!-- /analytics -->\n"
+        "<!-- old -->\n<p>Old</p>\n<!-- /old -->\n"
+        "<p>Also keep</p>\n"
+    )
+    parser = argparse.ArgumentParser()
+    rmblock.add_cli_args(parser)
+    args = parser.parse_args(
+        [
+            "--rules",
+            str(rules_path),
+            "--block",
+            "<!-- old -->",
+            "<!-- /old -->",
+            str(path),
+        ]
+    )
+
+    rmblock.main(args)
+
+    assert path.read_text() == "<p>Keep</p>\n<p>Also keep</p>\n"
+
+
+def test_load_rules_rejects_missing_end(tmp_path):
+    rules_path = tmp_path / "rules.tsv"
+    rules_path.write_text("<!-- ads -->\n")
+
+    with pytest.raises(ValueError, match="rules.tsv:1"):
+        rmblock.load_rules(str(rules_path))
+
+
+def test_main_accepts_positional_regexes(tmp_path):
+    path = tmp_path / "content.html"
+    path.write_text("Some\n[START]\nhidden\n[END]\nhere\n")
+    parser = argparse.ArgumentParser()
+    rmblock.add_cli_args(parser)
+
+    rmblock.main(parser.parse_args([r"\[START\]$", r"\[END\]$", str(path)]))
+
+    assert path.read_text() == "Some\nhere\n"
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        (r"\[START\]$", "[START]"),
+        (r"^\s*<!-- ads -->", "<!-- ads -->"),
+        ("<div class=\"ad\"", '<div class="ad"'),
+        ("abcd?ef", "abc"),
+        ("ab{2,3}cdef", "cdef"),
+        ("x[a-z]+yz", "yz"),
+        ("(?:optional)?tail", "tail"),
+        ("(?i)start", None),
+        ("one|two", None),
+        (r"\d+", None),
+        (r"\x3c!-- ads --\x3e", "!-- ads --"),
+        (r"\u003cdiv\U0000003e", "div"),
+        (r"\N{LESS-THAN SIGN}p class", "p class"),
+        (r"(ad)\1 here", None),
+        (r"\0 here", None),
+    ],
+)
+def test_required_literal(pattern, expected):
+    assert rmblock._required_literal(re.compile(pattern)) == expected
+
+
+def test_main_removes_blocks_with_hex_escapes(tmp_path, capsys):
+    path = tmp_path / "content.html"
+    path.write_text("Keep\n<!-- ads -->\nAd\n<!-- /ads -->\n")
+    parser = argparse.ArgumentParser()
+    rmblock.add_cli_args(parser)
+
+    rmblock.main(
+        parser.parse_args([r"\x3c!-- ads --\x3e", r"\x3c!-- /ads --\x3e", str(path)])
+    )
+
+    assert path.read_text() == "Keep\n"
+    assert "Removed 1 blocks from 1 of 1 files" in capsys.readouterr().err
+
+
+def test_contains_any_across_chunks(tmp_path):
+    path = tmp_path / "content.html"
+    path.write_bytes(b"x" * 10 + b"[START]" + b"y" * 10)
+
+    assert rmblock.contains_any(str(path), [b"[START]"], chunk_size=13)
+    assert not rmblock.contains_any(str(path), [b"[END]"], chunk_size=13)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_main_updates_directory(tmp_path, capsys, jobs):
+    site = tmp_path / "site"
+    (site / "a").mkdir(parents=True)
+    (site / "a" / "index.html").write_text("a\n[START]\nb\n[END]\nc\n[START]\n")
+    (site / "b.html").write_text("no blocks\n")
+    (site / "c.txt").write_text("[START]\n")
+    os.utime(site / "b.html", ns=(0, 0))
+    parser = argparse.ArgumentParser()
+    rmblock.add_cli_args(parser)
+
+    rmblock.main(
+        parser.parse_args(["-j", jobs, r"\[START\]$", r"\[END\]$", str(site)])
+    )
+
+    assert (site / "a" / "index.html").read_text() == "a\nc"
+    assert os.stat(site / "b.html").st_mtime_ns == 0
+    assert (site / "c.txt").read_text() == "[START]\n"
+    assert "Removed 2 blocks from 1 of 2 files" in capsys.readouterr().err
+
+
+def test_remove_blocks_compiles_rules_once():
+    rmblock._compiled_rules.cache_clear()
+
+    for _ in range(3):
+        contents = rmblock.remove_blocks(
+            "a\n[START]\nb\n[END]\nc", r"\[START\]$", r"\[END\]$"
+        )
+        assert contents == "a\nc"
+
+    assert rmblock._compiled_rules.cache_info().misses == 1
@@ -0,0 +1,326 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import datetime
+import os
+import os.path
+
+import bs4
+from PIL import Image
+import pytest
+
+import ssite.blog
+import ssite.hentry
+import ssite.images
+import ssite.syndicate.cache
+import ssite.syndicate.rss
+
+
+@pytest.fixture
+def site_root(tmp_path):
+    post_dir = tmp_path / "blog" / "2018" / "06" / "01" / "photo"
+    post_dir.mkdir(parents=True)
+    Image.new("RGB", (1000, 500), color=(255, 0, 0)).save(str(post_dir / "red.png"))
+    return str(tmp_path)
+
+
+def syndicate(site_root, tmp_path, image_options):
+    output_dir = str(tmp_path / "syndicate") + "/"
+    content_path = os.path.join(
+        site_root, "blog", "2018", "06", "01", "photo", "index.html"
+    )
+    soup = bs4.BeautifulSoup(
+        '<article class="h-entry">'
+        '<span class="p-name">Photo</span>'
+        '<img class="u-photo" src="red.png" alt="red">'
+        '<div class="e-content">A red square.</div>'
+        "</article>",
+        "html5lib",
+    )
+    ssite.syndicate.rss.syndicate_images(
+        soup,
+        "https://syndicate.example.com/",
+        output_dir,
+        site_root,
+        content_path,
+        image_options=image_options,
+    )
+    return soup, output_dir
+
+
+def test_syndicate_images_default_resizes_once(site_root, tmp_path):
+    soup, output_dir = syndicate(
+        site_root, tmp_path, ssite.syndicate.rss.DEFAULT_IMAGE_OPTIONS
+    )
+    img = soup.find("img")
+    assert img["src"].endswith("/resized-600px.png")
+    assert (img["width"], img["height"]) == ("600", "300")
+    assert not img.has_attr("srcset")
+    assert soup.find("picture") is None
+
+    (image_dir,) = os.listdir(os.path.join(output_dir, "images"))
+    assert sorted(os.listdir(os.path.join(output_dir, "images", image_dir))) == [
+        "original.png",
+        "resized-600px.png",
+    ]
+
+
+def test_syndicate_images_writes_srcset_and_formats(site_root, tmp_path):
+    image_options = ssite.syndicate.rss.ImageOptions(
+        resize_width=600, srcset_widths=(320, 1200), formats=("webp",)
+    )
+    soup, output_dir = syndicate(site_root, tmp_path, image_options)
+
+    img = soup.find("img")
+    assert img["src"].endswith("/resized-600px.png")
+    # 1200px is wider than the original, so it is skipped.
+    srcset = img["srcset"].split(", ")
+    assert len(srcset) == 2
+    assert srcset[0].endswith("/resized-320px.png 320w")
+    assert srcset[1].endswith("/resized-600px.png 600w")
+
+    photo = ssite.hentry.extract_hentry(
+        "2018/06/01/photo/", datetime.datetime(2018, 6, 1), soup
+    ).photos[0]
+    assert photo["srcset"] == img["srcset"]
+    assert len(photo["sources"]) == 1
+    assert photo["sources"][0]["type"] == "image/webp"
+    assert photo["sources"][0]["srcset"].endswith("/resized-600px.webp 600w")
+
+    (image_dir,) = os.listdir(os.path.join(output_dir, "images"))
+    assert sorted(os.listdir(os.path.join(output_dir, "images", image_dir))) == [
+        "original.png",
+        "resized-320px.png",
+        "resized-320px.webp",
+        "resized-600px.png",
+        "resized-600px.webp",
+    ]
+
+
+def test_syndicate_images_skips_resizing_small_photos(tmp_path):
+    post_dir = tmp_path / "blog" / "2018" / "06" / "01" / "photo"
+    post_dir.mkdir(parents=True)
+    Image.new("RGB", (500, 250)).save(str(post_dir / "red.png"))
+
+    soup, output_dir = syndicate(
+        str(tmp_path), tmp_path, ssite.syndicate.rss.DEFAULT_IMAGE_OPTIONS
+    )
+
+    img = soup.find("img")
+    assert img["src"].endswith("/original.png")
+    assert (img["width"], img["height"]) == ("500", "250")
+
+
+def test_syndicate_images_keeps_thumbnail_dimensions(tmp_path):
+    post_dir = tmp_path / "blog" / "2018" / "06" / "01" / "photo"
+    post_dir.mkdir(parents=True)
+    Image.new("RGB", (2000, 1000)).save(str(post_dir / "big.png"))
+    output_dir = str(tmp_path / "syndicate") + "/"
+    soup = bs4.BeautifulSoup(
+        '<img class="u-photo thumbnail" src="big.png" width="100" height="50">',
+        "html5lib",
+    )
+
+    ssite.syndicate.rss.syndicate_images(
+        soup,
+        "https://syndicate.example.com/",
+        output_dir,
+        str(tmp_path),
+        str(post_dir / "index.html"),
+    )
+
+    img = soup.find("img")
+    assert img["src"].endswith("/original.png")
+    assert (img["width"], img["height"]) == ("100", "50")
+
+
+def test_newest_summaries_stops_after_limit():
+    blog_paths = [
+        ssite.blog.BlogPath("2018/06/0{}/post/index.html".format(day), date)
+        for day, date in (
+            (1, datetime.datetime(2018, 6, 1)),
+            (3, datetime.datetime(2018, 6, 3)),
+            (2, datetime.datetime(2018, 6, 2)),
+        )
+    ]
+    summarized = []
+
+    def summarize(blog_path):
+        summarized.append(blog_path.path)
+        return ssite.hentry.HEntry(
+            "Post", blog_path.published, blog_path.path, "", None, ()
+        )
+
+    entries = ssite.syndicate.rss.newest_summaries(blog_paths, summarize, limit=2)
+
+    assert [entry.published.day for entry in entries] == [3, 2]
+    assert summarized == [
+        "2018/06/03/post/index.html",
+        "2018/06/02/post/index.html",
+    ]
+
+
+def test_newest_summaries_with_zero_limit():
+    blog_paths = [
+        ssite.blog.BlogPath(
+            "2018/06/01/post/index.html", datetime.datetime(2018, 6, 1)
+        )
+    ]
+
+    def summarize(blog_path):
+        raise AssertionError("no entries should be summarized")
+
+    assert ssite.syndicate.rss.newest_summaries(blog_paths, summarize, limit=0) == []
+
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_limit_must_be_positive(limit, capsys):
+    parser = argparse.ArgumentParser()
+    ssite.syndicate.rss.add_cli_args(parser)
+
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--limit", limit, "blog/"])
+
+    assert "expected a positive number" in capsys.readouterr().err
+
+
+def test_cached_summary_reuses_unchanged_entry(tmp_path, monkeypatch):
+    post_dir = tmp_path / "blog" / "2018" / "06" / "01" / "post"
+    post_dir.mkdir(parents=True)
+    (post_dir / "index.html").write_text(
+        '<article class="h-entry">'
+        '<span class="p-name">Cached</span>'
+        '<div class="e-content">Some text.</div>'
+        "</article>"
+    )
+    blog_path = ssite.blog.BlogPath(
+        "2018/06/01/post/index.html", datetime.datetime(2018, 6, 1)
+    )
+    cache_path = str(tmp_path / "cache.json")
+    cache = ssite.syndicate.cache.new_cache({})
+
+    def summarize():
+        return ssite.syndicate.rss.cached_summary(
+            cache,
+            str(tmp_path),
+            str(tmp_path / "blog"),
+            blog_path,
+            "https://syndicate.example.com/",
+            str(tmp_path / "syndicate"),
+        )
+
+    entry = summarize()
+    ssite.syndicate.cache.save_cache(cache_path, cache)
+    cache = ssite.syndicate.cache.load_cache(cache_path, {})
+
+    assert cache["entries"]["2018/06/01/post/"]["entry"]["name"] == "Cached"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged entry should not be parsed")
+
+    monkeypatch.setattr(ssite.syndicate.rss, "summary_from_path", fail)
+    assert summarize() == entry
+
+
+def test_render_feed_writes_each_format(tmp_path):
+    (tmp_path / "atom.jinja2.xml").write_text(
+        "<feed>{% for entry in entries %}<title>{{ entry.name }}</title>"
+        "{% endfor %}</feed>"
+    )
+    (tmp_path / "feed.jinja2.json").write_text(
+        '{"items": [{{ fragments | join(", ") }}]}'
+    )
+    (tmp_path / "item.jinja2.json").write_text('{"title": {{ entry.name | tojson }}}')
+    entries = [
+        ssite.hentry.HEntry(
+            "Post", datetime.datetime(2018, 6, 1), "2018/06/01/post/", "", None, ()
+        )
+    ]
+    cache = ssite.syndicate.cache.new_cache({})
+    feeds = [
+        ssite.syndicate.rss.FeedOutput(
+            str(tmp_path / "atom.jinja2.xml"), "atom.xml", None
+        ),
+        ssite.syndicate.rss.FeedOutput(
+            str(tmp_path / "feed.jinja2.json"),
+            "feed.json",
+            str(tmp_path / "item.jinja2.json"),
+        ),
+    ]
+
+    for feed in feeds:
+        ssite.syndicate.rss.render_feed(feed, entries, str(tmp_path), cache)
+
+    assert (tmp_path / "atom.xml").read_text() == "<feed><title>Post</title></feed>\n"
+    assert (tmp_path / "feed.json").read_text() == '{"items": [{"title": "Post"}]}\n'
+
+
+def test_extract_summary_adds_syndicated_placeholders(site_root, tmp_path):
+    output_dir = str(tmp_path / "syndicate") + "/"
+    index_root = os.path.join(site_root, "blog")
+    path = os.path.join(index_root, "2018", "06", "01", "photo", "index.html")
+    markup = (
+        '<article class="h-entry">'
+        '<span class="p-name">Photo</span>'
+        '<img class="u-photo" src="red.png" alt="red">'
+        '<div class="e-content">A red square.</div>'
+        "</article>"
+    )
+    image_options = ssite.syndicate.rss.ImageOptions(
+        resize_width=600, srcset_widths=(), formats=(), placeholders=True
+    )
+
+    entry = ssite.syndicate.rss.extract_summary(
+        site_root,
+        index_root,
+        path,
+        datetime.datetime(2018, 6, 1),
+        markup,
+        "https://syndicate.example.com/",
+        output_dir,
+        image_options=image_options,
+    )
+
+    (image_dir,) = os.listdir(os.path.join(output_dir, "images"))
+    placeholder_path = os.path.join(
+        output_dir, "images", image_dir, ssite.images.PLACEHOLDER_FILENAME
+    )
+    with open(placeholder_path) as placeholder_file:
+        placeholder = placeholder_file.read()
+    assert placeholder.startswith("data:image/png;base64,")
+    assert entry.photos[0]["placeholder"] == placeholder
+
+
+def test_add_placeholders_matches_image_directory(site_root, tmp_path):
+    output_dir = str(tmp_path / "syndicate") + "/"
+    image_options = ssite.syndicate.rss.ImageOptions(
+        resize_width=600, srcset_widths=(), formats=(), placeholders=True
+    )
+    soup, _ = syndicate(site_root, tmp_path, image_options)
+    entry = ssite.hentry.extract_hentry(
+        "2018/06/01/photo/", datetime.datetime(2018, 6, 1), soup
+    )
+    (image_dir,) = os.listdir(os.path.join(output_dir, "images"))
+    placeholder_path = os.path.join(
+        output_dir, "images", image_dir, ssite.images.PLACEHOLDER_FILENAME
+    )
+    os.remove(placeholder_path)
+    entry.photos[0]["placeholder"] = "stale"
+
+    ssite.syndicate.rss.add_placeholders(entry, output_dir)
+
+    with open(placeholder_path) as placeholder_file:
+        assert entry.photos[0]["placeholder"] == placeholder_file.read()
+    assert entry.photos[0]["placeholder"].startswith("data:image/png;base64,")
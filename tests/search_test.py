@@ -0,0 +1,135 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import pytest
+
+import ssite.index
+import ssite.search
+
+
+def write_post(site_root, day, name, text, summary=None):
+    post_dir = site_root / "blog" / "2018" / "06" / day / "post"
+    post_dir.mkdir(parents=True, exist_ok=True)
+    summary_html = (
+        '<p class="p-summary">{}</p>\n'.format(summary) if summary is not None else ""
+    )
+    (post_dir / "index.html").write_text(
+        '<article class="h-entry">\n'
+        '<h1 class="p-name">{}</h1>\n{}'
+        '<div class="e-content"><p>{}</p></div>\n'
+        "</article>\n".format(name, summary_html, text)
+    )
+
+
+@pytest.fixture
+def site_root(tmp_path):
+    write_post(tmp_path, "01", "Baking bread", "Sourdough needs a starter.")
+    write_post(tmp_path, "02", "Cycling", "A bike ride.", summary="Riding bread")
+    return tmp_path
+
+
+def update(site_root, **kwargs):
+    return ssite.search.update_search_index(
+        str(site_root), str(site_root / "blog"), str(site_root / "search"), **kwargs
+    )
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def search(site_root, term):
+    search_dir = site_root / "search"
+    index = read_json(search_dir / "index.json")
+    prefix = ssite.search.term_prefix(term, index["prefix_length"])
+    if prefix not in index["shards"]:
+        return []
+    postings = read_json(search_dir / "terms-{}.json".format(prefix)).get(term, [])
+    return [
+        (index["documents"][postings[i]][1], postings[i + 1])
+        for i in range(0, len(postings), 2)
+    ]
+
+
+def test_snippet_shortens_at_word_break():
+    assert ssite.search.snippet("one  two\nthree", length=20) == "one two three"
+    assert ssite.search.snippet("one two three", length=10) == "one two…"
+
+
+def test_update_search_index_weights_fields(site_root):
+    update(site_root)
+
+    # Words in the title count 3 times, and words in the summary count twice.
+    assert search(site_root, "bread") == [("Baking bread", 3), ("Cycling", 2)]
+    assert search(site_root, "sourdough") == [("Baking bread", 1)]
+    assert search(site_root, "missing") == []
+
+    index = read_json(site_root / "search" / "index.json")
+    assert index["documents"][1] == [
+        "/blog/2018/06/02/post/",
+        "Cycling",
+        "2018-06-02T00:00:00",
+        "Riding bread",
+    ]
+    # The cache isn't published with the shards.
+    assert not (site_root / "search" / ssite.search.CACHE_FILENAME).exists()
+
+
+def test_update_search_index_only_rewrites_changed_shards(site_root, monkeypatch):
+    update(site_root)
+    write_post(site_root, "03", "Repairs", "Patching a tire.")
+    summaries_from_paths = ssite.index.summaries_from_paths
+    parsed = []
+
+    def summaries(site_root, indexed_dir, paths, **kwargs):
+        parsed.extend(path for path, _ in paths)
+        return summaries_from_paths(site_root, indexed_dir, paths, **kwargs)
+
+    monkeypatch.setattr(ssite.index, "summaries_from_paths", summaries)
+    written = update(site_root)
+
+    assert parsed == ["2018/06/03/post/index.html"]
+    search_dir = str(site_root / "search")
+    assert os.path.join(search_dir, "terms-re.json") in written
+    assert os.path.join(search_dir, "terms-br.json") not in written
+    assert search(site_root, "repairs") == [("Repairs", 3)]
+    assert search(site_root, "bread") == [("Baking bread", 3), ("Cycling", 2)]
+
+    parsed.clear()
+    assert update(site_root) == []
+    assert parsed == []
+
+
+def test_update_search_index_removes_old_terms(site_root):
+    update(site_root)
+    write_post(site_root, "01", "Baking", "Pizza dough.")
+    os.remove(site_root / "blog" / "2018" / "06" / "02" / "post" / "index.html")
+
+    update(site_root)
+
+    assert search(site_root, "bread") == []
+    assert search(site_root, "pizza") == [("Baking", 1)]
+    assert not (site_root / "search" / "terms-cy.json").exists()
+    index = read_json(site_root / "search" / "index.json")
+    assert index["documents"][1] is None
+
+    # Rebuilding compacts the document IDs.
+    update(site_root, rebuild=True)
+    index = read_json(site_root / "search" / "index.json")
+    assert [document[1] for document in index["documents"]] == ["Baking"]
+    assert search(site_root, "pizza") == [("Baking", 1)]
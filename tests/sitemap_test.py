@@ -0,0 +1,102 @@
+# Copyright 2026, The Ssite Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import ssite.sitemap
+
+
+NS = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+
+
+@pytest.fixture
+def site_root(tmp_path):
+    for day in range(1, 6):
+        post_dir = tmp_path / "blog" / "2018" / "06" / "0{}".format(day) / "post"
+        post_dir.mkdir(parents=True)
+        (post_dir / "index.html").write_text("<p>Post</p>")
+        os.utime(post_dir / "index.html", (0, 1528000000 + day))
+    (tmp_path / "blog" / "2018" / "index.html").write_text("<p>Not a post</p>")
+    return tmp_path
+
+
+def write_sitemap(site_root, **kwargs):
+    return ssite.sitemap.write_sitemap(
+        ssite.sitemap.post_urls(
+            "https://example.com/", str(site_root), str(site_root / "blog")
+        ),
+        str(site_root / "sitemap.xml"),
+        "https://example.com/",
+        str(site_root),
+        **kwargs
+    )
+
+
+def locs(path, tag="url"):
+    root = ET.parse(str(path)).getroot()
+    return [elem.find("sm:loc", NS).text for elem in root.findall(f"sm:{tag}", NS)]
+
+
+def test_write_sitemap_single_file(site_root):
+    paths = write_sitemap(site_root)
+
+    assert paths == [str(site_root / "sitemap.xml")]
+    assert locs(site_root / "sitemap.xml") == [
+        "https://example.com/blog/2018/06/0{}/post/".format(day)
+        for day in range(5, 0, -1)
+    ]
+    root = ET.parse(str(site_root / "sitemap.xml")).getroot()
+    assert root.find("sm:url/sm:lastmod", NS).text == "2018-06-03T04:26:45+00:00"
+
+
+def test_write_sitemap_shards_by_count_and_removes_stale_shards(site_root):
+    write_sitemap(site_root, max_urls=1)
+    assert os.path.exists(str(site_root / "sitemap-5.xml"))
+
+    paths = write_sitemap(site_root, max_urls=2)
+
+    assert [os.path.basename(path) for path in paths] == [
+        "sitemap-1.xml",
+        "sitemap-2.xml",
+        "sitemap-3.xml",
+    ]
+    assert locs(site_root / "sitemap.xml", tag="sitemap") == [
+        "https://example.com/sitemap-1.xml",
+        "https://example.com/sitemap-2.xml",
+        "https://example.com/sitemap-3.xml",
+    ]
+    assert len(locs(site_root / "sitemap-3.xml")) == 1
+    assert not os.path.exists(str(site_root / "sitemap-4.xml"))
+    assert sorted(name for name in os.listdir(str(site_root)) if "sitemap" in name) == [
+        "sitemap-1.xml",
+        "sitemap-2.xml",
+        "sitemap-3.xml",
+        "sitemap.xml",
+    ]
+
+    write_sitemap(site_root)
+    assert not os.path.exists(str(site_root / "sitemap-1.xml"))
+
+
+def test_write_sitemap_shards_by_size(site_root):
+    max_bytes = 450
+    paths = write_sitemap(site_root, max_bytes=max_bytes)
+
+    assert len(paths) > 1
+    assert sum(len(locs(path)) for path in paths) == 5
+    for path in paths:
+        assert os.path.getsize(path) <= max_bytes